@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for the preprocessing scripts on synthetic data.
+Generates inputs at each requested size (see synthetic_data.py), runs every
+script's main() in a fresh worker process and records wall time, peak memory
+and the per-stage times from the script's run report, then compares the run
+against a stored baseline.
+
+Run from the repository root:
+    python benchmark_preprocess.py                          # 10k publications
+    python benchmark_preprocess.py --sizes 10000 100000     # several sizes
+    python benchmark_preprocess.py --save-baseline          # store this run as the baseline
+    python benchmark_preprocess.py --require-baseline       # fail without a baseline to compare (CI)
+
+The baseline lives in the gitignored .build-cache/, so a fresh clone has none
+and a plain run only reports; pass --baseline to compare against a stored
+file and --require-baseline to make a missing one an error.
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+from instrumentation import REPORT_SUFFIX, peak_rss_mb
+from synthetic_data import write_inputs
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = '.build-cache/benchmark-data'
+BASELINE_FILE = '.build-cache/benchmark-baseline.json'
+RESULTS_FILE = '.build-cache/benchmark-latest.json'
+
+# Absolute growth below these is treated as noise, whatever the relative change
+NOISE_FLOOR = {'wall_seconds': 0.1, 'peak_memory_mb': 5.0}
+
+# Script -> the output its run report is written next to (see instrumentation.py)
+SCRIPTS = {
+    'preprocess_recommendation_counts': 'static/jsons/recommendation_counts.json',
+    'preprocess_graph_data': 'static/jsons/graph_data_optimized.json',
+    'preprocess_category_graph_data': 'static/jsons/category_graph_data_optimized.json',
+}
+
+
+def run_worker(script: str, data_root: str) -> Dict:
+    """Run one script's main() against data_root in this process and measure it."""
+    sys.path.insert(0, ROOT)
+    module = importlib.import_module(script)
+
+    os.chdir(data_root)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        module.main()
+    wall = time.perf_counter() - start
+
+    # Per-stage times come from the run report the script wrote next to its output
+    with open(os.path.splitext(SCRIPTS[script])[0] + REPORT_SUFFIX) as f:
+        run_report = json.load(f)
+    return {
+        'wall_seconds': round(wall, 3),
+        'peak_memory_mb': round(peak_rss_mb(), 1),
+        'stages': {stage['name']: round(stage['seconds'], 3) for stage in run_report['stages']},
+    }
+
+
+def run_benchmark(script: str, data_root: str) -> Dict:
+    """Run a script in a fresh interpreter so its peak memory is its own."""
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--worker', script, data_root],
+        cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{script} failed on {data_root}:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def prepare_data(size: int, seed: int) -> str:
+    """Generate (or reuse) the synthetic inputs for one size."""
+    root = os.path.join(ROOT, DATA_DIR, f"{size}-{seed}")
+    if not os.path.exists(os.path.join(root, 'static', 'jsons', 'recommendations.json')):
+        print(f"Generating synthetic data for {size:,} publications...")
+        write_inputs(root, size, seed)
+    return root
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Regressions where wall time or peak memory grew by more than threshold (and the noise floor)."""
+    regressions = []
+    for key, run in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        for metric in ('wall_seconds', 'peak_memory_mb'):
+            grown = run[metric] > base[metric] * (1 + threshold)
+            if grown and run[metric] - base[metric] > NOISE_FLOOR[metric]:
+                regressions.append(
+                    f"{key} {metric}: {base[metric]} -> {run[metric]} (+{run[metric] / base[metric] - 1:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the preprocessing scripts on synthetic data.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000], help='publication counts to benchmark')
+    parser.add_argument('--scripts', nargs='+', choices=list(SCRIPTS), default=list(SCRIPTS))
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed relative growth over the baseline (default 0.25)')
+    parser.add_argument('--baseline', default=BASELINE_FILE, help='baseline file to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='store this run as the new baseline')
+    parser.add_argument('--require-baseline', action='store_true',
+                        help='fail when there is no baseline, or no baseline entry for a benchmarked script and size')
+    parser.add_argument('--worker', nargs=2, metavar=('SCRIPT', 'DATA_ROOT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(*args.worker)))
+        return 0
+
+    os.chdir(ROOT)
+    results: Dict[str, Dict] = {}
+    for size in args.sizes:
+        data_root = prepare_data(size, args.seed)
+        for script in args.scripts:
+            result = run_benchmark(script, data_root)
+            key = f"{script}@{size}"
+            results[key] = result
+            stages = ', '.join(f"{name} {seconds:.2f}s" for name, seconds in
+                               sorted(result['stages'].items(), key=lambda item: -item[1]))
+            print(f"{key}: {result['wall_seconds']:.2f}s, peak {result['peak_memory_mb']:.0f} MB")
+            print(f"    {stages}")
+
+    report = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'seed': args.seed,
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(RESULTS_FILE), exist_ok=True)
+    with open(RESULTS_FILE, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved baseline to {args.baseline}")
+        return 0
+
+    baseline: Optional[Dict] = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    if baseline is None:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one")
+        return 1 if args.require_baseline else 0
+
+    missing = [key for key in results if key not in baseline['results']]
+    if missing and args.require_baseline:
+        print(f"\nNo baseline entry in {args.baseline} for: {', '.join(missing)}")
+        return 1
+
+    regressions = compare(results, baseline['results'], args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions against {args.baseline} (threshold {args.threshold:.0%})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
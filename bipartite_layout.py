@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Bipartite layout and edge geometry for the networks view.
+Ports the layout in src/lib/components/networks/data.ts (bestsellers on the
+left, recommended publications on the right, fixed vertical spacing) and
+replaces its per-edge spreading with hierarchical edge bundling: each edge is
+routed through the centroids of the position bands (a binary hierarchy over
+each column) that contain its endpoints, then straightened towards a direct
+line by the bundling strength. Only the y of each waypoint is written out;
+bundledPath in src/lib/components/networks/data.ts draws the control
+polygon as a cubic B-spline, which stays inside it.
+"""
+
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Layout constants shared with data.ts (processLeftSideNodes / processRightSideNodes)
+LEFT_X_RATIO = 0.25
+RIGHT_X_RATIO = 0.75
+TOP_MARGIN = 80
+NODE_SPACING = 25
+
+# Bundling waypoints as fractions of each column's hierarchy depth, from the endpoint
+# inwards: deeper levels are wider bands, so edges merge as they approach the middle
+BUNDLE_DEPTHS = (0.25, 0.5, 0.75)
+BUNDLING_STRENGTH = 0.85
+
+Point = Tuple[float, float]
+
+
+def subscriber_sort_key(subscriber_count: Optional[int], name: str) -> Tuple:
+    """data.ts ordering: known subscriber counts first (descending), then by name."""
+    if subscriber_count is not None:
+        return (0, -subscriber_count, '')
+    return (1, 0, name.casefold())
+
+
+def column_positions(count: int, top: float = TOP_MARGIN, spacing: float = NODE_SPACING) -> array:
+    """y of each slot in a column stacked with fixed spacing."""
+    return array('d', (top + index * spacing for index in range(count)))
+
+
+def connection_strength(subscriber_count: Optional[int], source_type: str, target_type: str) -> float:
+    """Edge strength in [0.1, 1], as calculateConnectionStrength in data.ts."""
+    strength = 0.5
+    if subscriber_count is not None:
+        if subscriber_count > 100000:
+            strength += 0.3
+        elif subscriber_count > 50000:
+            strength += 0.2
+        elif subscriber_count > 10000:
+            strength += 0.1
+    elif source_type in ('bestseller', 'dual'):
+        strength += 0.2
+    if source_type == 'dual':
+        strength += 0.1
+    if target_type == 'dual':
+        strength += 0.1
+    return min(1.0, max(0.1, strength))
+
+
+class BandHierarchy:
+    """
+    Binary hierarchy over the slots of one column: the band of slot r at
+    level k holds slots [r >> k << k, (r >> k) + 1 << k). Band centroids come
+    from prefix sums, so each lookup is O(1).
+    """
+
+    def __init__(self, ys: Sequence[float], depths: Sequence[float] = BUNDLE_DEPTHS) -> None:
+        self.count = len(ys)
+        self.prefix = array('d', [0.0])
+        for y in ys:
+            self.prefix.append(self.prefix[-1] + y)
+        depth = max(1, (self.count - 1).bit_length())
+        self.levels = [max(1, round(depth * fraction)) for fraction in depths]
+
+    def centroid(self, slot: int, level: int) -> float:
+        start = (slot >> level) << level
+        end = min(start + (1 << level), self.count)
+        return (self.prefix[end] - self.prefix[start]) / (end - start)
+
+
+def bundled_control_points(source: Point, target: Point, source_slot: int, target_slot: int,
+                           left: BandHierarchy, right: BandHierarchy,
+                           strength: float = BUNDLING_STRENGTH) -> List[Point]:
+    """
+    Control polygon for one edge: the endpoint, then band centroids of
+    increasing size towards the middle on the source side, mirrored on the
+    target side. Each waypoint is blended with the straight line so
+    strength 0 gives a direct edge and 1 the fully bundled route.
+    """
+    (x1, y1), (x2, y2) = source, target
+    steps = len(left.levels)
+    span = x2 - x1
+    route: List[Point] = [source]
+    for i, level in enumerate(left.levels, 1):
+        route.append((x1 + span * i / (2 * steps + 1), left.centroid(source_slot, level)))
+    for i, level in enumerate(reversed(right.levels)):
+        route.append((x1 + span * (steps + 1 + i) / (2 * steps + 1), right.centroid(target_slot, level)))
+    route.append(target)
+
+    last = len(route) - 1
+    return [
+        (x, strength * y + (1 - strength) * (y1 + (y2 - y1) * (x - x1) / span if span else y1))
+        if 0 < index < last else (x, y)
+        for index, (x, y) in enumerate(route)
+    ]
+
+
+def edge_statistics(strengths: Sequence[float], sources: Sequence[int], targets: Sequence[int],
+                    num_nodes: int) -> Dict:
+    """Same fields as calculateEdgeStatistics in data.ts (connections counted in and out)."""
+    connections = array('q', [0]) * num_nodes
+    for source, target in zip(sources, targets):
+        connections[source] += 1
+        connections[target] += 1
+    total = len(strengths)
+    return {
+        'totalEdges': total,
+        'averageStrength': sum(strengths) / total if total else 0.0,
+        'maxConnectionsPerNode': max(connections, default=0),
+        'nodesWithMultipleConnections': sum(1 for count in connections if count > 1),
+    }
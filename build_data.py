@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Incremental build entry point for the static/jsons data products.
+Models every preprocessing step as a node in a DAG, fingerprints its inputs
+and code with content hashes, skips steps whose fingerprint is unchanged and
+runs independent steps in parallel across a process pool.
+
+Inputs and outputs may be glob patterns ('**' spans directories); patterns
+are expanded when a step is about to run, so they see the files upstream
+steps have just written.
+
+Run from the repository root:
+    python build_data.py                 # build whatever is stale
+    python build_data.py graph_data      # build one step (and stale dependencies)
+    python build_data.py --force         # rebuild everything
+"""
+
+import argparse
+import glob
+import hashlib
+import importlib
+import json
+import os
+import re
+import subprocess
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, NamedTuple, Optional, Set
+
+from content_hash import ROOT, hash_file, local_module_files
+from instrumentation import REPORT_SUFFIX
+
+STATE_FILE = '.build-cache/state.json'
+POSTS_FILE = 'data/posts.json'
+
+
+class Step(NamedTuple):
+    name: str
+    # Paths or glob patterns; a pattern may match no files, a path must exist
+    inputs: List[str]
+    outputs: List[str]
+    # Python module with a main() to run, or a command line for non-Python steps
+    module: Optional[str] = None
+    command: Optional[List[str]] = None
+    # Code files hashed alongside the module and its local imports
+    code: List[str] = []
+
+
+STEPS = [
+    Step(
+        name='recommendation_counts',
+        inputs=['static/jsons/recommendations.json', 'static/jsons/subscriber_counts.json'],
+        outputs=['static/jsons/recommendation_counts.json', 'static/jsons/publications_merged.json',
+                 'src/lib/files/publications_merged.json'],
+        module='preprocess_recommendation_counts',
+    ),
+    Step(
+        name='graph_data',
+        inputs=['static/jsons/recommendations.json', 'static/jsons/subscriber_counts.json'],
+        outputs=['static/jsons/graph_data_optimized.json', 'static/jsons/graph_data_optimized.bin',
+                 'static/jsons/graph_data_lod/index.json', 'static/jsons/graph_data_ego/index.json'],
+        module='preprocess_graph_data',
+    ),
+    Step(
+        name='bipartite_network',
+        inputs=['static/jsons/recommendations.json', 'static/jsons/subscriber_counts.json'],
+        outputs=['static/jsons/bipartite_network.json'],
+        module='preprocess_bipartite_network',
+    ),
+    Step(
+        name='search_index',
+        inputs=['static/jsons/subscriber_counts.json'],
+        outputs=['static/jsons/search/index.json'],
+        module='preprocess_search_index',
+    ),
+    # Only when the crawled posts are present (they are not checked in)
+    *([Step(
+        name='topic_analytics',
+        inputs=[POSTS_FILE, 'static/jsons/subscriber_counts.json'],
+        outputs=['static/jsons/topics_meta/index.json', 'static/jsons/topics/knowledge_graph.json',
+                 'static/jsons/topics/knowledge_graph_by_publication.json', 'static/jsons/topic_explorer/index.json',
+                 'static/jsons/topic_explorer/timeseries/*.json'],
+        module='preprocess_topic_analytics',
+    )] if os.path.exists(POSTS_FILE) else []),
+    Step(
+        name='topic_timeseries',
+        inputs=['static/jsons/topic_explorer/timeseries/*.json', 'static/jsons/topic_explorer/index.json'],
+        outputs=['static/jsons/topic_explorer/timeseries.bin', 'static/jsons/topic_explorer/timeseries_index.json'],
+        module='preprocess_topic_timeseries',
+    ),
+    Step(
+        name='topic_tiles',
+        inputs=['static/jsons/topics/knowledge_graph.json', 'static/jsons/topics/knowledge_graph_by_publication.json'],
+        outputs=['static/jsons/topics/tiles/co-occurrence/index.json',
+                 'static/jsons/topics/tiles/by-publication/index.json'],
+        module='preprocess_topic_tiles',
+    ),
+    Step(
+        name='category_graph',
+        inputs=['static/jsons/recommendations.json', 'static/jsons/subscriber_counts.json'],
+        outputs=['static/jsons/category_graph_data_optimized.json', 'static/jsons/categories.json',
+                 'src/lib/files/category_graph_data_optimized.json', 'src/lib/files/categories.json'],
+        module='preprocess_category_graph_data',
+    ),
+    Step(
+        name='publish_assets',
+        inputs=['static/jsons/graph_data_optimized.json', 'static/jsons/graph_data_optimized.bin',
+                'static/jsons/category_graph_data_optimized.json', 'static/jsons/categories.json',
+                'static/jsons/recommendation_counts.json', 'static/jsons/publications_merged.json',
+                'static/jsons/bipartite_network.json',
+                'static/jsons/topic*/**/*.json'],
+        outputs=['static/jsons/manifest.json'],
+        module='publish_assets',
+    ),
+]
+
+
+def is_pattern(path: str) -> bool:
+    return glob.has_magic(path)
+
+
+def pattern_regex(pattern: str) -> re.Pattern:
+    """Regex matching the paths glob.glob(pattern, recursive=True) would find."""
+    parts = re.split(r'(\*\*/|\*|\?)', pattern)
+    wildcards = {'**/': '(?:.*/)?', '*': '[^/]*', '?': '[^/]'}
+    return re.compile(''.join(wildcards.get(part, re.escape(part)) for part in parts) + r'\Z')
+
+
+def expand_paths(paths: List[str]) -> List[str]:
+    """Paths with every pattern replaced by the files it matches now (run reports excluded)."""
+    expanded = []
+    for path in paths:
+        if is_pattern(path):
+            expanded.extend(sorted(match for match in glob.glob(path, recursive=True)
+                                   if not match.endswith(REPORT_SUFFIX)))
+        else:
+            expanded.append(path)
+    return expanded
+
+
+def path_matches(path: str, other: str) -> bool:
+    """Whether an input and an output (either of them possibly a pattern) name the same files."""
+    if path == other:
+        return True
+    if is_pattern(other) and not is_pattern(path):
+        return bool(pattern_regex(other).match(path))
+    if is_pattern(path) and not is_pattern(other):
+        return bool(pattern_regex(path).match(other))
+    return False
+
+
+def step_fingerprint(step: Step) -> Optional[str]:
+    """Combined hash of a step's definition, inputs and code, or None if an input is missing."""
+    code_files = set(os.path.join(ROOT, path) for path in step.code)
+    if step.module:
+        code_files |= local_module_files(step.module)
+
+    digest = hashlib.sha256(repr(step).encode())
+    for path in expand_paths(step.inputs):
+        if not os.path.exists(path):
+            return None
+        digest.update(f"{path}:{hash_file(path)}".encode())
+    for path in sorted(code_files):
+        digest.update(f"{os.path.relpath(path, ROOT)}:{hash_file(path)}".encode())
+    return digest.hexdigest()
+
+
+def step_dependencies(steps: List[Step]) -> Dict[str, Set[str]]:
+    """Map each step to the steps producing its inputs."""
+    return {
+        step.name: {producer.name for producer in steps if producer.name != step.name
+                    and any(path_matches(path, output) for path in step.inputs for output in producer.outputs)}
+        for step in steps
+    }
+
+
+def outputs_present(step: Step) -> bool:
+    """Whether every output path exists and every output pattern matches at least one file."""
+    return all(glob.glob(path, recursive=True) if is_pattern(path) else os.path.exists(path)
+               for path in step.outputs)
+
+
+def run_step(name: str) -> str:
+    """Run one step in a worker process."""
+    step = next(step for step in STEPS if step.name == name)
+    if step.module:
+        if ROOT not in sys.path:
+            sys.path.insert(0, ROOT)
+        importlib.import_module(step.module).main()
+    else:
+        subprocess.run(step.command, check=True)
+    return name
+
+
+def load_state() -> Dict[str, str]:
+    try:
+        with open(STATE_FILE, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_state(state: Dict[str, str]) -> None:
+    os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
+    with open(STATE_FILE, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+
+
+def select_steps(targets: List[str]) -> List[Step]:
+    """The requested steps plus everything upstream of them, in declaration order."""
+    if not targets:
+        return list(STEPS)
+
+    known = {step.name for step in STEPS}
+    unknown = [name for name in targets if name not in known]
+    if unknown:
+        raise SystemExit(f"Unknown step(s): {', '.join(unknown)}. Available: {', '.join(sorted(known))}")
+
+    dependencies = step_dependencies(STEPS)
+    wanted = set()
+    pending = list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in wanted:
+            wanted.add(name)
+            pending.extend(dependencies[name])
+    return [step for step in STEPS if step.name in wanted]
+
+
+def build(targets: List[str], force: bool = False, jobs: Optional[int] = None, dry_run: bool = False) -> int:
+    """Build stale steps in dependency order; returns the number of steps run."""
+    steps = select_steps(targets)
+    dependencies = step_dependencies(steps)
+    state = load_state()
+
+    done: Set[str] = set()
+    stale: Set[str] = set()
+    running = {}
+    # Fingerprint of the inputs each running step was started on
+    started: Dict[str, str] = {}
+    ran = 0
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        while len(done) < len(steps):
+            finished_before = len(done)
+            for step in steps:
+                if step.name in done or step.name in running.values():
+                    continue
+                if not dependencies[step.name] <= done:
+                    continue
+
+                # Fingerprint after upstream steps finish so their fresh outputs are hashed
+                fingerprint = step_fingerprint(step)
+                if fingerprint is None:
+                    missing = [path for path in expand_paths(step.inputs) if not os.path.exists(path)]
+                    raise SystemExit(f"Step {step.name} is missing input(s): {', '.join(missing)}")
+
+                # An upstream rebuild that produced identical bytes leaves the fingerprint unchanged
+                # (a dry run cannot know that, so anything downstream of a stale step is stale too)
+                upstream_stale = bool(dependencies[step.name] & stale)
+                if not force and outputs_present(step) and not upstream_stale and state.get(step.name) == fingerprint:
+                    print(f"[skip] {step.name} (up to date)")
+                    done.add(step.name)
+                    continue
+
+                if dry_run:
+                    print(f"[stale] {step.name}")
+                    done.add(step.name)
+                    stale.add(step.name)
+                    continue
+
+                print(f"[run] {step.name}")
+                started[step.name] = fingerprint
+                running[pool.submit(run_step, step.name)] = step.name
+
+            if not running:
+                if len(done) == finished_before:
+                    # Nothing can start and nothing will finish: a dependency cycle
+                    blocked = [f"{step.name} (waits for {', '.join(sorted(dependencies[step.name] - done))})"
+                               for step in steps if step.name not in done]
+                    raise SystemExit(f"Cannot schedule step(s): {'; '.join(blocked)}")
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                future.result()
+                # Record the inputs as they were when the step started: an input edited
+                # during the run must leave the step stale
+                state[name] = started.pop(name)
+                save_state(state)
+                done.add(name)
+                ran += 1
+                print(f"[done] {name}")
+
+    return ran
+
+
+def main():
+    """Main processing function."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('steps', nargs='*', help='steps to build (default: all)')
+    parser.add_argument('--force', action='store_true', help='rebuild even if fingerprints match')
+    parser.add_argument('--jobs', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--dry-run', action='store_true', help='only report which steps are stale')
+    parser.add_argument('--list', action='store_true', help='list steps and their dependencies')
+    args = parser.parse_args()
+
+    if args.list:
+        dependencies = step_dependencies(STEPS)
+        for step in STEPS:
+            after = ', '.join(sorted(dependencies[step.name])) or '-'
+            print(f"{step.name:24s} after: {after}")
+        return
+
+    ran = build(args.steps, force=args.force, jobs=args.jobs, dry_run=args.dry_run)
+    print(f"\nBuild complete: {ran} step(s) run")
+
+if __name__ == '__main__':
+    main()
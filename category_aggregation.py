@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Category aggregation engine.
+Builds the weighted category -> category recommendation graph straight from
+recommendations.json and the per-publication category in subscriber_counts.json,
+and computes the categories.json subscriber statistics in the same pass.
+"""
+
+import statistics
+from array import array
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from graph_engine import ID_TYPECODE, CSRGraph, Interner, build_recommendation_graph
+from publication_resolver import PublicationResolver
+
+
+def aggregate_categories(recommendations: Iterable[Tuple[str, List[str]]],
+                         publications: Iterable[Dict]) -> Tuple[Interner, CSRGraph, List[Dict]]:
+    """
+    Aggregate publication-level recommendations into category-level ones.
+    Both inputs may be streams: (recommender_url, recommended_urls) pairs and
+    subscriber_counts.json publication records.
+
+    Each recommendation edge whose recommender and recommended publication both
+    resolve to a known publication adds 1 to the weight of the
+    category(recommender) -> category(recommended) edge. Edges are grouped with
+    a flat C x C count array keyed by interned category IDs.
+
+    Returns the category interner, the weighted category CSR graph and one
+    categories.json stats record per category, in category ID order:
+    mean/median/stddev/min/max subscriber count (zero counts mean unknown and
+    are left out), outgoing (all recommendations made by the category's
+    publications) and incoming (recommendations that resolve to one of its
+    publications).
+    """
+    categories = Interner()
+    url_categories: Dict[str, int] = {}
+    subscriber_counts: List[List[int]] = []
+
+    def iter_publications() -> Iterator[Dict]:
+        """Intern categories and collect subscriber counts while the resolver indexes the stream."""
+        for item in publications:
+            category = item.get('category')
+            if category:
+                category_id = categories.intern(category)
+                if category_id == len(subscriber_counts):
+                    subscriber_counts.append([])
+                # Zero means unknown, so it stays out of the stats
+                if item.get('subscriber_count'):
+                    subscriber_counts[category_id].append(item['subscriber_count'])
+                if item.get('publication_url'):
+                    url_categories.setdefault(item['publication_url'], category_id)
+            yield item
+
+    # One pass over the publications
+    resolver = PublicationResolver(iter_publications())
+    num_categories = len(categories)
+    publication_categories = [url_categories.get(url, -1) for url in resolver.urls]
+
+    # Resolve each distinct URL to a category ID once (-1 if unknown)
+    interner, graph, _ = build_recommendation_graph(recommendations, canonicalize=resolver.canonical_url)
+    node_categories = array(ID_TYPECODE, (
+        publication_categories[pub_id] if pub_id >= 0 else -1
+        for pub_id in resolver.resolve_ids(interner.keys)
+    ))
+
+    # Hashed group-by of (source category, target category) over every edge
+    pair_counts = array('q', [0]) * (num_categories * num_categories)
+    outgoing = array('q', [0]) * num_categories
+    incoming = array('q', [0]) * num_categories
+    out_degrees = graph.out_degrees()
+
+    for node, degree in enumerate(out_degrees):
+        source_category = node_categories[node]
+        if degree == 0 or source_category < 0:
+            continue
+        outgoing[source_category] += degree
+        row = source_category * num_categories
+        for target in graph.successors(node):
+            target_category = node_categories[target]
+            if target_category >= 0:
+                pair_counts[row + target_category] += 1
+
+    for target in graph.targets:
+        target_category = node_categories[target]
+        if target_category >= 0:
+            incoming[target_category] += 1
+
+    # Sparse category graph from the non-zero cells
+    sources = array(ID_TYPECODE)
+    targets = array(ID_TYPECODE)
+    weights = array('q')
+    for cell, count in enumerate(pair_counts):
+        if count:
+            source_category, target_category = divmod(cell, num_categories)
+            sources.append(source_category)
+            targets.append(target_category)
+            weights.append(count)
+    category_graph = CSRGraph.from_edges(num_categories, sources, targets, weights)
+
+    stats = [category_stats(category, subscriber_counts[category_id], outgoing[category_id], incoming[category_id])
+             for category_id, category in enumerate(categories.keys)]
+
+    return categories, category_graph, stats
+
+
+def category_stats(category: str, counts: List[int], outgoing: int, incoming: int) -> Dict:
+    """One categories.json record from the category's subscriber counts and recommendation totals."""
+    return {
+        'category': category,
+        'mean_subscriber_count': statistics.fmean(counts) if counts else 0,
+        'median_subscriber_count': float(statistics.median(counts)) if counts else 0,
+        'stddev_subscriber_count': statistics.stdev(counts) if len(counts) > 1 else 0,
+        'min_subscriber_count': min(counts) if counts else 0,
+        'max_subscriber_count': max(counts) if counts else 0,
+        'outgoing': outgoing,
+        'incoming': incoming
+    }
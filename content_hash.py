@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Content hashing shared by build_data.py and graph_snapshot.py.
+Hashes files by their bytes and finds the repo-local modules a module
+imports, so callers can tell when inputs or the code reading them changed.
+"""
+
+import ast
+import hashlib
+import os
+from typing import Set
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def hash_file(path: str) -> str:
+    """SHA-256 of a file's contents, streamed in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def local_module_files(module: str) -> Set[str]:
+    """The module's source file plus every repo-local module it imports, transitively."""
+    found = set()
+    pending = [module]
+    while pending:
+        name = pending.pop()
+        path = os.path.join(ROOT, f"{name}.py")
+        if path in found or not os.path.exists(path):
+            continue
+        found.add(path)
+        with open(path, 'r') as f:
+            tree = ast.parse(f.read(), filename=path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                pending.extend(alias.name.split('.')[0] for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+                pending.append(node.module.split('.')[0])
+    return found
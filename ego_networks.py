@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Per-publication ego networks for node drill-down.
+For every node: its 1-hop recommenders and recommendees ranked by PageRank,
+2-hop in/out neighbourhoods, the top-k of each with display details, and
+co-recommendation similarity (publications recommended by the same
+recommenders). Records are written to hash-bucketed shard files plus an index
+describing the bucketing, so the client fetches one small shard per click.
+"""
+
+import glob
+import json
+import math
+import os
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from graph_engine import CSRGraph
+
+SHARD_PREFIX = 'ego-'
+FNV_OFFSET = 0x811C9DC5
+FNV_PRIME = 0x01000193
+
+
+def fnv1a_32(text: str) -> int:
+    """32-bit FNV-1a over the UTF-8 bytes (mirrored by the client to pick a shard)."""
+    value = FNV_OFFSET
+    for byte in text.encode('utf-8'):
+        value = ((value ^ byte) * FNV_PRIME) & 0xFFFFFFFF
+    return value
+
+
+def bucket_count(num_nodes: int, target_nodes_per_shard: int) -> int:
+    """Power-of-two number of buckets giving about target_nodes_per_shard records each."""
+    needed = max(1, math.ceil(num_nodes / target_nodes_per_shard))
+    return 1 << (needed - 1).bit_length()
+
+
+def reverse_graph(graph: CSRGraph) -> CSRGraph:
+    """Graph with every edge reversed: successors become recommenders."""
+    return CSRGraph.from_edges(graph.num_nodes, graph.targets, graph.edge_sources())
+
+
+def _distinct(nodes: Iterable[int], exclude: int) -> List[int]:
+    return [other for other in dict.fromkeys(nodes) if other != exclude]
+
+
+def two_hop(adjacency: CSRGraph, node: int, one_hop: List[int]) -> List[int]:
+    """Nodes two steps away along adjacency, excluding the node and its 1-hop neighbours."""
+    seen = set(one_hop)
+    seen.add(node)
+    found = []
+    for neighbour in one_hop:
+        for other in adjacency.successors(neighbour):
+            if other not in seen:
+                seen.add(other)
+                found.append(other)
+    return found
+
+
+def co_recommendations(node: int, graph: CSRGraph, reverse: CSRGraph,
+                       in_degrees) -> List[Tuple[int, int, float]]:
+    """
+    Publications recommended alongside node, as (other, shared recommenders,
+    cosine similarity of their recommender sets), most similar first.
+    """
+    shared: Dict[int, int] = {}
+    for recommender in set(reverse.successors(node)):
+        for other in set(graph.successors(recommender)):
+            if other != node:
+                shared[other] = shared.get(other, 0) + 1
+    degree = in_degrees[node]
+    scored = [(other, count, count / math.sqrt(degree * in_degrees[other])) for other, count in shared.items()]
+    scored.sort(key=lambda item: (-item[2], -item[1], item[0]))
+    return scored
+
+
+def write_ego_shards(directory: str, graph: CSRGraph, urls: List[str], ranks,
+                     describe: Callable[[int], Dict], top_k: int = 10, two_hop_k: int = 50,
+                     similar_k: int = 10, target_nodes_per_shard: int = 100) -> Dict:
+    """
+    Write one ego record per node into FNV-1a hash-bucketed shards
+    (ego-NNN.json, {url: record}) plus index.json. Neighbour lists are
+    ranked by PageRank; describe(node) supplies the display details used in
+    the top-k lists. Returns the index.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for stale in glob.glob(os.path.join(directory, f"{SHARD_PREFIX}*.json")):
+        os.remove(stale)
+
+    reverse = reverse_graph(graph)
+    in_degrees = graph.in_degrees()
+    num_buckets = bucket_count(graph.num_nodes, target_nodes_per_shard)
+    width = len(str(num_buckets - 1))
+
+    def ranked(nodes: List[int]) -> List[int]:
+        return sorted(nodes, key=lambda other: (-ranks[other], urls[other]))
+
+    def top(nodes: List[int]) -> List[Dict]:
+        return [{**describe(other), 'pagerank': float(f"{ranks[other]:.4g}")} for other in nodes[:top_k]]
+
+    buckets: List[List[int]] = [[] for _ in range(num_buckets)]
+    for node in range(graph.num_nodes):
+        buckets[fnv1a_32(urls[node]) % num_buckets].append(node)
+
+    shards = []
+    for bucket, nodes in enumerate(buckets):
+        records = {}
+        for node in nodes:
+            recommends = ranked(_distinct(graph.successors(node), node))
+            recommenders = ranked(_distinct(reverse.successors(node), node))
+            out2 = ranked(two_hop(graph, node, recommends))
+            in2 = ranked(two_hop(reverse, node, recommenders))
+            similar = co_recommendations(node, graph, reverse, in_degrees)[:similar_k]
+            records[urls[node]] = {
+                'recommends': [urls[other] for other in recommends],
+                'recommenders': [urls[other] for other in recommenders],
+                'top_recommends': top(recommends),
+                'top_recommenders': top(recommenders),
+                'two_hop_out': {'count': len(out2), 'top': [urls[other] for other in out2[:two_hop_k]]},
+                'two_hop_in': {'count': len(in2), 'top': [urls[other] for other in in2[:two_hop_k]]},
+                'similar': [{'id': urls[other], 'shared': count, 'score': round(score, 4)}
+                            for other, count, score in similar]
+            }
+        shard = f"{SHARD_PREFIX}{bucket:0{width}d}.json"
+        with open(os.path.join(directory, shard), 'w') as f:
+            json.dump(records, f, separators=(',', ':'))
+        shards.append({'file': shard, 'nodes': len(nodes)})
+
+    index = {
+        'version': 1,
+        'hash': 'fnv1a32',
+        'buckets': num_buckets,
+        'shard_prefix': SHARD_PREFIX,
+        'shard_digits': width,
+        'total_nodes': graph.num_nodes,
+        'top_k': top_k,
+        'two_hop_k': two_hop_k,
+        'similar_k': similar_k,
+        'shards': shards
+    }
+    with open(os.path.join(directory, 'index.json'), 'w') as f:
+        json.dump(index, f, separators=(',', ':'))
+    return index
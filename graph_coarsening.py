@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Multi-resolution coarsening of the recommendation graph.
+Collapses detected communities into clusters and aggregates the edges between
+them, giving a small top-level graph for the overview plus a node -> cluster
+map used to split the full graph into per-cluster shards.
+"""
+
+from array import array
+from typing import Dict, List, Tuple
+
+from graph_engine import ID_TYPECODE, CSRGraph, bincount
+
+
+def coarsen_communities(graph: CSRGraph, communities: array, min_cluster_size: int = 20,
+                        max_misc_nodes: int = 1500) -> Tuple[array, int]:
+    """
+    Map every node to a cluster.
+
+    Communities with at least min_cluster_size members become clusters of
+    their own (communities are numbered by size, so they keep their IDs).
+    Smaller communities join the large cluster they share the most edges
+    with; those with no link to any large cluster (separate components) are
+    packed into "misc" clusters of at most max_misc_nodes nodes, so no shard
+    grows without bound.
+
+    Returns the per-node cluster IDs and the number of clusters.
+    """
+    num_communities = max(communities) + 1 if len(communities) else 0
+    sizes = bincount(communities, num_communities)
+    large = sum(1 for size in sizes if size >= min_cluster_size)
+
+    # Edges between each small community and the large clusters, in both directions
+    links: Dict[int, Dict[int, int]] = {}
+    for source, target in zip(graph.edge_sources(), graph.targets):
+        a, b = communities[source], communities[target]
+        if a >= large and b < large:
+            counts = links.setdefault(a, {})
+            counts[b] = counts.get(b, 0) + 1
+        elif b >= large and a < large:
+            counts = links.setdefault(b, {})
+            counts[a] = counts.get(a, 0) + 1
+
+    mapping = array(ID_TYPECODE, range(large))
+    num_clusters = large
+    misc_nodes = max_misc_nodes
+    for community in range(large, num_communities):
+        counts = links.get(community)
+        if counts:
+            # Most shared edges wins; ties go to the larger cluster (lower ID)
+            mapping.append(min(counts, key=lambda cluster: (-counts[cluster], cluster)))
+            continue
+        if misc_nodes + sizes[community] > max_misc_nodes:
+            num_clusters += 1
+            misc_nodes = 0
+        mapping.append(num_clusters - 1)
+        misc_nodes += sizes[community]
+
+    return array(ID_TYPECODE, (mapping[community] for community in communities)), num_clusters
+
+
+def cluster_graph(graph: CSRGraph, clusters: array, num_clusters: int) -> Tuple[CSRGraph, array]:
+    """
+    Aggregate the node graph into a weighted cluster graph.
+    Edge weights count the recommendations from one cluster to another;
+    edges inside a cluster are returned separately as per-cluster counts.
+    """
+    internal = array('q', [0]) * num_clusters
+    pairs: Dict[Tuple[int, int], int] = {}
+    for source, target in zip(graph.edge_sources(), graph.targets):
+        a, b = clusters[source], clusters[target]
+        if a == b:
+            internal[a] += 1
+        else:
+            pairs[a, b] = pairs.get((a, b), 0) + 1
+
+    keys: List[Tuple[int, int]] = sorted(pairs)
+    coarse = CSRGraph.from_edges(
+        num_clusters,
+        array(ID_TYPECODE, (a for a, _ in keys)),
+        array(ID_TYPECODE, (b for _, b in keys)),
+        array('q', (pairs[key] for key in keys)))
+    return coarse, internal
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Columnar binary graph format.
+Writes node attributes as typed little-endian arrays, categorical columns as
+dictionary codes, every string (ids, names) in one shared string table and
+edges as Uint32 index pairs, so the frontend can wrap each column zero-copy
+as a TypedArray (see src/lib/utils/columnarGraph.ts).
+
+Layout:
+    magic  b'SGCB'
+    uint32 format version
+    uint32 header length in bytes
+    header UTF-8 JSON, space padded so the body starts 8-byte aligned
+    body   column buffers, each starting on an 8-byte boundary
+
+The header describes every buffer as {type, offset, length} with offsets
+relative to the start of the body. read_columnar_graph() decodes a file back
+into Python lists, as the TypeScript reader does.
+"""
+
+import json
+import struct
+import sys
+from array import array
+from typing import Any, Dict, Iterable, List, Optional
+
+MAGIC = b'SGCB'
+VERSION = 1
+ALIGNMENT = 8
+
+# Column type name -> array typecode, as understood by the TypeScript reader
+TYPECODES = {
+    'uint8': 'B',
+    'uint16': 'H',
+    'uint32': 'I',
+    'int32': 'i',
+    'float32': 'f',
+    'float64': 'd',
+}
+
+
+def _typed(dtype: str, values: Iterable) -> array:
+    data = array(TYPECODES[dtype], values)
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return data
+
+
+class ColumnarGraphWriter:
+    """Collects node columns, strings and edges, then writes them in one file."""
+
+    def __init__(self, node_count: int) -> None:
+        self.node_count = node_count
+        self.buffers: List[bytes] = []
+        self.body_length = 0
+        self.columns: Dict[str, Dict] = {}
+        self.strings: List[str] = []
+        self.string_ids: Dict[str, int] = {}
+        self.edges: Dict[str, Dict] = {}
+
+    def _add_buffer(self, dtype: str, data: array) -> Dict:
+        padding = -self.body_length % ALIGNMENT
+        if padding:
+            self.buffers.append(b'\0' * padding)
+            self.body_length += padding
+        raw = data.tobytes()
+        descriptor = {'type': dtype, 'offset': self.body_length, 'length': len(data)}
+        self.buffers.append(raw)
+        self.body_length += len(raw)
+        return descriptor
+
+    def _check_length(self, name: str, data: array) -> None:
+        if len(data) != self.node_count:
+            raise ValueError(f"Column {name} has {len(data)} values, expected {self.node_count}")
+
+    def add_column(self, name: str, dtype: str, values: Iterable) -> None:
+        """Add a numeric node column."""
+        data = _typed(dtype, values)
+        self._check_length(name, data)
+        self.columns[name] = self._add_buffer(dtype, data)
+
+    def add_categorical(self, name: str, values: Iterable[str]) -> None:
+        """Add a dictionary-encoded string column: small integer codes plus the distinct values."""
+        dictionary: Dict[str, int] = {}
+        codes = [dictionary.setdefault(value, len(dictionary)) for value in values]
+        dtype = 'uint8' if len(dictionary) <= 0xFF else 'uint16' if len(dictionary) <= 0xFFFF else 'uint32'
+        data = _typed(dtype, codes)
+        self._check_length(name, data)
+        descriptor = self._add_buffer(dtype, data)
+        descriptor['dictionary'] = list(dictionary)
+        self.columns[name] = descriptor
+
+    def add_strings(self, name: str, values: Iterable[str]) -> None:
+        """Add a string column as Uint32 indices into the shared string table."""
+        ids = self.string_ids
+        data = _typed('uint32', (ids.setdefault(value, len(ids)) for value in values))
+        self.strings.extend(list(ids)[len(self.strings):])
+        self._check_length(name, data)
+        descriptor = self._add_buffer('uint32', data)
+        descriptor['strings'] = True
+        self.columns[name] = descriptor
+
+    def set_edges(self, sources: Iterable[int], targets: Iterable[int],
+                  weights: Optional[Iterable[float]] = None, weight_type: str = 'float32') -> None:
+        """Add edges as parallel Uint32 node-index arrays with optional weights."""
+        self.edges['source'] = self._add_buffer('uint32', _typed('uint32', sources))
+        self.edges['target'] = self._add_buffer('uint32', _typed('uint32', targets))
+        if weights is not None:
+            self.edges['weight'] = self._add_buffer(weight_type, _typed(weight_type, weights))
+
+    def write(self, path: str, metadata: Optional[Dict[str, Any]] = None) -> int:
+        """Write the file and return its size in bytes."""
+        # The string table goes last: UTF-8 blob plus Uint32 byte offsets (count + 1)
+        encoded = [value.encode('utf-8') for value in self.strings]
+        offsets = array('I', [0])
+        for value in encoded:
+            offsets.append(offsets[-1] + len(value))
+        if sys.byteorder == 'big':
+            offsets.byteswap()
+        string_table = {
+            'count': len(encoded),
+            'offsets': self._add_buffer('uint32', offsets),
+            'data': self._add_buffer('uint8', array('B', b''.join(encoded)))
+        }
+
+        header = json.dumps({
+            'version': VERSION,
+            'nodeCount': self.node_count,
+            'edgeCount': self.edges['source']['length'] if self.edges else 0,
+            'columns': self.columns,
+            'edges': self.edges,
+            'strings': string_table,
+            'metadata': metadata or {}
+        }, separators=(',', ':')).encode('utf-8')
+
+        prefix_length = len(MAGIC) + 8
+        header += b' ' * (-(prefix_length + len(header)) % ALIGNMENT)
+
+        with open(path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<II', VERSION, len(header)))
+            f.write(header)
+            for buffer in self.buffers:
+                f.write(buffer)
+
+        return prefix_length + len(header) + self.body_length
+
+
+def read_columnar_graph(path: str) -> Dict[str, Any]:
+    """
+    Decode a file written by ColumnarGraphWriter: node and edge counts,
+    metadata, node columns (categorical and string columns as their values)
+    and edges, each as a list.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a columnar graph file")
+    version, header_length = struct.unpack_from('<II', data, len(MAGIC))
+    if version != VERSION:
+        raise ValueError(f"{path} has format version {version}, expected {VERSION}")
+    body = len(MAGIC) + 8 + header_length
+    header = json.loads(data[len(MAGIC) + 8:body])
+
+    def buffer(descriptor: Dict) -> array:
+        values = array(TYPECODES[descriptor['type']])
+        start = body + descriptor['offset']
+        values.frombytes(data[start:start + descriptor['length'] * values.itemsize])
+        if sys.byteorder == 'big':
+            values.byteswap()
+        return values
+
+    offsets = buffer(header['strings']['offsets'])
+    blob = buffer(header['strings']['data']).tobytes()
+    strings = [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(header['strings']['count'])]
+
+    columns = {}
+    for name, descriptor in header['columns'].items():
+        values = buffer(descriptor).tolist()
+        if 'dictionary' in descriptor:
+            values = [descriptor['dictionary'][code] for code in values]
+        elif descriptor.get('strings'):
+            values = [strings[index] for index in values]
+        columns[name] = values
+
+    return {
+        'nodeCount': header['nodeCount'],
+        'edgeCount': header['edgeCount'],
+        'metadata': header['metadata'],
+        'columns': columns,
+        'edges': {name: buffer(descriptor).tolist() for name, descriptor in header['edges'].items()},
+    }
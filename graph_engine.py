@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Shared integer-indexed graph engine for the preprocessing scripts.
+Interns every publication URL (or category name) to a dense integer ID once
+and stores edges as array-backed CSR: offsets + targets, optional weights.
+"""
+
+from array import array
+from itertools import accumulate
+from operator import sub
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Typecodes for the backing arrays: 32-bit node IDs, 64-bit edge offsets
+ID_TYPECODE = 'i'
+OFFSET_TYPECODE = 'q'
+
+
+class Interner:
+    """Map strings to dense integer IDs assigned in first-seen order."""
+
+    def __init__(self) -> None:
+        self.ids: Dict[str, int] = {}
+        self.keys: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.ids
+
+    def intern(self, key: str) -> int:
+        """Return the ID for key, assigning the next free one if it is new."""
+        idx = self.ids.get(key)
+        if idx is None:
+            idx = len(self.keys)
+            self.ids[key] = idx
+            self.keys.append(key)
+        return idx
+
+    def get(self, key: str, default: Optional[int] = None) -> Optional[int]:
+        return self.ids.get(key, default)
+
+
+def bincount(ids: Iterable[int], size: int, weights: Optional[array] = None) -> array:
+    """Count (or sum weights of) occurrences of each ID in range(size)."""
+    if weights is None:
+        counts = array(OFFSET_TYPECODE, [0]) * size
+        for idx in ids:
+            counts[idx] += 1
+        return counts
+
+    totals = array(weights.typecode, [0]) * size
+    for idx, weight in zip(ids, weights):
+        totals[idx] += weight
+    return totals
+
+
+class CSRGraph:
+    """
+    Directed graph in compressed sparse row form.
+    The out-edges of node i are targets[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, offsets: array, targets: array, weights: Optional[array] = None) -> None:
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.targets)
+
+    @classmethod
+    def from_edges(cls, num_nodes: int, sources: array, targets: array,
+                   weights: Optional[array] = None) -> 'CSRGraph':
+        """
+        Build a CSR graph from parallel edge arrays with a stable counting
+        sort, so each node's out-edges keep their insertion order.
+        """
+        counts = bincount(sources, num_nodes)
+        offsets = array(OFFSET_TYPECODE, [0])
+        offsets.extend(accumulate(counts))
+
+        # Edges arriving grouped by ascending source need no reordering
+        if all(a <= b for a, b in zip(sources, sources[1:])):
+            return cls(offsets, array(ID_TYPECODE, targets),
+                       array(weights.typecode, weights) if weights is not None else None)
+
+        cursor = offsets[:-1]
+        sorted_targets = array(ID_TYPECODE, [0]) * len(targets)
+        sorted_weights = array(weights.typecode, [0]) * len(weights) if weights is not None else None
+        for edge, source in enumerate(sources):
+            pos = cursor[source]
+            cursor[source] = pos + 1
+            sorted_targets[pos] = targets[edge]
+            if sorted_weights is not None:
+                sorted_weights[pos] = weights[edge]
+
+        return cls(offsets, sorted_targets, sorted_weights)
+
+    def successors(self, node: int) -> array:
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    def edges(self) -> Iterator[Tuple[int, int]]:
+        """Yield (source, target) ID pairs in CSR order."""
+        targets = self.targets
+        for source in range(self.num_nodes):
+            for pos in range(self.offsets[source], self.offsets[source + 1]):
+                yield source, targets[pos]
+
+    def edge_sources(self) -> array:
+        """Expand offsets into a per-edge source ID array (COO row indices)."""
+        sources = array(ID_TYPECODE)
+        for node, degree in enumerate(self.out_degrees()):
+            if degree:
+                sources.extend(array(ID_TYPECODE, [node]) * degree)
+        return sources
+
+    def out_degrees(self) -> array:
+        return array(OFFSET_TYPECODE, map(sub, self.offsets[1:], self.offsets[:-1]))
+
+    def in_degrees(self) -> array:
+        return bincount(self.targets, self.num_nodes)
+
+    def out_weights(self) -> array:
+        if self.weights is None:
+            return self.out_degrees()
+        return bincount(self.edge_sources(), self.num_nodes, self.weights)
+
+    def in_weights(self) -> array:
+        if self.weights is None:
+            return self.in_degrees()
+        return bincount(self.targets, self.num_nodes, self.weights)
+
+
+def build_recommendation_graph(
+        recommendations: Iterable[Tuple[str, List[str]]],
+        canonicalize: Optional[Callable[[str], str]] = None) -> Tuple[Interner, CSRGraph, array]:
+    """
+    Intern every recommender and recommended URL and build the
+    recommender -> recommended CSR graph. Duplicate edges are kept, so
+    degrees match counting every entry in the recommendation lists.
+
+    recommendations is any iterable of (recommender_url, recommended_urls)
+    pairs, e.g. dict.items() or a streamed recommendations.json. If given,
+    canonicalize maps every raw URL to the key it is interned under, so URL
+    variants of one publication become a single node. Returns the interner,
+    the graph and the recommender node IDs in input order.
+    """
+    interner = Interner()
+    sources = array(ID_TYPECODE)
+    targets = array(ID_TYPECODE)
+    recommenders = array(ID_TYPECODE)
+    key = canonicalize or (lambda url: url)
+
+    for recommender_url, recommended_urls in recommendations:
+        source = interner.intern(key(recommender_url))
+        recommenders.append(source)
+        for recommended_url in recommended_urls:
+            sources.append(source)
+            targets.append(interner.intern(key(recommended_url)))
+
+    return interner, CSRGraph.from_edges(len(interner), sources, targets), recommenders
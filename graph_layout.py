@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Offline force-directed layout for the preprocessed graphs.
+Runs a deterministic Fruchterman-Reingold layout over a CSR graph so the
+client can render converged positions instead of simulating in the browser.
+
+The cost of an iteration grows with nodes + edges, so the number of
+iterations is capped by a work budget; large graphs are laid out multilevel
+(clusters first, then a short refinement of the nodes seeded around their
+cluster) so the few iterations they can afford start close to converged.
+"""
+
+import math
+import random
+from array import array
+from collections import defaultdict
+from itertools import product
+from operator import add, sub
+from typing import Dict, List, Optional, Tuple
+
+from graph_engine import CSRGraph
+
+# Node + edge visits allowed across the iterations of one simulation; past
+# this, iterations are cut (down to MIN_ITERATIONS)
+WORK_BUDGET = 2_000_000
+MIN_ITERATIONS = 10
+# Cores at least this large are laid out multilevel when clusters are given;
+# their seeded node positions only need a short refinement
+MULTILEVEL_MIN_NODES = 2_000
+REFINE_ITERATIONS = 30
+# Guard: cores above this many nodes are not simulated node by node at all
+# (without clusters the layout refuses; with them nodes stay at their seeds)
+MAX_SIMULATED_NODES = 500_000
+
+
+def _bucket_nodes(positions: List[List[float]], cell_size: float) -> Dict[Tuple[int, ...], List[int]]:
+    """Group node IDs into grid cells of the given size."""
+    cells = defaultdict(list)
+    for i, point in enumerate(positions):
+        cells[tuple(int(math.floor(c / cell_size)) for c in point)].append(i)
+    return cells
+
+
+def iteration_count(iterations: int, work: int) -> int:
+    """Iterations affordable for a simulation over `work` nodes + edges under WORK_BUDGET."""
+    return min(iterations, max(MIN_ITERATIONS, WORK_BUDGET // max(work, 1)))
+
+
+def _fruchterman_reingold(n: int, sources: array, targets: array, dimensions: int, iterations: int,
+                          seed: int, link_distance: float, gravity: float, tolerance: float,
+                          initial: Optional[List[List[float]]] = None,
+                          temperature: Optional[float] = None) -> List[List[float]]:
+    """
+    Compute node positions with the grid variant of Fruchterman-Reingold.
+
+    Repulsion is exact between nodes sharing a grid cell and approximated by
+    cell centroids (Barnes-Hut style, one level) for the neighbouring cells,
+    so each iteration is linear in nodes + edges. Edges attract regardless of
+    direction and a weak gravity keeps disconnected components together.
+    The layout stops early once the largest move falls below
+    tolerance * link_distance.
+
+    Starts from `initial` (which is updated in place) when given, otherwise
+    from a seeded random box; `temperature` overrides the starting step cap.
+
+    Returns one coordinate list per node.
+    """
+    k = link_distance
+    k2 = k * k
+
+    # Seeded uniform start in a box sized for roughly one node per k^d volume
+    spread = k * max(n, 1) ** (1.0 / dimensions)
+    if initial is None:
+        rng = random.Random(seed)
+        positions = [[rng.uniform(-spread / 2, spread / 2) for _ in range(dimensions)] for _ in range(n)]
+    else:
+        positions = initial
+    if n == 0 or iterations <= 0:
+        return positions
+
+    dims = range(dimensions)
+    cell_size = 2 * k
+    neighbour_offsets = [off for off in product((-1, 0, 1), repeat=dimensions) if any(off)]
+
+    if temperature is None:
+        temperature = spread / 10
+    cooling = (tolerance * k / temperature) ** (1.0 / iterations) if temperature > tolerance * k else 1.0
+
+    for _ in range(iterations):
+        disp = [[0.0] * dimensions for _ in range(n)]
+        cells = _bucket_nodes(positions, cell_size)
+
+        centroids = {}
+        for key, members in cells.items():
+            count = len(members)
+            centre = [sum(positions[i][d] for i in members) / count for d in dims]
+            centroids[key] = (count * k2, centre)
+
+        # Repulsion: f = k^2 / dist, pushing along the separating vector
+        for key, members in cells.items():
+            near = [centroids[other] for other in
+                    (tuple(map(add, key, off)) for off in neighbour_offsets) if other in centroids]
+
+            for pos, a in enumerate(members):
+                pa = positions[a]
+                da = disp[a]
+                for b in members[pos + 1:]:
+                    delta = list(map(sub, pa, positions[b]))
+                    scale = k2 / (sum(c * c for c in delta) or 1e-6)
+                    db = disp[b]
+                    for d in dims:
+                        da[d] += delta[d] * scale
+                        db[d] -= delta[d] * scale
+
+                for weight, centre in near:
+                    delta = list(map(sub, pa, centre))
+                    scale = weight / (sum(c * c for c in delta) or 1e-6)
+                    for d in dims:
+                        da[d] += delta[d] * scale
+
+        # Attraction along edges: f = dist^2 / k
+        for a, b in zip(sources, targets):
+            if a == b:
+                continue
+            delta = list(map(sub, positions[a], positions[b]))
+            scale = math.sqrt(sum(c * c for c in delta)) / k
+            da = disp[a]
+            db = disp[b]
+            for d in dims:
+                da[d] -= delta[d] * scale
+                db[d] += delta[d] * scale
+
+        # Gravity towards the origin, then move each node by at most the temperature
+        max_move = 0.0
+        for point, step in zip(positions, disp):
+            for d in dims:
+                step[d] -= gravity * point[d]
+            length = math.sqrt(sum(c * c for c in step))
+            factor = temperature / length if length > temperature else 1.0
+            for d in dims:
+                point[d] += step[d] * factor
+            max_move = max(max_move, length * factor)
+
+        temperature *= cooling
+        if max_move < tolerance * k:
+            break
+
+    return positions
+
+
+def _multilevel(n: int, sources: array, targets: array, clusters: List[int], dimensions: int, iterations: int,
+                seed: int, link_distance: float, gravity: float, tolerance: float) -> List[List[float]]:
+    """
+    Lay out the cluster graph, seed every node in a box sized for its cluster
+    around the cluster's position, then refine the nodes with a cooler start.
+    """
+    # Compact cluster IDs in first-seen order
+    compact: Dict[int, int] = {}
+    members = [compact.setdefault(cluster, len(compact)) for cluster in clusters]
+    num_clusters = len(compact)
+    sizes = [0] * num_clusters
+    for cluster in members:
+        sizes[cluster] += 1
+
+    pairs = sorted({(members[a], members[b]) for a, b in zip(sources, targets) if members[a] != members[b]})
+    coarse_sources = array('q', (a for a, _ in pairs))
+    coarse_targets = array('q', (b for _, b in pairs))
+
+    # A cluster of s nodes fills about s * k^d, so clusters sit k * s^(1/d) apart
+    coarse_distance = link_distance * (n / num_clusters) ** (1.0 / dimensions)
+    centres = _fruchterman_reingold(num_clusters, coarse_sources, coarse_targets, dimensions,
+                                    iteration_count(iterations, num_clusters + len(pairs)), seed,
+                                    coarse_distance, gravity, tolerance)
+
+    rng = random.Random(seed)
+    positions = []
+    for cluster in members:
+        half = link_distance * sizes[cluster] ** (1.0 / dimensions) / 2
+        positions.append([c + rng.uniform(-half, half) for c in centres[cluster]])
+
+    if n > MAX_SIMULATED_NODES:
+        return positions
+    refine = iteration_count(min(iterations, REFINE_ITERATIONS), n + len(sources))
+    return _fruchterman_reingold(n, sources, targets, dimensions, refine, seed, link_distance, gravity, tolerance,
+                                 initial=positions, temperature=link_distance)
+
+
+def _surface_points(count: int, dimensions: int) -> List[List[float]]:
+    """Evenly spread unit vectors: a circle in 2D, a Fibonacci sphere in 3D."""
+    golden_angle = math.pi * (3 - math.sqrt(5))
+    points = []
+    for i in range(count):
+        if dimensions == 2:
+            angle = 2 * math.pi * i / count
+            points.append([math.cos(angle), math.sin(angle)])
+        else:
+            z = 1 - 2 * (i + 0.5) / count
+            r = math.sqrt(1 - z * z)
+            theta = golden_angle * i
+            points.append([r * math.cos(theta), r * math.sin(theta), z])
+    return points
+
+
+def force_layout(graph: CSRGraph, dimensions: int = 3, iterations: int = 150, seed: int = 42,
+                 link_distance: float = 50.0, gravity: float = 0.01, tolerance: float = 0.01,
+                 clusters: Optional[array] = None) -> List[array]:
+    """
+    Lay out a graph in 2 or 3 dimensions with a deterministic seed.
+
+    Leaves (nodes with a single neighbour that itself has others) make up
+    most of the recommendation graph, so only the remaining core is run
+    through the force simulation. Each leaf is then placed at link_distance
+    around its neighbour, spread evenly over a circle or sphere.
+
+    `iterations` is an upper bound: it is cut to fit WORK_BUDGET. With
+    per-node cluster IDs (e.g. from graph_coarsening.coarsen_communities)
+    a core of MULTILEVEL_MIN_NODES or more is laid out multilevel. A core
+    over MAX_SIMULATED_NODES raises ValueError unless clusters are given.
+
+    Returns one array of coordinates per dimension, indexed by node ID.
+    """
+    n = graph.num_nodes
+    sources = graph.edge_sources()
+    targets = graph.targets
+
+    # Undirected neighbour counts; the single neighbour of each degree-1 node
+    degree = array('q', [0]) * n
+    neighbour = array('q', [-1]) * n
+    for a, b in zip(sources, targets):
+        if a != b:
+            degree[a] += 1
+            degree[b] += 1
+            neighbour[a] = b
+            neighbour[b] = a
+
+    is_leaf = [degree[i] == 1 and degree[neighbour[i]] > 1 for i in range(n)]
+
+    # Compact the core into its own ID space and lay it out
+    core_ids = array('q', [-1]) * n
+    core_nodes = [i for i in range(n) if not is_leaf[i]]
+    for core_id, node in enumerate(core_nodes):
+        core_ids[node] = core_id
+
+    core_sources = array('q')
+    core_targets = array('q')
+    for a, b in zip(sources, targets):
+        if not is_leaf[a] and not is_leaf[b]:
+            core_sources.append(core_ids[a])
+            core_targets.append(core_ids[b])
+
+    num_core = len(core_nodes)
+    if clusters is not None and num_core >= MULTILEVEL_MIN_NODES:
+        core_positions = _multilevel(num_core, core_sources, core_targets, [clusters[i] for i in core_nodes],
+                                     dimensions, iterations, seed, link_distance, gravity, tolerance)
+    elif num_core > MAX_SIMULATED_NODES:
+        raise ValueError(f"Core of {num_core:,} nodes is too large to simulate node by node; "
+                         f"pass clusters for a multilevel layout")
+    else:
+        core_positions = _fruchterman_reingold(num_core, core_sources, core_targets, dimensions,
+                                               iteration_count(iterations, num_core + len(core_sources)),
+                                               seed, link_distance, gravity, tolerance)
+
+    coords = [array('d', [0.0]) * n for _ in range(dimensions)]
+    for d in range(dimensions):
+        for core_id, node in enumerate(core_nodes):
+            coords[d][node] = core_positions[core_id][d]
+
+    # Fan leaves out around their parent
+    leaves_by_parent = defaultdict(list)
+    for i in range(n):
+        if is_leaf[i]:
+            leaves_by_parent[neighbour[i]].append(i)
+
+    for parent, leaves in leaves_by_parent.items():
+        for leaf, direction in zip(leaves, _surface_points(len(leaves), dimensions)):
+            for d in range(dimensions):
+                coords[d][leaf] = coords[d][parent] + direction[d] * link_distance
+
+    # Recentre on the origin so the client can zoom-to-fit without offsets
+    if n:
+        for d in range(dimensions):
+            mean = sum(coords[d]) / n
+            coords[d] = array('d', (c - mean for c in coords[d]))
+
+    return coords
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Local HTTP query service over the recommendation graph.
+Opens the graph snapshot (graph_snapshot.py: the same resolver and CSR graph
+as the preprocess scripts, rebuilt from subscriber_counts.json and
+recommendations.json when they change), builds sorted indexes once and
+answers slice queries instead of shipping whole JSON files:
+
+    GET /publications?min_subscribers=50000&category=technology&limit=50&offset=0
+    GET /top?by=incoming|outgoing|subscribers&n=20[&category=...]
+    GET /neighbours?url=<publication url>[&direction=out|in|both]
+    GET /subgraph?category=<category>   or   /subgraph?urls=<url>,<url>,...
+    GET /stats
+
+Responses are JSON, kept in an LRU cache keyed by the request target, over
+HTTP/1.1 keep-alive connections. Standard library only (asyncio), so it can
+be run and load-tested locally:
+
+    python graph_service.py [--host 127.0.0.1] [--port 8765]
+"""
+
+import argparse
+import asyncio
+import bisect
+import json
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from ego_networks import reverse_graph
+from graph_engine import CSRGraph, Interner
+from graph_snapshot import GraphSnapshot, open_snapshot
+from instrumentation import RunReport
+from publication_resolver import PublicationResolver
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+CACHE_SIZE = 1024
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 5000
+# Idle keep-alive connections are closed after this many seconds
+KEEP_ALIVE_TIMEOUT = 15.0
+MAX_HEADER_BYTES = 16384
+
+
+class QueryError(Exception):
+    """A bad request; the message is returned with status 400 (or 404)."""
+
+    def __init__(self, message: str, status: int = 400) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class GraphIndex:
+    """Publication table, recommendation graph and the sorted indexes queries run on."""
+
+    def __init__(self, resolver: PublicationResolver, interner: Interner, graph: CSRGraph,
+                 details: List[Tuple[Optional[str], Optional[str], int]]) -> None:
+        """details: (name, category, subscriber count) per publication, in resolver order."""
+        self.resolver = resolver
+        self.interner = interner
+        self.graph = graph
+        self.reverse = reverse_graph(self.graph)
+        in_degrees = self.graph.in_degrees()
+        out_degrees = self.graph.out_degrees()
+
+        # Publication table: one row per known publication (pub ID order)
+        self.urls = self.resolver.urls
+        self.rows: List[Dict] = []
+        for url, (name, category, subscriber_count) in zip(self.urls, details):
+            node = self.interner.get(url)
+            self.rows.append({
+                'id': url,
+                'name': name,
+                'category': category,
+                'subscriber_count': subscriber_count,
+                'incoming_recommendations': in_degrees[node] if node is not None else 0,
+                'outgoing_recommendations': out_degrees[node] if node is not None else 0
+            })
+
+        # Sorted indexes (pub IDs), best first; subscriber keys ascending for bisect
+        def ranked(column: str) -> List[int]:
+            return sorted(range(len(self.rows)), key=lambda pub_id: (-self.rows[pub_id][column], pub_id))
+
+        self.by_subscribers = ranked('subscriber_count')
+        self.by_incoming = ranked('incoming_recommendations')
+        self.by_outgoing = ranked('outgoing_recommendations')
+        self.subscriber_keys = [-self.rows[pub_id]['subscriber_count'] for pub_id in self.by_subscribers]
+        self.categories: Dict[str, List[int]] = {}
+        for pub_id in self.by_subscribers:
+            category = self.rows[pub_id]['category']
+            if category:
+                self.categories.setdefault(category, []).append(pub_id)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: GraphSnapshot) -> 'GraphIndex':
+        """Index over a graph snapshot; its arrays stay mapped for the life of the index."""
+        categories = list(snapshot.categories)
+        details = [(name or None, categories[category] if category >= 0 else None, max(count, 0))
+                   for name, category, count in zip(snapshot.publication_names, snapshot.publication_category,
+                                                    snapshot.publication_subscribers)]
+        return cls(snapshot.resolver(), snapshot.interner(), snapshot.graph, details)
+
+    def node_record(self, node: int) -> Dict:
+        url = self.interner.keys[node]
+        pub_id = self.resolver.resolve_id(url)
+        return self.rows[pub_id] if pub_id >= 0 else {'id': url, 'name': None, 'category': None}
+
+    def _node(self, url: str) -> int:
+        node = self.interner.get(self.resolver.canonical_url(url))
+        if node is None:
+            raise QueryError(f"Unknown publication: {url}", 404)
+        return node
+
+    def _category(self, category: str) -> List[int]:
+        if category not in self.categories:
+            raise QueryError(f"Unknown category: {category}", 404)
+        return self.categories[category]
+
+    def publications(self, min_subscribers: int = 0, max_subscribers: Optional[int] = None,
+                     category: Optional[str] = None, limit: int = DEFAULT_LIMIT, offset: int = 0) -> Dict:
+        """Publications in a subscriber range (and category), most subscribers first."""
+        # by_subscribers is descending, so the range is a contiguous slice found by bisection
+        end = bisect.bisect_right(self.subscriber_keys, -min_subscribers)
+        start = 0 if max_subscribers is None else bisect.bisect_left(self.subscriber_keys, -max_subscribers)
+        matching = self.by_subscribers[start:end]
+        if category is not None:
+            allowed = set(self._category(category))
+            matching = [pub_id for pub_id in matching if pub_id in allowed]
+        return {
+            'total': len(matching),
+            'offset': offset,
+            'publications': [self.rows[pub_id] for pub_id in matching[offset:offset + limit]]
+        }
+
+    def top(self, by: str = 'incoming', n: int = 20, category: Optional[str] = None) -> Dict:
+        indexes = {'incoming': self.by_incoming, 'outgoing': self.by_outgoing, 'subscribers': self.by_subscribers}
+        if by not in indexes:
+            raise QueryError(f"by must be one of {', '.join(indexes)}")
+        ranking = indexes[by]
+        if category is not None:
+            allowed = set(self._category(category))
+            ranking = (pub_id for pub_id in ranking if pub_id in allowed)
+        top = []
+        for pub_id in ranking:
+            if len(top) == n:
+                break
+            top.append(self.rows[pub_id])
+        return {'by': by, 'publications': top}
+
+    def neighbours(self, url: str, direction: str = 'both') -> Dict:
+        if direction not in ('out', 'in', 'both'):
+            raise QueryError("direction must be out, in or both")
+        node = self._node(url)
+        result = {'publication': self.node_record(node)}
+        if direction in ('out', 'both'):
+            result['recommends'] = [self.node_record(other) for other in dict.fromkeys(self.graph.successors(node))]
+        if direction in ('in', 'both'):
+            result['recommended_by'] = [self.node_record(other)
+                                        for other in dict.fromkeys(self.reverse.successors(node))]
+        return result
+
+    def subgraph(self, nodes: List[int]) -> Dict:
+        """Induced subgraph: the nodes and every recommendation between two of them."""
+        members = set(nodes)
+        links = [{'source': self.interner.keys[node], 'target': self.interner.keys[target]}
+                 for node in nodes for target in self.graph.successors(node) if target in members]
+        return {'nodes': [self.node_record(node) for node in nodes], 'links': links}
+
+    def category_subgraph(self, category: str) -> Dict:
+        nodes = [node for node in (self.interner.get(self.urls[pub_id]) for pub_id in self._category(category))
+                 if node is not None]
+        return self.subgraph(nodes)
+
+    def url_subgraph(self, urls: List[str]) -> Dict:
+        return self.subgraph(list(dict.fromkeys(self._node(url) for url in urls)))
+
+    def stats(self) -> Dict:
+        return {
+            'publications': len(self.rows),
+            'nodes': self.graph.num_nodes,
+            'edges': self.graph.num_edges,
+            'categories': {category: len(pub_ids) for category, pub_ids in sorted(self.categories.items())}
+        }
+
+
+def _int(params: Dict[str, List[str]], name: str, default: Optional[int], maximum: Optional[int] = None):
+    if name not in params:
+        return default
+    try:
+        value = int(params[name][0])
+    except ValueError:
+        raise QueryError(f"{name} must be an integer")
+    if value < 0:
+        raise QueryError(f"{name} must not be negative")
+    return min(value, maximum) if maximum is not None else value
+
+
+def _str(params: Dict[str, List[str]], name: str, default: Optional[str] = None) -> Optional[str]:
+    return params[name][0] if name in params else default
+
+
+def route(index: GraphIndex, target: str) -> Dict:
+    """Answer one request target (path and query string)."""
+    parts = urlsplit(target)
+    params = parse_qs(parts.query)
+    if parts.path == '/publications':
+        return index.publications(_int(params, 'min_subscribers', 0), _int(params, 'max_subscribers', None),
+                                  _str(params, 'category'), _int(params, 'limit', DEFAULT_LIMIT, MAX_LIMIT),
+                                  _int(params, 'offset', 0))
+    if parts.path == '/top':
+        return index.top(_str(params, 'by', 'incoming'), _int(params, 'n', 20, MAX_LIMIT), _str(params, 'category'))
+    if parts.path == '/neighbours':
+        if 'url' not in params:
+            raise QueryError("url is required")
+        return index.neighbours(params['url'][0], _str(params, 'direction', 'both'))
+    if parts.path == '/subgraph':
+        if 'category' in params:
+            return index.category_subgraph(params['category'][0])
+        if 'urls' in params:
+            return index.url_subgraph([url for url in params['urls'][0].split(',') if url])
+        raise QueryError("category or urls is required")
+    if parts.path == '/stats':
+        return index.stats()
+    if parts.path == '/health':
+        return {'status': 'ok'}
+    raise QueryError(f"Unknown path: {parts.path}", 404)
+
+
+class ResponseCache:
+    """LRU cache of encoded response bodies by request target."""
+
+    def __init__(self, capacity: int = CACHE_SIZE) -> None:
+        self.capacity = capacity
+        self.entries: 'OrderedDict[str, Tuple[int, bytes]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Tuple[int, bytes]]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, entry: Tuple[int, bytes]) -> None:
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 431: 'Request Header Fields Too Large'}
+
+
+class GraphService:
+    """asyncio HTTP/1.1 server answering queries from a GraphIndex."""
+
+    def __init__(self, index: GraphIndex, cache_size: int = CACHE_SIZE) -> None:
+        self.index = index
+        self.cache = ResponseCache(cache_size)
+        self.requests = 0
+
+    def respond(self, target: str) -> Tuple[int, bytes]:
+        entry = self.cache.get(target)
+        if entry is None:
+            try:
+                status, body = 200, route(self.index, target)
+            except QueryError as e:
+                status, body = e.status, {'error': str(e)}
+            entry = (status, json.dumps(body, separators=(',', ':')).encode('utf-8'))
+            # Errors are cheap to recompute; keep the cache for real answers
+            if status == 200:
+                self.cache.put(target, entry)
+        return entry
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), KEEP_ALIVE_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self.send(writer, 431, b'{"error":"headers too large"}', keep_alive=False)
+                    break
+
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ')
+                except ValueError:
+                    await self.send(writer, 400, b'{"error":"malformed request line"}', keep_alive=False)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        name, value = line.split(':', 1)
+                        headers[name.strip().lower()] = value.strip().lower()
+                connection = headers.get('connection', '')
+                keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+
+                if method not in ('GET', 'HEAD'):
+                    status, body = 405, b'{"error":"only GET and HEAD are supported"}'
+                else:
+                    status, body = self.respond(target)
+                self.requests += 1
+                await self.send(writer, status, body, keep_alive, head_only=method == 'HEAD')
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def send(writer: asyncio.StreamWriter, status: int, body: bytes, keep_alive: bool,
+                   head_only: bool = False) -> None:
+        header = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                  f"Content-Type: application/json\r\n"
+                  f"Content-Length: {len(body)}\r\n"
+                  f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                  f"Access-Control-Allow-Origin: *\r\n\r\n")
+        writer.write(header.encode('latin-1') + (b'' if head_only else body))
+        await writer.drain()
+
+    async def serve(self, host: str, port: int) -> None:
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_BYTES)
+        print(f"Serving on http://{host}:{port} (Ctrl+C to stop)")
+        async with server:
+            await server.serve_forever()
+
+
+def load_index() -> GraphIndex:
+    report = RunReport('graph_service')
+    print("Opening graph snapshot...")
+    with report.stage('load') as stage:
+        index = GraphIndex.from_snapshot(open_snapshot())
+        stage.items = index.graph.num_edges
+    print(f"Indexed {len(index.rows)} publications, {index.graph.num_nodes} nodes and "
+          f"{index.graph.num_edges} recommendations in {stage.seconds:.2f}s ({stage.process_peak_rss_mb:.0f} MB process peak)")
+    return index
+
+
+def main():
+    """Main processing function."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE, help='LRU response cache entries')
+    args = parser.parse_args()
+
+    service = GraphService(load_index(), args.cache_size)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print(f"\nStopped after {service.requests} requests "
+              f"(cache hits: {service.cache.hits}, misses: {service.cache.misses})")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Persistent snapshot of the parsed recommendation graph.
+Parsing subscriber_counts.json and recommendations.json, resolving every URL
+and building the CSR graph dominates the startup of ad-hoc analyses. The
+snapshot stores the result once as flat native-endian arrays in a single file
+under .build-cache/; later runs mmap it and get zero-copy views instead of
+reparsing:
+
+- node URL table (interned canonical URLs, UTF-8 blob plus byte offsets)
+- CSR adjacency (offsets, targets) and the recommender node IDs
+- node columns: publication index, subscriber count and category ID
+  (-1 where the node is not a known publication or the value is missing;
+  a subscriber count of 0 means unknown and is stored as -1)
+- publication columns: URL, name, subscriber count and category ID
+- the resolver's alias and identifier indexes, so raw URLs resolve without
+  reading subscriber_counts.json
+- category string table
+
+The header records the size, mtime and SHA-256 of both source files and of
+the code the snapshot is built with. open_snapshot() compares them on every
+open (stat first, hashing only when the stat differs) and rebuilds the
+snapshot when anything changed, so a stale graph is never served. A file
+that was touched but not changed gets its new stat recorded, so it is hashed
+only once. preprocess_graph_data.py, preprocess_recommendation_counts.py,
+preprocess_bipartite_network.py and graph_service.py all load the graph
+through it.
+
+Usage:
+    from graph_snapshot import open_snapshot
+    snapshot = open_snapshot()
+    snapshot.graph.successors(snapshot.node_id('https://example.substack.com'))
+    snapshot.resolver().canonical_url('example.substack.com')
+
+Run from the repository root to build (or validate) the snapshot:
+    python graph_snapshot.py
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from content_hash import ROOT, hash_file, local_module_files
+from graph_engine import ID_TYPECODE, OFFSET_TYPECODE, CSRGraph, Interner, build_recommendation_graph
+from json_stream import iter_json_array, iter_json_object_items
+from publication_resolver import PublicationResolver
+
+SUBSCRIBER_COUNTS_FILE = 'static/jsons/subscriber_counts.json'
+RECOMMENDATIONS_FILE = 'static/jsons/recommendations.json'
+SNAPSHOT_FILE = '.build-cache/graph.snapshot'
+
+MAGIC = b'SGSNAP01'
+VERSION = 2
+ALIGNMENT = 8
+
+
+class StringTable(Sequence[str]):
+    """Read-only string list over a UTF-8 blob and byte offsets (count + 1), decoded on access."""
+
+    def __init__(self, data: memoryview, offsets: memoryview) -> None:
+        self.data = data
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        return bytes(self.data[self.offsets[index]:self.offsets[index + 1]]).decode('utf-8')
+
+    def __iter__(self) -> Iterator[str]:
+        data = self.data
+        offsets = self.offsets
+        for i in range(len(self)):
+            yield bytes(data[offsets[i]:offsets[i + 1]]).decode('utf-8')
+
+
+def encode_strings(values: List[str]) -> Dict[str, array]:
+    """UTF-8 blob plus byte offsets, as StringTable reads them."""
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = array(OFFSET_TYPECODE, [0])
+    for value in encoded:
+        offsets.append(offsets[-1] + len(value))
+    return {'data': array('B', b''.join(encoded)), 'offsets': offsets}
+
+
+def source_state(paths: List[str], previous: Optional[Dict] = None) -> Dict[str, Dict]:
+    """
+    Size, mtime and SHA-256 per file. A file whose size and mtime match
+    previous keeps its recorded hash instead of being read again.
+    """
+    state = {}
+    for path in paths:
+        stat = os.stat(path)
+        entry = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        known = (previous or {}).get(path)
+        if known and known['size'] == entry['size'] and known['mtime_ns'] == entry['mtime_ns']:
+            entry['sha256'] = known['sha256']
+        else:
+            entry['sha256'] = hash_file(path)
+        state[path] = entry
+    return state
+
+
+def code_files() -> List[str]:
+    """This module and every repo-local module it imports; a change to any of them invalidates snapshots."""
+    return sorted(os.path.relpath(path, ROOT) for path in local_module_files('graph_snapshot'))
+
+
+def read_header(f) -> Optional[Dict]:
+    """Parsed header of an open snapshot file, or None if it is not a snapshot of this version."""
+    prefix = f.read(len(MAGIC) + 8)
+    if len(prefix) < len(MAGIC) + 8 or prefix[:len(MAGIC)] != MAGIC:
+        return None
+    version, header_length = struct.unpack('<II', prefix[len(MAGIC):])
+    if version != VERSION:
+        return None
+    header = json.loads(f.read(header_length))
+    if header.get('byteorder') != sys.byteorder:
+        return None
+    return header
+
+
+def current_sources(header: Dict, sources: List[str]) -> Optional[Dict[str, Dict]]:
+    """
+    State of the sources and code a snapshot was built from if they are
+    unchanged by content (sizes and mtimes may differ), else None.
+    """
+    recorded = header['sources']
+    paths = sources + code_files()
+    if sorted(recorded) != sorted(paths):
+        return None
+    current = source_state(paths, recorded)
+    if any(current[path]['sha256'] != recorded[path]['sha256'] for path in paths):
+        return None
+    return current
+
+
+def encode_header(header: Dict, prefix_length: int) -> bytes:
+    """JSON header padded with spaces so the body after it starts 8-byte aligned."""
+    encoded = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    return encoded + b' ' * (-(prefix_length + len(encoded)) % ALIGNMENT)
+
+
+def rewrite_header(path: str, header: Dict) -> bool:
+    """
+    Replace a snapshot's header in place, keeping its length so the sections
+    stay where they are. Returns False if the new header does not fit.
+    """
+    prefix_length = len(MAGIC) + 8
+    with open(path, 'r+b') as f:
+        f.seek(len(MAGIC))
+        _, header_length = struct.unpack('<II', f.read(8))
+        encoded = json.dumps(header, separators=(',', ':')).encode('utf-8')
+        if len(encoded) > header_length:
+            return False
+        f.seek(prefix_length)
+        f.write(encoded + b' ' * (header_length - len(encoded)))
+    return True
+
+
+def build_snapshot(path: str = SNAPSHOT_FILE, publications_file: str = SUBSCRIBER_COUNTS_FILE,
+                   recommendations_file: str = RECOMMENDATIONS_FILE) -> int:
+    """Parse the sources, build the graph and write the snapshot. Returns its size in bytes."""
+    # Record the source state before reading so an edit during the build leaves the snapshot stale
+    sources = source_state([publications_file, recommendations_file] + code_files())
+
+    categories = Interner()
+    columns: Dict[str, Tuple[int, int]] = {}
+
+    def iter_publications() -> Iterator[Dict]:
+        """Keep the first record's subscriber count, category and name per URL while the resolver indexes the stream."""
+        for item in iter_json_array(publications_file):
+            url = item.get('publication_url')
+            if url and url not in columns:
+                category = categories.intern(item['category']) if item.get('category') else -1
+                # Zero means unknown, as in category_aggregation
+                columns[url] = (item.get('subscriber_count') or -1, category,
+                                item.get('name') or item.get('publication_name') or '')
+            yield item
+
+    resolver = PublicationResolver(iter_publications())
+    interner, graph, recommenders = build_recommendation_graph(
+        iter_json_object_items(recommendations_file), canonicalize=resolver.canonical_url)
+    node_publications = resolver.resolve_ids(interner.keys)
+    publication_columns = [columns.get(url, (-1, -1, '')) for url in resolver.urls]
+    node_subscribers = array(OFFSET_TYPECODE, (
+        publication_columns[pub_id][0] if pub_id >= 0 else -1 for pub_id in node_publications))
+    node_categories = array(ID_TYPECODE, (
+        publication_columns[pub_id][1] if pub_id >= 0 else -1 for pub_id in node_publications))
+
+    node_urls = encode_strings(interner.keys)
+    publication_urls = encode_strings(resolver.urls)
+    publication_names = encode_strings([name for _, _, name in publication_columns])
+    alias_hosts = encode_strings(list(resolver.index))
+    identifiers = encode_strings(list(resolver.identifier_index))
+    category_names = encode_strings(categories.keys)
+    sections = {
+        'offsets': graph.offsets,
+        'targets': graph.targets,
+        'recommenders': recommenders,
+        'node_publication': node_publications,
+        'node_subscribers': node_subscribers,
+        'node_category': node_categories,
+        'node_urls.data': node_urls['data'],
+        'node_urls.offsets': node_urls['offsets'],
+        'publication_urls.data': publication_urls['data'],
+        'publication_urls.offsets': publication_urls['offsets'],
+        'publication_names.data': publication_names['data'],
+        'publication_names.offsets': publication_names['offsets'],
+        'publication_subscribers': array(OFFSET_TYPECODE, (count for count, _, _ in publication_columns)),
+        'publication_category': array(ID_TYPECODE, (category for _, category, _ in publication_columns)),
+        'alias_hosts.data': alias_hosts['data'],
+        'alias_hosts.offsets': alias_hosts['offsets'],
+        'alias_publication': array(ID_TYPECODE, resolver.index.values()),
+        'identifiers.data': identifiers['data'],
+        'identifiers.offsets': identifiers['offsets'],
+        'identifier_publication': array(ID_TYPECODE, resolver.identifier_index.values()),
+        'categories.data': category_names['data'],
+        'categories.offsets': category_names['offsets'],
+    }
+
+    # Lay out 8-byte aligned sections after the header
+    layout = {}
+    body_length = 0
+    for name, data in sections.items():
+        body_length += -body_length % ALIGNMENT
+        layout[name] = {'type': data.typecode, 'offset': body_length, 'length': len(data)}
+        body_length += len(data) * data.itemsize
+
+    prefix_length = len(MAGIC) + 8
+    header = encode_header({
+        'version': VERSION,
+        'byteorder': sys.byteorder,
+        'sources': sources,
+        'sections': layout,
+        'nodeCount': graph.num_nodes,
+        'edgeCount': graph.num_edges,
+    }, prefix_length)
+
+    # Write to a temporary file and rename, so readers never map a partial snapshot
+    # (per process: build_data runs several scripts that open the snapshot at once)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<II', VERSION, len(header)))
+        f.write(header)
+        position = 0
+        for name, data in sections.items():
+            f.write(b'\0' * (layout[name]['offset'] - position))
+            f.write(data.tobytes())
+            position = layout[name]['offset'] + len(data) * data.itemsize
+    os.replace(temporary, path)
+    return prefix_length + len(header) + body_length
+
+
+class GraphSnapshot:
+    """A memory-mapped snapshot; every array attribute is a zero-copy view into the file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, 'rb') as f:
+            header = read_header(f)
+            if header is None:
+                raise ValueError(f"{path} is not a version {VERSION} graph snapshot")
+            body_start = f.tell()
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.header = header
+        self.sources = header['sources']
+        buffer = memoryview(self._map)
+        self._views = [buffer]
+
+        def section(name: str) -> memoryview:
+            descriptor = header['sections'][name]
+            start = body_start + descriptor['offset']
+            itemsize = array(descriptor['type']).itemsize
+            raw = buffer[start:start + descriptor['length'] * itemsize]
+            view = raw.cast(descriptor['type'])
+            self._views += [view, raw]
+            return view
+
+        self.graph = CSRGraph(section('offsets'), section('targets'))
+        self.recommenders = section('recommenders')
+        self.node_publication = section('node_publication')
+        self.node_subscribers = section('node_subscribers')
+        self.node_category = section('node_category')
+        self.node_urls = StringTable(section('node_urls.data'), section('node_urls.offsets'))
+        self.publication_urls = StringTable(section('publication_urls.data'), section('publication_urls.offsets'))
+        self.publication_names = StringTable(section('publication_names.data'), section('publication_names.offsets'))
+        self.publication_subscribers = section('publication_subscribers')
+        self.publication_category = section('publication_category')
+        self.alias_hosts = StringTable(section('alias_hosts.data'), section('alias_hosts.offsets'))
+        self.alias_publication = section('alias_publication')
+        self.identifiers = StringTable(section('identifiers.data'), section('identifiers.offsets'))
+        self.identifier_publication = section('identifier_publication')
+        self.categories = StringTable(section('categories.data'), section('categories.offsets'))
+        self._node_ids: Optional[Dict[str, int]] = None
+
+    def __enter__(self) -> 'GraphSnapshot':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def node_id(self, url: str, default: Optional[int] = None) -> Optional[int]:
+        """Node ID of a canonical URL; the URL -> ID dict is built on first use."""
+        if self._node_ids is None:
+            self._node_ids = {url: node for node, url in enumerate(self.node_urls)}
+        return self._node_ids.get(url, default)
+
+    def interner(self) -> Interner:
+        """A regular Interner over the node URLs, for code that extends the graph."""
+        interner = Interner()
+        for url in self.node_urls:
+            interner.intern(url)
+        return interner
+
+    def recommendation_graph(self) -> Tuple[Interner, CSRGraph, array]:
+        """
+        Copies of the interner, graph and recommender node IDs, as
+        build_recommendation_graph() returns them, that outlive the snapshot.
+        """
+        graph = CSRGraph(array(OFFSET_TYPECODE, self.graph.offsets), array(ID_TYPECODE, self.graph.targets))
+        return self.interner(), graph, array(ID_TYPECODE, self.recommenders)
+
+    def resolver(self) -> PublicationResolver:
+        """The PublicationResolver the snapshot was built with (same index, no alias conflicts)."""
+        return PublicationResolver.from_index(
+            self.publication_urls,
+            dict(zip(self.alias_hosts, self.alias_publication)),
+            dict(zip(self.identifiers, self.identifier_publication)))
+
+    def close(self) -> None:
+        """Unmap the file; every view handed out (graph arrays, columns, string tables) becomes unusable."""
+        # Slices taken from the views (e.g. successors()) must be released by their holders first
+        for view in reversed(self._views):
+            view.release()
+        self._map.close()
+
+
+def open_snapshot(path: str = SNAPSHOT_FILE, publications_file: str = SUBSCRIBER_COUNTS_FILE,
+                  recommendations_file: str = RECOMMENDATIONS_FILE, rebuild: bool = True) -> GraphSnapshot:
+    """
+    Map the snapshot at path, rebuilding it first if it is missing, from an
+    older format, or built from different source files or code. With
+    rebuild=False a stale snapshot raises ValueError instead.
+    """
+    sources = [publications_file, recommendations_file]
+    current = None
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            header = read_header(f)
+        current = current_sources(header, sources) if header is not None else None
+        if current is not None and current != header['sources']:
+            # Touched but unchanged: record the new stat so later opens skip the hashing
+            rewrite_header(path, dict(header, sources=current))
+    if current is None:
+        if not rebuild:
+            raise ValueError(f"{path} is missing or stale")
+        build_snapshot(path, publications_file, recommendations_file)
+    return GraphSnapshot(path)
+
+
+def main():
+    """Main processing function."""
+    started = time.perf_counter()
+    snapshot = open_snapshot()
+    opened = time.perf_counter()
+    graph = snapshot.graph
+    known = sum(1 for pub_id in snapshot.node_publication if pub_id >= 0)
+    print(f"Snapshot {snapshot.path}: {graph.num_nodes} nodes ({known} known publications), "
+          f"{graph.num_edges} edges, {len(snapshot.categories)} categories, "
+          f"{os.path.getsize(snapshot.path) / 1024 / 1024:.1f} MB")
+    print(f"Opened in {(opened - started) * 1000:.1f} ms")
+    snapshot.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Stage instrumentation shared by the preprocessing scripts.
+Times named stages, records item counts and the process's peak memory after
+each stage, and writes a machine-readable run report (<output>.run.json) next
+to a script's output.
+
+Costly diagnostics are opt-in through the PREPROCESS_VERBOSITY environment
+variable:
+    0  summary prints only (default)
+    1  per-stage log lines and debug diagnostics
+    2  also trace Python allocations per stage with tracemalloc (slower)
+"""
+
+import json
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+VERBOSITY_ENV = 'PREPROCESS_VERBOSITY'
+REPORT_SUFFIX = '.run.json'
+
+
+def verbosity_from_env() -> int:
+    try:
+        return int(os.environ.get(VERBOSITY_ENV, '0'))
+    except ValueError:
+        return 0
+
+
+def peak_rss_mb() -> float:
+    """Process-wide peak resident set size so far (ru_maxrss is KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class Stage:
+    """
+    Measurements of one named stage; set `items` to the number of records it handled.
+
+    process_peak_rss_mb is the process-wide high-water mark when the stage
+    ended, so it includes every earlier stage; peak_traced_mb (verbosity 2)
+    is the stage's own peak of Python allocations.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.items: Optional[int] = None
+        self.seconds = 0.0
+        self.process_peak_rss_mb = 0.0
+        self.peak_traced_mb: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        record = {
+            'name': self.name,
+            'seconds': round(self.seconds, 4),
+            'items': self.items,
+            'process_peak_rss_mb': round(self.process_peak_rss_mb, 1),
+        }
+        if self.peak_traced_mb is not None:
+            record['peak_traced_mb'] = round(self.peak_traced_mb, 1)
+        return record
+
+
+class RunReport:
+    """
+    Collects stage timings and counters for one script run.
+
+        report = RunReport('preprocess_graph_data')
+        with report.stage('load') as stage:
+            ...
+            stage.items = len(records)
+        if report.debug():
+            ...  # diagnostics worth computing only on request
+        report.write('static/jsons/graph_data_optimized.json')
+    """
+
+    def __init__(self, script: str, verbosity: Optional[int] = None) -> None:
+        self.script = script
+        self.verbosity = verbosity_from_env() if verbosity is None else verbosity
+        self.stages: List[Stage] = []
+        self.counters: Dict[str, Any] = {}
+        self.started_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        self._start = time.perf_counter()
+        self._trace = self.verbosity >= 2
+        if self._trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def debug(self, level: int = 1) -> bool:
+        """Whether diagnostics at this verbosity level should run."""
+        return self.verbosity >= level
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[Stage]:
+        """Time the enclosed block as a named stage."""
+        stage = Stage(name)
+        if self._trace:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            stage.seconds = time.perf_counter() - start
+            stage.process_peak_rss_mb = peak_rss_mb()
+            if self._trace:
+                stage.peak_traced_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            self.stages.append(stage)
+            if self.debug():
+                items = f", {stage.items:,} items" if stage.items is not None else ''
+                print(f"[{self.script}] {name}: {stage.seconds:.3f}s{items}, "
+                      f"process peak RSS {stage.process_peak_rss_mb:.0f} MB")
+
+    def count(self, name: str, value: Any) -> None:
+        """Record a run-level counter (e.g. total nodes)."""
+        self.counters[name] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'script': self.script,
+            'started_at': self.started_at,
+            'python': platform.python_version(),
+            'verbosity': self.verbosity,
+            'wall_seconds': round(time.perf_counter() - self._start, 4),
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            'stages': [stage.to_dict() for stage in self.stages],
+            'counters': self.counters,
+        }
+
+    def write(self, output_path: str) -> str:
+        """Write the report next to output_path (same name, .run.json suffix) and return its path."""
+        path = os.path.splitext(output_path)[0] + REPORT_SUFFIX
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+            f.write('\n')
+        return path
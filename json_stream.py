@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Streaming JSON ingest and output with bounded memory.
+Reads the elements of a top-level JSON array (or the entries of an object
+inside one) one at a time from a buffered file, and writes nodes and links
+as they are produced instead of holding the full lists for json.dump.
+"""
+
+import json
+from typing import IO, Any, Dict, Iterable, Iterator, Tuple
+
+CHUNK_SIZE = 1 << 16
+# Minified output: no whitespace after item or key separators
+SEPARATORS = (',', ':')
+_WHITESPACE = ' \t\n\r'
+_NUMBER_CHARS = '+-0123456789.eE'
+_decoder = json.JSONDecoder()
+
+
+class _Reader:
+    """A sliding text buffer over a file that JSON values are decoded from."""
+
+    def __init__(self, f: IO[str]) -> None:
+        self.f = f
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """Append the next chunk, dropping the consumed prefix. False at end of file."""
+        if self.eof:
+            return False
+        chunk = self.f.read(CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ('' at end of file)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if char == '' or char not in chars:
+            raise ValueError(f"Expected one of {chars!r} in JSON stream, found {char!r}")
+        self.pos += 1
+        return char
+
+    def _buffer_number(self) -> None:
+        """Read on until the number at pos is followed by another character (or the end of file)."""
+        while True:
+            end = self.pos
+            while end < len(self.buffer) and self.buffer[end] in _NUMBER_CHARS:
+                end += 1
+            if end < len(self.buffer) or not self._fill():
+                return
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value, reading more input as needed."""
+        if self.peek() in '-0123456789':
+            # A number cut at the chunk edge ('0' of '0.25') would decode as a valid shorter one
+            self._buffer_number()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            self.pos = end
+            return value
+
+
+def _iter_array(reader: _Reader) -> Iterator[Any]:
+    reader.expect('[')
+    if reader.peek() == ']':
+        reader.pos += 1
+        return
+    while True:
+        yield reader.value()
+        if reader.expect(',]') == ']':
+            return
+
+
+def _iter_object(reader: _Reader) -> Iterator[Tuple[str, Any]]:
+    reader.expect('{')
+    if reader.peek() == '}':
+        reader.pos += 1
+        return
+    while True:
+        key = reader.value()
+        reader.expect(':')
+        yield key, reader.value()
+        if reader.expect(',}') == '}':
+            return
+
+
+def iter_json_array(path: str) -> Iterator[Any]:
+    """Yield the elements of a file holding a top-level JSON array, one at a time."""
+    with open(path, 'r') as f:
+        yield from _iter_array(_Reader(f))
+
+
+def iter_json_object_items(path: str) -> Iterator[Tuple[str, Any]]:
+    """
+    Yield (key, value) pairs of a file's top-level JSON object, or of the
+    first object inside a top-level array (the recommendations.json layout).
+    """
+    with open(path, 'r') as f:
+        reader = _Reader(f)
+        if reader.peek() == '[':
+            reader.expect('[')
+        yield from _iter_object(reader)
+
+
+def write_json_array(f: IO[str], items: Iterable[Any]) -> int:
+    """Write items as a minified JSON array. Returns the item count."""
+    count = 0
+    f.write('[')
+    for item in items:
+        if count:
+            f.write(',')
+        f.write(json.dumps(item, separators=SEPARATORS))
+        count += 1
+    f.write(']')
+    return count
+
+
+def write_json_object(path: str, sections: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Write a minified JSON object whose list-valued sections are streamed. Any section
+    that is not a dict, list or scalar (e.g. a generator) is consumed lazily
+    and written as an array. Sections are written in order, so a later
+    section (such as metadata) may be a callable that is only evaluated once
+    the earlier streams are exhausted.
+
+    Returns the number of items written per streamed section.
+    """
+    counts = {}
+    with open(path, 'w') as f:
+        f.write('{')
+        for index, (key, value) in enumerate(sections.items()):
+            if index:
+                f.write(',')
+            f.write(f"{json.dumps(key)}:")
+            if callable(value):
+                value = value()
+            if isinstance(value, (dict, list, str, int, float, bool)) or value is None:
+                f.write(json.dumps(value, separators=SEPARATORS))
+            else:
+                counts[key] = write_json_array(f, value)
+        f.write('}')
+    return counts
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+In-memory recommendation graph for incremental updates.
+Holds the parsed publications and recommendations together with every counter
+the recommendation-count and category outputs are built from (per-publication
+in/out degrees, per-category subscriber counts, category pair weights), and
+updates them edge by edge, so applying a delta costs time proportional to the
+delta rather than a full reparse.
+
+Deltas are dicts (usually one JSON file from the crawler):
+
+    {
+      "recommendations": {
+        "added":   {"<recommender url>": ["<recommended url>", ...]},
+        "removed": {"<recommender url>": ["<recommended url>", ...]},
+        "replaced": {"<recommender url>": ["<full new list>", ...]}
+      },
+      "subscriber_counts": {"<publication url>": 12345}
+    }
+
+Recommender keys are raw URLs, as in recommendations.json. Subscriber counts
+can only be updated for publications already in subscriber_counts.json.
+"""
+
+import bisect
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from category_aggregation import category_stats
+from graph_engine import ID_TYPECODE, CSRGraph, Interner
+from publication_resolver import PublicationResolver
+from publications_merge import PublicationTable
+
+# Outputs a delta can invalidate
+COUNTS = 'counts'            # recommendation_counts.json, publications_merged.json
+CATEGORIES = 'categories'    # categories.json, category_graph_data_optimized.*
+SOURCES = 'sources'          # recommendations.json, subscriber_counts.json
+
+
+class LiveRecommendationGraph:
+    """Publications, recommendations and their derived counters, updated per delta."""
+
+    def __init__(self, publications: Iterable[Dict], recommendations: Iterable[Tuple[str, List[str]]]) -> None:
+        self.records: List[Dict] = []
+        self.record_index: Dict[str, List[int]] = {}
+        self.table = PublicationTable()
+        self.categories = Interner()
+        self.url_categories: Dict[str, int] = {}
+        # Sorted subscriber counts of every record in each category
+        self.category_subscribers: List[List[int]] = []
+
+        self.resolver = PublicationResolver(self.table.collect(self._collect(publications)))
+
+        self.recommendations: Dict[str, List[str]] = {}
+        self.out_degrees: Counter = Counter()
+        self.in_degrees: Counter = Counter()
+        self.pair_counts: Counter = Counter()
+        self.category_outgoing: Counter = Counter()
+        self.category_incoming: Counter = Counter()
+        self.skipped = 0
+
+        for recommender_url, recommended_urls in recommendations:
+            self._add(recommender_url, recommended_urls)
+
+    def _collect(self, publications: Iterable[Dict]) -> Iterator[Dict]:
+        """Keep every record and index categories while the resolver scans the publications."""
+        for item in publications:
+            self.records.append(item)
+            category = item.get('category')
+            if category:
+                category_id = self.categories.intern(category)
+                if category_id == len(self.category_subscribers):
+                    self.category_subscribers.append([])
+                # Zero means unknown, as in category_aggregation
+                if item.get('subscriber_count'):
+                    bisect.insort(self.category_subscribers[category_id], item['subscriber_count'])
+            if item.get('publication_url'):
+                self.record_index.setdefault(item['publication_url'], []).append(len(self.records) - 1)
+                if category:
+                    self.url_categories.setdefault(item['publication_url'], category_id)
+            yield item
+
+    def _category(self, url: str) -> int:
+        pub_id = self.resolver.resolve_id(url)
+        return self.url_categories.get(self.resolver.urls[pub_id], -1) if pub_id >= 0 else -1
+
+    def _count_edge(self, source: str, target: str, sign: int, affected: Set[str]) -> None:
+        """Add (sign=1) or remove (sign=-1) one canonical edge from every counter."""
+        self.out_degrees[source] += sign
+        self.in_degrees[target] += sign
+        if self.resolver.resolve_id(source) >= 0 or self.resolver.resolve_id(target) >= 0:
+            affected.add(COUNTS)
+        source_category = self._category(source)
+        target_category = self._category(target)
+        if source_category >= 0:
+            self.category_outgoing[source_category] += sign
+            if target_category >= 0:
+                self.pair_counts[source_category, target_category] += sign
+        if target_category >= 0:
+            self.category_incoming[target_category] += sign
+        if source_category >= 0 or target_category >= 0:
+            affected.add(CATEGORIES)
+
+    def _add(self, recommender_url: str, recommended_urls: Iterable[str],
+             affected: Optional[Set[str]] = None) -> None:
+        affected = set() if affected is None else affected
+        listed = self.recommendations.setdefault(recommender_url, [])
+        source = self.resolver.canonical_url(recommender_url)
+        for recommended_url in recommended_urls:
+            listed.append(recommended_url)
+            self._count_edge(source, self.resolver.canonical_url(recommended_url), 1, affected)
+            affected.add(SOURCES)
+
+    def _remove(self, recommender_url: str, recommended_urls: Iterable[str], affected: Set[str]) -> None:
+        listed = self.recommendations.get(recommender_url, [])
+        source = self.resolver.canonical_url(recommender_url)
+        for recommended_url in recommended_urls:
+            if recommended_url not in listed:
+                self.skipped += 1
+                continue
+            listed.remove(recommended_url)
+            self._count_edge(source, self.resolver.canonical_url(recommended_url), -1, affected)
+            affected.add(SOURCES)
+
+    def _replace(self, recommender_url: str, recommended_urls: List[str], affected: Set[str]) -> None:
+        """Swap a recommender's list, counting only the entries that differ."""
+        old = Counter(self.recommendations.get(recommender_url, []))
+        new = Counter(recommended_urls)
+        self._remove(recommender_url, list((old - new).elements()), affected)
+        self._add(recommender_url, list((new - old).elements()), affected)
+        # Keep the crawler's order for the rewritten source
+        self.recommendations[recommender_url] = list(recommended_urls)
+
+    def set_subscriber_count(self, url: str, count: int, affected: Set[str]) -> None:
+        pub_id = self.resolver.resolve_id(url)
+        if pub_id < 0:
+            self.skipped += 1
+            return
+        publication_url = self.resolver.urls[pub_id]
+        for position in self.record_index[publication_url]:
+            record = self.records[position]
+            old = record.get('subscriber_count')
+            if old == count:
+                continue
+            category = record.get('category')
+            if category:
+                counts = self.category_subscribers[self.categories.get(category)]
+                if old:
+                    del counts[bisect.bisect_left(counts, old)]
+                if count:
+                    bisect.insort(counts, count)
+                affected.add(CATEGORIES)
+            record['subscriber_count'] = count
+            affected.update((COUNTS, SOURCES))
+        self.table.update(publication_url, 'subscriber_count', count)
+
+    def apply(self, delta: Dict) -> Set[str]:
+        """Apply one delta; returns the output groups it affected (COUNTS, CATEGORIES, SOURCES)."""
+        affected: Set[str] = set()
+        recommendations = delta.get('recommendations', {})
+        for recommender_url, recommended_urls in recommendations.get('removed', {}).items():
+            self._remove(recommender_url, recommended_urls, affected)
+        for recommender_url, recommended_urls in recommendations.get('added', {}).items():
+            self._add(recommender_url, recommended_urls, affected)
+        for recommender_url, recommended_urls in recommendations.get('replaced', {}).items():
+            self._replace(recommender_url, recommended_urls, affected)
+        for url, count in delta.get('subscriber_counts', {}).items():
+            self.set_subscriber_count(url, count, affected)
+        return affected
+
+    def incoming_counts(self) -> Dict[str, int]:
+        """Incoming recommendations per known publication (as preprocess_recommendation_counts.py)."""
+        return {url: self.in_degrees[url] for url in self.resolver.urls if self.in_degrees[url]}
+
+    def outgoing_counts(self) -> Dict[str, int]:
+        return {url: self.out_degrees[url] for url in self.resolver.urls if self.out_degrees[url]}
+
+    def category_graph(self) -> Tuple[CSRGraph, List[Dict]]:
+        """Weighted category graph and categories.json records, as aggregate_categories() returns them."""
+        sources = array(ID_TYPECODE)
+        targets = array(ID_TYPECODE)
+        weights = array('q')
+        for (source_category, target_category), count in sorted(self.pair_counts.items()):
+            if count:
+                sources.append(source_category)
+                targets.append(target_category)
+                weights.append(count)
+        graph = CSRGraph.from_edges(len(self.categories), sources, targets, weights)
+        stats = [category_stats(category, self.category_subscribers[category_id],
+                                self.category_outgoing[category_id], self.category_incoming[category_id])
+                 for category_id, category in enumerate(self.categories.keys)]
+        return graph, stats
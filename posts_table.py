@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Columnar posts table for the topic analytics generator.
+Loads crawled posts once into flat per-column arrays, derives every feature
+the analyses group or compare by (title/content flags, posting time, clipped
+engagement metrics, per-1k-subscriber rates) in a single pass, and provides
+the shared grouped aggregation the analyses are built on: one scan over the
+rows updates count, sum and sum of squares for every grouping at once, so
+means, variances and t-tests of any group come out of the same pass.
+
+Posts are JSON records (a JSON array or one record per line) with:
+
+    title, canonical_url (or url), post_date (ISO 8601), publication_id,
+    reaction_count, comment_count, restacks,
+    body_html (or body) or content_length / has_images / has_lists / link_count,
+    topics (list of names) or postTags ([{"name": ...}]),
+    subscriber_count (optional; otherwise joined from subscriber_counts.json)
+"""
+
+import bisect
+import json
+import math
+import re
+from array import array
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from json_stream import iter_json_array
+
+ENGAGEMENT_METRICS = ('reaction_count', 'comment_count', 'restacks')
+# engagement_score = reactions + 5 x comments + 3 x restacks
+ENGAGEMENT_WEIGHTS = (1, 5, 3)
+# Engagement metrics are clipped at this quantile before averaging (outlier treatment)
+CLIP_QUANTILE = 0.99
+LINK_COUNT_CAP = 20
+
+NUMBER_PATTERN = re.compile(r'\d')
+TAG_PATTERN = re.compile(r'<[^>]+>')
+LINK_PATTERN = re.compile(r'<a\s', re.IGNORECASE)
+IMAGE_PATTERN = re.compile(r'<(?:img|picture|figure)\b', re.IGNORECASE)
+LIST_PATTERN = re.compile(r'<(?:ul|ol)\b', re.IGNORECASE)
+
+DAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+
+def iter_posts(path: str) -> Iterator[Dict]:
+    """Post records from a JSON array file or a JSON-lines file."""
+    with open(path, 'r') as f:
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+    if first == '[':
+        yield from iter_json_array(path)
+        return
+    with open(path, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def quantile(sorted_values: Sequence[float], q: float) -> float:
+    """Linearly interpolated quantile of an already sorted sequence (as pandas computes it)."""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def parse_date(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def post_topics(item: Dict) -> Tuple[str, ...]:
+    topics = item.get('topics')
+    if topics is None:
+        topics = [tag.get('name') for tag in item.get('postTags') or [] if isinstance(tag, dict)]
+    return tuple(dict.fromkeys(topic for topic in topics if topic))
+
+
+class PostsTable:
+    """Posts as parallel columns; row i of every column describes post i."""
+
+    # Flag columns usable as binary features
+    FLAGS = ('has_images', 'has_number', 'has_question', 'has_exclamation', 'has_lists',
+             'is_weekend', 'is_morning', 'is_evening')
+
+    def __init__(self) -> None:
+        self.text: Dict[str, List] = {name: [] for name in ('title', 'url', 'post_date', 'month_key', 'topics')}
+        self.columns: Dict[str, array] = {}
+        for name in ('publication_id', 'title_length', 'content_length', 'link_count',
+                     'hour', 'day_of_week', 'month', 'year'):
+            self.columns[name] = array('q')
+        for name in self.FLAGS + ('has_subscribers',):
+            self.columns[name] = array('b')
+        for name in ('subscriber_count',) + tuple(f"raw_{metric}" for metric in ENGAGEMENT_METRICS) + (
+                'raw_engagement_score',):
+            self.columns[name] = array('d')
+        self.clip_thresholds: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self.text['title'])
+
+    def __getitem__(self, name: str) -> Sequence:
+        return self.columns[name] if name in self.columns else self.text[name]
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict], subscriber_counts: Optional[Dict[int, float]] = None,
+                     clip_quantile: float = CLIP_QUANTILE) -> 'PostsTable':
+        """Build the table from post records, deriving features and clipped metrics."""
+        table = cls()
+        subscriber_counts = subscriber_counts or {}
+        for item in records:
+            if not item.get('post_date'):
+                continue
+            table._append(item, subscriber_counts)
+        table._derive(clip_quantile)
+        return table
+
+    def _append(self, item: Dict, subscriber_counts: Dict[int, float]) -> None:
+        columns = self.columns
+        title = item.get('title') or ''
+        body = item.get('body_html') or item.get('body') or ''
+        date = parse_date(item['post_date'])
+        publication_id = int(item.get('publication_id') or 0)
+        subscribers = item.get('subscriber_count')
+        if subscribers is None:
+            subscribers = subscriber_counts.get(publication_id, 0)
+
+        self.text['title'].append(title)
+        self.text['url'].append(item.get('canonical_url') or item.get('url') or '')
+        self.text['post_date'].append(str(date))
+        self.text['month_key'].append(f"{date.year:04d}-{date.month:02d}")
+        self.text['topics'].append(post_topics(item))
+
+        columns['publication_id'].append(publication_id)
+        columns['title_length'].append(len(title.split()))
+        content_length = item.get('content_length')
+        if content_length is None:
+            content_length = len(TAG_PATTERN.sub('', body))
+        columns['content_length'].append(int(content_length))
+        link_count = item.get('link_count')
+        if link_count is None:
+            link_count = len(LINK_PATTERN.findall(body))
+        columns['link_count'].append(min(int(link_count), LINK_COUNT_CAP))
+        columns['hour'].append(date.hour)
+        columns['day_of_week'].append(date.weekday())
+        columns['month'].append(date.month)
+        columns['year'].append(date.year)
+
+        flags = {
+            'has_images': item['has_images'] if 'has_images' in item else bool(IMAGE_PATTERN.search(body)),
+            'has_lists': item['has_lists'] if 'has_lists' in item else bool(LIST_PATTERN.search(body)),
+            'has_number': bool(NUMBER_PATTERN.search(title)),
+            'has_question': '?' in title,
+            'has_exclamation': '!' in title,
+            'is_weekend': date.weekday() >= 5,
+            'is_morning': 6 <= date.hour < 12,
+            'is_evening': 18 <= date.hour <= 23,
+        }
+        for name in self.FLAGS:
+            columns[name].append(int(bool(flags[name])))
+
+        subscribers = float(subscribers or 0)
+        columns['subscriber_count'].append(subscribers)
+        columns['has_subscribers'].append(int(subscribers > 0))
+        score = 0.0
+        for metric, weight in zip(ENGAGEMENT_METRICS, ENGAGEMENT_WEIGHTS):
+            value = float(item.get(metric) or 0)
+            columns[f"raw_{metric}"].append(value)
+            score += weight * value
+        columns['raw_engagement_score'].append(score)
+
+    def _derive(self, clip_quantile: float) -> None:
+        """Clipped metric columns and their per-1k-subscriber rates (0 without subscriber data)."""
+        subscribers = self.columns['subscriber_count']
+        for metric in ENGAGEMENT_METRICS + ('engagement_score',):
+            raw = self.columns[f"raw_{metric}"]
+            threshold = quantile(sorted(raw), clip_quantile)
+            self.clip_thresholds[metric] = threshold
+            clipped = array('d', (value if value < threshold else threshold for value in raw))
+            self.columns[metric] = clipped
+            self.columns[f"{metric}_per_1k"] = array('d', (
+                value / count * 1000 if count > 0 else 0.0 for value, count in zip(clipped, subscribers)))
+
+    def rows(self, names: Sequence[str]) -> Iterator[Tuple]:
+        """Rows of the named columns, as tuples."""
+        return zip(*(self[name] for name in names))
+
+    def date_range(self) -> Tuple[str, str]:
+        dates = self.text['post_date']
+        return (min(dates), max(dates)) if dates else ('', '')
+
+
+def load_subscriber_counts(path: str) -> Dict[int, float]:
+    """publication_id -> subscriber_count from subscriber_counts.json (first record wins)."""
+    counts: Dict[int, float] = {}
+    for item in iter_json_array(path):
+        if item.get('publication_id') is not None and item.get('subscriber_count') is not None:
+            counts.setdefault(int(item['publication_id']), float(item['subscriber_count']))
+    return counts
+
+
+class Aggregate:
+    """Count, sum and sum of squares of several value columns over one group of rows."""
+
+    __slots__ = ('count', 'sums', 'squares', 'subscribed', 'values')
+
+    def __init__(self, width: int, collect: bool) -> None:
+        self.count = 0
+        self.sums = [0.0] * width
+        self.squares = [0.0] * width
+        # Rows with subscriber data (the denominator of the per-1k means)
+        self.subscribed = 0
+        self.values: Optional[List[Tuple]] = [] if collect else None
+
+    def mean(self, index: int, count: Optional[int] = None) -> float:
+        count = self.count if count is None else count
+        return self.sums[index] / count if count else 0.0
+
+    def variance(self, index: int) -> float:
+        """Sample variance (ddof=1)."""
+        if self.count < 2:
+            return 0.0
+        mean = self.sums[index] / self.count
+        return max(self.squares[index] - self.count * mean * mean, 0.0) / (self.count - 1)
+
+
+def grouped_aggregates(table: PostsTable, groupings: Dict[str, Callable[[int], object]],
+                       values: Sequence[str], collect: Sequence[str] = ()) -> Dict[str, Dict[object, Aggregate]]:
+    """
+    One pass over the table for every grouping at once. groupings maps a name
+    to key(row) (None to leave the row out, a list to count the row in each of
+    several groups, e.g. one per topic); values are summed per group, and
+    per-1k columns only over rows with subscriber data. Groupings named in
+    collect also keep each row's values, for medians.
+    """
+    columns = [table[name] for name in values]
+    per_1k = [name.endswith('_per_1k') for name in values]
+    has_subscribers = table['has_subscribers']
+    width = len(values)
+    results: Dict[str, Dict[object, Aggregate]] = {name: {} for name in groupings}
+    keyed = [(results[name], key, name in collect) for name, key in groupings.items()]
+
+    for row in range(len(table)):
+        row_values = [column[row] for column in columns]
+        subscribed = has_subscribers[row]
+        for groups, key, keep in keyed:
+            group_key = key(row)
+            if group_key is None:
+                continue
+            for member in (group_key if isinstance(group_key, list) else (group_key,)):
+                aggregate = groups.get(member)
+                if aggregate is None:
+                    aggregate = groups[member] = Aggregate(width, keep)
+                aggregate.count += 1
+                aggregate.subscribed += subscribed
+                sums = aggregate.sums
+                squares = aggregate.squares
+                for i, value in enumerate(row_values):
+                    if per_1k[i] and not subscribed:
+                        continue
+                    sums[i] += value
+                    squares[i] += value * value
+                if keep:
+                    aggregate.values.append(tuple(row_values))
+    return results
+
+
+def _beta_continued_fraction(a: float, b: float, x: float) -> float:
+    """Continued fraction of the regularized incomplete beta function (modified Lentz)."""
+    tiny = 1e-300
+    c, d = 1.0, 1.0 - (a + b) * x / (a + 1)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    result = d
+    for m in range(1, 300):
+        for numerator in (m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+                          -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            result *= c * d
+        if abs(c * d - 1.0) < 1e-15:
+            break
+    return result
+
+
+def incomplete_beta(a: float, b: float, x: float) -> float:
+    """Regularized incomplete beta I_x(a, b)."""
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+    log_front = math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log1p(-x)
+    if x < (a + 1) / (a + b + 2):
+        return math.exp(log_front) * _beta_continued_fraction(a, b, x) / a
+    return 1.0 - math.exp(log_front) * _beta_continued_fraction(b, a, 1 - x) / b
+
+
+def t_test(first: Aggregate, second: Aggregate, index: int) -> Tuple[float, float]:
+    """Two-sided independent two-sample t-test (pooled variance) on value column index: (t, p)."""
+    n1, n2 = first.count, second.count
+    if n1 < 2 or n2 < 2:
+        return 0.0, 1.0
+    df = n1 + n2 - 2
+    pooled = ((n1 - 1) * first.variance(index) + (n2 - 1) * second.variance(index)) / df
+    if pooled <= 0:
+        return 0.0, 1.0
+    t = (first.mean(index) - second.mean(index)) / math.sqrt(pooled * (1 / n1 + 1 / n2))
+    return t, incomplete_beta(df / 2, 0.5, df / (df + t * t))
+
+
+def pearson(x: Sequence[float], y: Sequence[float]) -> float:
+    n = len(x)
+    if n < 2:
+        return 0.0
+    mean_x = math.fsum(x) / n
+    mean_y = math.fsum(y) / n
+    sxy = sxx = syy = 0.0
+    for a, b in zip(x, y):
+        a -= mean_x
+        b -= mean_y
+        sxy += a * b
+        sxx += a * a
+        syy += b * b
+    return sxy / math.sqrt(sxx * syy) if sxx > 0 and syy > 0 else 0.0
+
+
+def median(values: Sequence[float]) -> float:
+    return quantile(sorted(values), 0.5)
+
+
+def bin_index(edges: Sequence[float], value: float) -> int:
+    """Index of the [edges[i], edges[i + 1]) bin holding value."""
+    return max(bisect.bisect_right(edges, value) - 1, 0)
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Preprocess the bipartite recommendation network for the networks view.
+Takes recommendations.json and subscriber_counts.json (through the graph
+snapshot, graph_snapshot.py) and outputs node
+positions, edges as [source, target, strength, waypoints] over node indexes
+(waypoints: y of the bundled route's interior control points, empty for
+unbundled edges) and edge statistics, so the page no longer lays out and
+bundles edges in the browser.
+"""
+
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urlparse
+
+from bipartite_layout import (
+    BUNDLING_STRENGTH, LEFT_X_RATIO, NODE_SPACING, RIGHT_X_RATIO, TOP_MARGIN,
+    BandHierarchy, bundled_control_points, column_positions, connection_strength, edge_statistics,
+    subscriber_sort_key)
+from graph_snapshot import open_snapshot
+from instrumentation import RunReport
+from json_stream import write_json_object
+
+# Width of the layout coordinate space (NetworkGraph.svelte's default width)
+LAYOUT_WIDTH = 800
+
+def extract_publication_name(url: str) -> str:
+    """Readable name from a publication URL, as extractPublicationName in data.ts."""
+    hostname = (urlparse(url).hostname or '')
+    if not hostname:
+        return url.replace('https://', '').replace('http://', '').split('/')[0]
+    if hostname.startswith('www.'):
+        hostname = hostname[4:]
+    if '.substack.com' in hostname:
+        subdomain = hostname.split('.')[0]
+        return subdomain[:1].upper() + subdomain[1:]
+    parts = hostname.split('.')
+    if len(parts) >= 2:
+        main_domain = parts[-2]
+        return main_domain[:1].upper() + main_domain[1:]
+    return hostname
+
+def categorize_publication(url: str) -> str:
+    """Categorize publication based on URL."""
+    if 'substack.com' in url:
+        return 'Newsletter'
+    elif any(domain in url for domain in ['.com', '.org', '.net']):
+        return 'Website'
+    else:
+        return 'Publication'
+
+def main():
+    """Main processing function."""
+
+    report = RunReport('preprocess_bipartite_network')
+
+    print("Loading graph snapshot...")
+    with report.stage('load') as stage:
+        with open_snapshot() as snapshot:
+            interner, graph, recommenders = snapshot.recommendation_graph()
+            # Unknown counts are stored as -1
+            subscriber_counts: List[Optional[int]] = [count if count > 0 else None
+                                                      for count in snapshot.node_subscribers]
+        stage.items = graph.num_edges
+
+    print(f"Processing {graph.num_nodes} publications and {graph.num_edges} recommendations")
+
+    with report.stage('layout') as stage:
+        urls = interner.keys
+        names = [extract_publication_name(url) for url in urls]
+
+        is_bestseller = bytearray(graph.num_nodes)
+        for node in recommenders:
+            is_bestseller[node] = 1
+        is_recommended = bytearray(graph.num_nodes)
+        for node in graph.targets:
+            is_recommended[node] = 1
+
+        def sort_key(node: int):
+            return subscriber_sort_key(subscriber_counts[node], names[node])
+
+        # Left column: every bestseller; dual-role ones are also recommended
+        left = sorted((node for node in range(graph.num_nodes) if is_bestseller[node]), key=sort_key)
+        # Right column: recommended publications not already on the left, by name
+        right = sorted((node for node in range(graph.num_nodes) if is_recommended[node] and not is_bestseller[node]),
+                       key=lambda node: names[node].casefold())
+
+        left_x = LAYOUT_WIDTH * LEFT_X_RATIO
+        right_x = LAYOUT_WIDTH * RIGHT_X_RATIO
+        left_ys = column_positions(len(left))
+        right_ys = column_positions(len(right))
+
+        # Per-node position, column slot and type
+        x = [0.0] * graph.num_nodes
+        y = [0.0] * graph.num_nodes
+        slot = [-1] * graph.num_nodes
+        node_type = ['recommendation'] * graph.num_nodes
+        for column_x, ys, column in ((left_x, left_ys, left), (right_x, right_ys, right)):
+            for position, node in enumerate(column):
+                x[node] = column_x
+                y[node] = ys[position]
+                slot[node] = position
+        for node in left:
+            node_type[node] = 'dual' if is_recommended[node] else 'bestseller'
+        stage.items = len(left) + len(right)
+
+    height = max(left_ys[-1] if left_ys else 0, right_ys[-1] if right_ys else 0) + TOP_MARGIN
+
+    with report.stage('bundle') as stage:
+        left_bands = BandHierarchy(left_ys)
+        right_bands = BandHierarchy(right_ys)
+        sources = graph.edge_sources()
+        strengths = []
+        waypoints = []
+        for source, target in zip(sources, graph.targets):
+            strengths.append(connection_strength(subscriber_counts[source], node_type[source], node_type[target]))
+            # Edges into the left column (dual-role targets) stay unbundled
+            if x[target] == right_x:
+                points = bundled_control_points((x[source], y[source]), (x[target], y[target]),
+                                                slot[source], slot[target], left_bands, right_bands)
+                waypoints.append([round(point_y, 1) for _, point_y in points[1:-1]])
+            else:
+                waypoints.append([])
+        stage.items = len(waypoints)
+
+    with report.stage('statistics'):
+        statistics = edge_statistics(strengths, sources, graph.targets, graph.num_nodes)
+
+    # Output order: left column, then right column; edges refer to nodes by this index
+    order = left + right
+    position = [-1] * graph.num_nodes
+    for index, node in enumerate(order):
+        position[node] = index
+
+    def iter_nodes() -> Iterator[Dict]:
+        for node in order:
+            yield {
+                'id': urls[node],
+                'name': names[node],
+                'category': categorize_publication(urls[node]),
+                'subscriber_count': subscriber_counts[node],
+                'x': x[node],
+                'y': y[node],
+                'nodeType': node_type[node]
+            }
+
+    def iter_edges() -> Iterator[List]:
+        for index, (source, target) in enumerate(zip(sources, graph.targets)):
+            yield [position[source], position[target], round(strengths[index], 2), waypoints[index]]
+
+    metadata = {
+        'width': LAYOUT_WIDTH,
+        'height': height,
+        'node_spacing': NODE_SPACING,
+        'left_nodes': len(left),
+        'right_nodes': len(right),
+        'bundle_levels': {'left': left_bands.levels, 'right': right_bands.levels},
+        'bundling_strength': BUNDLING_STRENGTH
+    }
+
+    output_file = 'static/jsons/bipartite_network.json'
+    with report.stage('serialize') as stage:
+        stage.items = write_json_object(output_file, {
+            'nodes': iter_nodes(),
+            'edges': iter_edges(),
+            'statistics': statistics,
+            'metadata': metadata
+        })['edges']
+
+    for key, value in statistics.items():
+        report.count(key, value)
+    report_file = report.write(output_file)
+
+    print(f"\nProcessing complete!")
+    print(f"Output saved to: {output_file}")
+    print(f"Run report saved to: {report_file}")
+    print(f"Left (bestseller) nodes: {len(left)}, right (recommended) nodes: {len(right)}")
+    print(f"Total edges: {statistics['totalEdges']}")
+    print(f"Average strength: {statistics['averageStrength']:.3f}")
+    print(f"Max connections per node: {statistics['maxConnectionsPerNode']}")
+    print(f"Nodes with multiple connections: {statistics['nodesWithMultipleConnections']}")
+
+if __name__ == '__main__':
+    main()
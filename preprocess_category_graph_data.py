@@ -1,103 +1,68 @@
 #!/usr/bin/env python3
 """
 Preprocess category graph data for optimized 3D force graph rendering.
-Takes category_recommendations.json and categories.json and outputs
-a pre-computed graph structure with positions and visual properties.
+Takes recommendations.json and subscriber_counts.json, aggregates them to
+category level and outputs categories.json plus a pre-computed graph
+structure with positions and visual properties. Both JSON files are also
+copied to src/lib/files, which the /graph/cats route imports at build time.
 """
 
 import json
 import math
-from typing import Dict, List, Set
-from urllib.parse import urlparse
+import os
+import shutil
+from typing import Dict, Iterator, List
 
+from category_aggregation import aggregate_categories
+from graph_engine import CSRGraph
+from instrumentation import RunReport
+from json_stream import iter_json_array, iter_json_object_items, write_json_object
 
-def add_node_groups(nodes: List[Dict], links: List[Dict]) -> None:
+# The first path is written, the others are copies of it
+STATS_OUTPUTS = ['static/jsons/categories.json', 'src/lib/files/categories.json']
+GRAPH_OUTPUTS = ['static/jsons/category_graph_data_optimized.json',
+                 'src/lib/files/category_graph_data_optimized.json']
+
+
+def add_node_groups(nodes: List[Dict], graph: CSRGraph) -> None:
     """
     Add group information to nodes for better force-directed layout.
+    Nodes must be in graph ID order (nodes[i] is node i of the graph).
     """
-    # Build adjacency information with weighted connections
-    connections = {node['id']: {'in': 0, 'out': 0, 'in_weight': 0, 'out_weight': 0} for node in nodes}
-    
-    for link in links:
-        weight = link.get('value', 1)
-        if link['source'] in connections:
-            connections[link['source']]['out'] += 1
-            connections[link['source']]['out_weight'] += weight
-        if link['target'] in connections:
-            connections[link['target']]['in'] += 1
-            connections[link['target']]['in_weight'] += weight
+    # Weighted connection totals straight from the CSR arrays
+    in_degrees = graph.in_degrees()
+    out_degrees = graph.out_degrees()
+    in_weights = graph.in_weights()
+    out_weights = graph.out_weights()
     
     # Add connection counts and groups to nodes
-    for node in nodes:
-        node_id = node['id']
-        node['inDegree'] = connections[node_id]['in']
-        node['outDegree'] = connections[node_id]['out']
-        node['inWeight'] = connections[node_id]['in_weight']
-        node['outWeight'] = connections[node_id]['out_weight']
+    for i, node in enumerate(nodes):
+        node['inDegree'] = in_degrees[i]
+        node['outDegree'] = out_degrees[i]
+        node['inWeight'] = in_weights[i]
+        node['outWeight'] = out_weights[i]
         
         # Assign group based on connection patterns
-        total_connections = connections[node_id]['in'] + connections[node_id]['out']
+        total_connections = in_degrees[i] + out_degrees[i]
         if total_connections > 30:
             node['group'] = 'hub-category'
         elif total_connections > 15:
             node['group'] = 'connector-category'
-        elif connections[node_id]['out'] > connections[node_id]['in']:
+        elif out_degrees[i] > in_degrees[i]:
             node['group'] = 'source-category'
-        elif connections[node_id]['in'] > connections[node_id]['out']:
+        elif in_degrees[i] > out_degrees[i]:
             node['group'] = 'target-category'
         else:
             node['group'] = 'balanced-category'
 
-def main():
-    """Main processing function."""
-    
-    # Load input data
-    print("Loading category data files...")
-    
-    try:
-        with open('static/jsons/category_recommendations.json', 'r') as f:
-            category_recommendations_data = json.load(f)
-    except FileNotFoundError:
-        print("Error: category_recommendations.json not found")
-        category_recommendations_data = {}
-    
-    try:
-        with open('static/jsons/categories.json', 'r') as f:
-            categories_data = json.load(f)
-    except FileNotFoundError:
-        print("Error: categories.json not found")
-        categories_data = []
-    
-    # Extract category statistics
-    category_stats = {}
-    for item in categories_data:
-        if item.get('category'):
-            category = item['category']
-            category_stats[category] = {
-                'mean_subscribers': item.get('mean_subscriber_count', 0),
-                'median_subscribers': item.get('median_subscriber_count', 0),
-                'max_subscribers': item.get('max_subscriber_count', 0),
-                'outgoing': item.get('outgoing', 0),
-                'incoming': item.get('incoming', 0)
-            }
-    
-    print(f"Found {len(category_stats)} categories with statistics")
-    
-    # Build node list - just categories
+def build_category_nodes(categories_data: List[Dict]) -> List[Dict]:
+    """Category graph nodes (without groups) from categories.json records, in category ID order."""
     nodes = []
-    all_categories = set(category_stats.keys()) | set(category_recommendations_data.keys())
-    
-    # Also include all categories that are recommended
-    for source_cat, recommendations in category_recommendations_data.items():
-        if isinstance(recommendations, dict):
-            all_categories.update(recommendations.keys())
-    
-    # Add category nodes
-    for category_name in all_categories:
-        stats = category_stats.get(category_name, {})
+    for stats in categories_data:
+        category_name = stats['category']
         
         # Calculate size based on median subscriber count
-        median_subs = stats.get('median_subscribers', 0)
+        median_subs = stats['median_subscriber_count']
         if median_subs > 0:
             size = 5 + math.log10(median_subs + 1) * 2
         else:
@@ -105,7 +70,7 @@ def main():
         size = min(max(size, 5), 30)
         
         # Color based on outgoing connections
-        outgoing = stats.get('outgoing', 0)
+        outgoing = stats['outgoing']
         if outgoing > 500:
             color = '#ff6b35'  # Orange for highly connected
         elif outgoing > 200:
@@ -122,62 +87,95 @@ def main():
             'node_type': 'category',
             'subscriber_count': int(median_subs) if median_subs else 0,
             'outgoing_connections': outgoing,
-            'incoming_connections': stats.get('incoming', 0),
+            'incoming_connections': stats['incoming'],
             'val': size,
             'color': color,
             'label': f"{category_name.replace('-', ' ').title()} ({int(median_subs/1000)}k median subs)" if median_subs > 1000 else category_name.replace('-', ' ').title()
         }
         nodes.append(node)
+    return nodes
+
+def iter_category_links(graph: CSRGraph, node_ids: List[str]) -> Iterator[Dict]:
+    for pos, (source, target) in enumerate(graph.edges()):
+        yield {
+            'source': node_ids[source],
+            'target': node_ids[target],
+            'value': graph.weights[pos]  # Use weight for link strength
+        }
+
+def copy_outputs(outputs: List[str]) -> None:
+    """Copy the first output to the others (static for runtime fetch, src/lib for build-time import)."""
+    for path in outputs[1:]:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copyfile(outputs[0], path)
+
+
+def main():
+    """Main processing function."""
     
-    # Process category-to-category recommendations
-    recommendations_list = []
-    for source_category, recommendations in category_recommendations_data.items():
-        source_id = f"category_{source_category}"
+    # Stream input data and aggregate publication recommendations into
+    # weighted category links and stats
+    print("Loading data files...")
+    report = RunReport('preprocess_category_graph_data')
+    with report.stage('aggregate') as stage:
+        categories, graph, categories_data = aggregate_categories(
+            iter_json_object_items('static/jsons/recommendations.json'),
+            iter_json_array('static/jsons/subscriber_counts.json'))
+        stage.items = sum(graph.weights)
+    
+    print(f"Found {len(categories_data)} categories with statistics")
+    
+    # Save category statistics alongside the graph
+    stats_file = STATS_OUTPUTS[0]
+    with report.stage('serialize_stats') as stage:
+        with open(stats_file, 'w') as f:
+            json.dump(categories_data, f, separators=(',', ':'))
+        copy_outputs(STATS_OUTPUTS)
+        stage.items = len(categories_data)
+    
+    with report.stage('group') as stage:
+        # Build node list - just categories, in category ID order
+        nodes = build_category_nodes(categories_data)
         
-        if isinstance(recommendations, dict):
-            # Recommendations is a dict of category -> weight
-            for target_category, weight in recommendations.items():
-                target_id = f"category_{target_category}"
-                
-                # Only add link if both nodes exist
-                if source_id in [n['id'] for n in nodes] and target_id in [n['id'] for n in nodes]:
-                    recommendations_list.append({
-                        'source': source_id,
-                        'target': target_id,
-                        'value': weight  # Use weight for link strength
-                    })
-    
-    print(f"Processing {len(nodes)} category nodes and {len(recommendations_list)} links")
-    
-    # Sort nodes for consistent ordering
-    nodes.sort(key=lambda x: (-x.get('subscriber_count', 0), x['name']))
+        print(f"Processing {len(nodes)} category nodes and {graph.num_edges} links")
+        
+        # Add group information for better clustering
+        print("Adding group information for clustering...")
+        add_node_groups(nodes, graph)
+        
+        # Sort nodes for consistent ordering
+        nodes.sort(key=lambda x: (-x.get('subscriber_count', 0), x['name']))
+        stage.items = len(nodes)
     
-    # Add group information for better clustering
-    print("Adding group information for clustering...")
-    add_node_groups(nodes, recommendations_list)
+    node_ids = [f"category_{category_name}" for category_name in categories.keys]
     
-    # Create final graph structure
-    graph_data = {
-        'nodes': nodes,
-        'links': recommendations_list,
-        'metadata': {
-            'total_nodes': len(nodes),
-            'total_links': len(recommendations_list),
-            'categories_count': len(all_categories),
-            'total_recommendations': sum(len(r) for r in category_recommendations_data.values() if isinstance(r, dict))
-        }
+    metadata = {
+        'total_nodes': len(nodes),
+        'total_links': graph.num_edges,
+        'categories_count': len(categories),
+        'total_recommendations': sum(graph.weights)
     }
     
-    # Save processed data
-    output_file = 'static/jsons/category_graph_data_optimized.json'
-    with open(output_file, 'w') as f:
-        json.dump(graph_data, f, indent=2)
+    # Stream the final graph structure to disk
+    output_file = GRAPH_OUTPUTS[0]
+    with report.stage('serialize') as stage:
+        stage.items = write_json_object(output_file, {
+            'nodes': nodes,
+            'links': iter_category_links(graph, node_ids),
+            'metadata': metadata
+        })['links']
+        copy_outputs(GRAPH_OUTPUTS)
+    
+    for key, value in metadata.items():
+        report.count(key, value)
+    report_file = report.write(output_file)
     
     print(f"\nProcessing complete!")
-    print(f"Output saved to: {output_file}")
-    print(f"Total category nodes: {graph_data['metadata']['total_nodes']}")
-    print(f"Total recommendation links: {graph_data['metadata']['total_links']}")
-    print(f"Total recommendations across all categories: {graph_data['metadata']['total_recommendations']}")
+    print(f"Output saved to: {output_file} and {stats_file}")
+    print(f"Run report saved to: {report_file}")
+    print(f"Total category nodes: {metadata['total_nodes']}")
+    print(f"Total recommendation links: {metadata['total_links']}")
+    print(f"Total recommendations across all categories: {metadata['total_recommendations']}")
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
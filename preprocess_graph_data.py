@@ -1,16 +1,45 @@
 #!/usr/bin/env python3
 """
 Preprocess graph data for optimized 3D force graph rendering.
-Takes recommendations.json and subscriber_counts.json and outputs
-a pre-computed graph structure with positions and visual properties.
+Takes recommendations.json and subscriber_counts.json, parsed once into the
+graph snapshot (graph_snapshot.py), and outputs a pre-computed graph structure with positions and visual properties.
 """
 
-import json
+import glob
 import math
-import random
-from typing import Dict, List, Set, Tuple
+import os
+from array import array
+from typing import Callable, Dict, Iterator, List, Tuple
 from urllib.parse import urlparse
 
+from ego_networks import write_ego_shards
+from graph_analytics import hits, label_propagation, pagerank
+from graph_coarsening import cluster_graph, coarsen_communities
+from graph_columnar import ColumnarGraphWriter
+from graph_engine import CSRGraph
+from graph_layout import force_layout
+from graph_snapshot import open_snapshot
+from instrumentation import RunReport
+from json_stream import write_json_object
+
+# Fixed seed so the offline layout is reproducible between runs
+LAYOUT_SEED = 42
+
+# Share of nodes by PageRank that count as highly recommended
+INFLUENTIAL_SHARE = 0.01
+
+# Level-of-detail output: top-level cluster graph plus one shard per cluster.
+# Communities below MIN_CLUSTER_SIZE fold into the cluster they link to most.
+LOD_DIRECTORY = 'static/jsons/graph_data_lod'
+MIN_CLUSTER_SIZE = 50
+MAX_MISC_CLUSTER_NODES = 1500
+
+# Per-publication ego networks for drill-down, hash-bucketed into shards
+EGO_DIRECTORY = 'static/jsons/graph_data_ego'
+EGO_TOP_K = 10
+EGO_TWO_HOP_K = 25
+EGO_NODES_PER_SHARD = 32
+
 def extract_publication_name(url: str) -> str:
     """Extract a readable name from publication URL."""
     try:
@@ -63,127 +92,341 @@ def get_node_color(subscriber_count: int, is_bestseller: bool) -> str:
     else:
         return '#96ceb4'  # Light green
 
-def add_node_groups(nodes: List[Dict], links: List[Dict]) -> None:
+def compute_node_roles(is_bestseller: bytearray, in_degrees: array, ranks: array) -> List[str]:
     """
-    Add group information to nodes for better force-directed layout.
-    Don't set initial positions - let the force simulation handle it.
+    Compute the role of every node (in graph ID order). Highly recommended
+    means the top INFLUENTIAL_SHARE of nodes by PageRank rather than a fixed
+    in-degree threshold.
     """
-    # Build adjacency information
-    connections = {node['id']: {'in': 0, 'out': 0} for node in nodes}
-    
-    for link in links:
-        if link['source'] in connections:
-            connections[link['source']]['out'] += 1
-        if link['target'] in connections:
-            connections[link['target']]['in'] += 1
-    
-    # Add connection counts and groups to nodes
-    for node in nodes:
-        node_id = node['id']
-        node['inDegree'] = connections[node_id]['in']
-        node['outDegree'] = connections[node_id]['out']
-        
-        # Assign group based on node characteristics
-        if node['is_bestseller']:
-            if connections[node_id]['in'] > 0:
-                node['group'] = 'dual-role'  # Both bestseller and recommended
+    top = max(1, int(len(ranks) * INFLUENTIAL_SHARE))
+    cutoff = sorted(ranks, reverse=True)[top - 1] if len(ranks) else 0.0
+    roles = []
+    for bestseller, in_degree, rank in zip(is_bestseller, in_degrees, ranks):
+        if bestseller:
+            if in_degree > 0:
+                roles.append('dual-role')  # Both bestseller and recommended
             else:
-                node['group'] = 'bestseller'
-        elif connections[node_id]['in'] > 10:
-            node['group'] = 'highly-recommended'
-        elif connections[node_id]['in'] > 0:
-            node['group'] = 'recommended'
+                roles.append('bestseller')
+        elif in_degree > 0 and rank >= cutoff:
+            roles.append('highly-recommended')
+        elif in_degree > 0:
+            roles.append('recommended')
         else:
-            node['group'] = 'other'
+            roles.append('other')
+    return roles
+
+def compute_node_groups(clusters: array) -> List[str]:
+    """
+    Compute the group of every node (in graph ID order) from its
+    level-of-detail cluster, so nodes that recommend each other share a group.
+    Most communities are too small to be a group of their own; clusters fold
+    them into the large community they link to most. Groups are named like
+    the cluster stand-ins in graphLod.ts.
+    """
+    return [f"cluster-{cluster}" for cluster in clusters]
+
+def compute_node_positions(graph: CSRGraph, clusters: array) -> Tuple[List[array], List[array]]:
+    """
+    Compute offline layout positions for every node (in graph ID order):
+    3D coordinates for the 3D views and 2D coordinates for the 2D map.
+    The level-of-detail clusters seed the multilevel layout of large graphs.
+    """
+    positions_3d = force_layout(graph, dimensions=3, seed=LAYOUT_SEED, clusters=clusters)
+    positions_2d = force_layout(graph, dimensions=2, seed=LAYOUT_SEED, clusters=clusters)
+    return positions_3d, positions_2d
+
+def write_columnar_graph(path: str, graph: CSRGraph, order: List[int], urls: List[str], names: List[str],
+                         subscriber_counts: array, is_bestseller: bytearray, groups: List[str],
+                         roles: List[str], communities: array, ranks: array, hubs: array, authorities: array,
+                         positions_3d: List[array], positions_2d: List[array], metadata: Dict) -> int:
+    """
+    Write the graph in the columnar binary format, nodes in output order.
+    Labels are not stored; the client derives them from name and subscriber_count.
+    """
+    writer = ColumnarGraphWriter(graph.num_nodes)
+    writer.add_strings('id', (urls[i] for i in order))
+    writer.add_strings('name', (names[i] for i in order))
+    writer.add_categorical('category', (categorize_publication(urls[i]) for i in order))
+    writer.add_column('subscriber_count', 'uint32', (subscriber_counts[i] for i in order))
+    writer.add_column('is_bestseller', 'uint8', (is_bestseller[i] for i in order))
+    writer.add_column('val', 'float32',
+                      (calculate_node_size(subscriber_counts[i], bool(is_bestseller[i])) for i in order))
+    writer.add_categorical('color',
+                           (get_node_color(subscriber_counts[i], bool(is_bestseller[i])) for i in order))
+    
+    in_degrees = graph.in_degrees()
+    out_degrees = graph.out_degrees()
+    writer.add_column('inDegree', 'int32', (in_degrees[i] for i in order))
+    writer.add_column('outDegree', 'int32', (out_degrees[i] for i in order))
+    writer.add_categorical('group', (groups[i] for i in order))
+    writer.add_categorical('role', (roles[i] for i in order))
+    writer.add_column('community', 'int32', (communities[i] for i in order))
+    writer.add_column('pagerank', 'float32', (ranks[i] for i in order))
+    writer.add_column('hub', 'float32', (hubs[i] for i in order))
+    writer.add_column('authority', 'float32', (authorities[i] for i in order))
+    
+    for name, coords in zip(('x', 'y', 'z'), positions_3d):
+        writer.add_column(name, 'float32', (coords[i] for i in order))
+    for name, coords in zip(('x2d', 'y2d'), positions_2d):
+        writer.add_column(name, 'float32', (coords[i] for i in order))
+    
+    # Edges reference nodes by their position in the output order
+    rank = array('I', [0]) * graph.num_nodes
+    for position, node in enumerate(order):
+        rank[node] = position
+    writer.set_edges((rank[s] for s in graph.edge_sources()), (rank[t] for t in graph.targets))
+    
+    return writer.write(path, metadata)
+
+def write_level_of_detail(directory: str, graph: CSRGraph, order: List[int], clusters: array,
+                          num_clusters: int, node_record: Callable[[int], Dict], urls: List[str],
+                          names: List[str], subscriber_counts: array, is_bestseller: bytearray,
+                          positions_3d: List[array], positions_2d: List[array], metadata: Dict) -> int:
+    """
+    Write the level-of-detail hierarchy: index.json holds the aggregated
+    cluster graph (sizes, subscriber sums, 2D extents, inter-cluster edge
+    weights) and the shard manifest; cluster-NNNN.json holds the full nodes of one
+    cluster, its internal links and the links crossing its boundary.
+    Returns the size of index.json in bytes.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for stale in glob.glob(os.path.join(directory, 'cluster-*.json')):
+        os.remove(stale)
+    
+    # Members in output order, so the first member is the cluster's largest publication
+    members: List[List[int]] = [[] for _ in range(num_clusters)]
+    for node in order:
+        members[clusters[node]].append(node)
+    
+    # Every edge goes to the shard of its source and, if different, of its target
+    shard_edges: List[List[Tuple[int, int]]] = [[] for _ in range(num_clusters)]
+    for source, target in graph.edges():
+        shard_edges[clusters[source]].append((source, target))
+        if clusters[target] != clusters[source]:
+            shard_edges[clusters[target]].append((source, target))
+    
+    coarse, internal_links = cluster_graph(graph, clusters, num_clusters)
+    
+    cluster_entries = []
+    for cluster in range(num_clusters):
+        nodes = members[cluster]
+        shard = f"cluster-{cluster:04d}.json"
+        
+        def iter_internal(edges=shard_edges[cluster], cluster=cluster) -> Iterator[Dict]:
+            for source, target in edges:
+                if clusters[source] == cluster and clusters[target] == cluster:
+                    yield {'source': urls[source], 'target': urls[target]}
+        
+        def iter_boundary(edges=shard_edges[cluster], cluster=cluster) -> Iterator[Dict]:
+            for source, target in edges:
+                other = clusters[target] if clusters[source] == cluster else clusters[source]
+                if other != cluster:
+                    yield {'source': urls[source], 'target': urls[target], 'cluster': other}
+        
+        write_json_object(os.path.join(directory, shard), {
+            'cluster': cluster,
+            'nodes': (node_record(i) for i in nodes),
+            'links': iter_internal(),
+            'boundary_links': iter_boundary()
+        })
+        
+        size = len(nodes)
+        centroid = [round(sum(coords[i] for i in nodes) / size, 2) for coords in positions_3d + positions_2d]
+        xs, ys = ([coords[i] for i in nodes] for coords in positions_2d)
+        cluster_entries.append({
+            'id': cluster,
+            'label': names[nodes[0]],
+            'top_node': urls[nodes[0]],
+            'size': size,
+            'subscriber_count': sum(subscriber_counts[i] for i in nodes),
+            'bestsellers_count': sum(is_bestseller[i] for i in nodes),
+            'internal_links': internal_links[cluster],
+            'x': centroid[0], 'y': centroid[1], 'z': centroid[2],
+            'x2d': centroid[3], 'y2d': centroid[4],
+            # 2D bounding box [min_x, min_y, max_x, max_y], so the client fetches only clusters in view
+            'extent2d': [round(min(xs), 2), round(min(ys), 2), round(max(xs), 2), round(max(ys), 2)],
+            'shard': shard,
+            'shard_bytes': os.path.getsize(os.path.join(directory, shard))
+        })
+    
+    def iter_cluster_links() -> Iterator[Dict]:
+        for (source, target), weight in zip(coarse.edges(), coarse.weights):
+            yield {'source': source, 'target': target, 'value': weight}
+    
+    index_file = os.path.join(directory, 'index.json')
+    write_json_object(index_file, {
+        'clusters': cluster_entries,
+        'links': iter_cluster_links(),
+        'metadata': {**metadata, 'total_clusters': num_clusters, 'cluster_links': coarse.num_edges}
+    })
+    return os.path.getsize(index_file)
 
 def main():
     """Main processing function."""
     
-    # Load input data
-    print("Loading data files...")
-    with open('static/jsons/recommendations.json', 'r') as f:
-        recommendations_data = json.load(f)
-    
-    with open('static/jsons/subscriber_counts.json', 'r') as f:
-        subscriber_counts_data = json.load(f)
-    
-    # Extract recommendation data
-    recommendation_dict = recommendations_data[0]
-    
-    # Create subscriber count mapping
-    subscriber_map = {}
-    for item in subscriber_counts_data:
-        if item.get('publication_url') and item.get('subscriber_count'):
-            subscriber_map[item['publication_url']] = item['subscriber_count']
-    
-    print(f"Found subscriber data for {len(subscriber_map)} publications")
-    
-    # Build node list
-    all_publications = set()
-    recommendations_list = []
-    
-    # Process recommendations
-    for recommender_url, recommended_urls in recommendation_dict.items():
-        all_publications.add(recommender_url)
-        for recommended_url in recommended_urls:
-            all_publications.add(recommended_url)
-            recommendations_list.append({
-                'source': recommender_url,
-                'target': recommended_url
-            })
-    
-    print(f"Processing {len(all_publications)} nodes and {len(recommendations_list)} links")
-    
-    # Create nodes with pre-computed properties
-    nodes = []
-    for url in all_publications:
-        is_bestseller = url in recommendation_dict
-        subscriber_count = subscriber_map.get(url, 0)
-        
-        node = {
+    report = RunReport('preprocess_graph_data')
+    
+    # The parsed graph (canonical URLs, CSR adjacency, subscriber counts) from the
+    # graph snapshot, rebuilt from the data files only when they changed
+    print("Loading graph snapshot...")
+    with report.stage('load') as stage:
+        with open_snapshot() as snapshot:
+            interner, graph, recommenders = snapshot.recommendation_graph()
+            # Unknown counts are stored as -1
+            subscriber_counts = array('q', (max(count, 0) for count in snapshot.node_subscribers))
+            known_counts = sum(1 for count in snapshot.publication_subscribers if count > 0)
+        stage.items = graph.num_edges
+    
+    print(f"Found subscriber data for {known_counts} publications")
+    print(f"Processing {graph.num_nodes} nodes and {graph.num_edges} links")
+    
+    with report.stage('columns') as stage:
+        # Per-node columns in graph ID order instead of one dict per node
+        urls = interner.keys
+        is_bestseller = bytearray(graph.num_nodes)
+        for node in recommenders:
+            is_bestseller[node] = 1
+        names = [extract_publication_name(url) for url in urls]
+        stage.items = graph.num_nodes
+    
+    # Influence scores and communities over the sparse recommendation adjacency
+    print("Running graph analytics (PageRank, HITS, label propagation)...")
+    with report.stage('analytics') as stage:
+        in_degrees = graph.in_degrees()
+        out_degrees = graph.out_degrees()
+        ranks = pagerank(graph)
+        hubs, authorities = hits(graph)
+        communities = label_propagation(graph, seed=LAYOUT_SEED)
+        stage.items = graph.num_edges
+    
+    # Communities collapsed into clusters: the node groups, the coarse level of the
+    # layout and the level-of-detail shards
+    print("Coarsening communities into clusters...")
+    with report.stage('coarsen') as stage:
+        clusters, num_clusters = coarsen_communities(graph, communities, min_cluster_size=MIN_CLUSTER_SIZE,
+                                                     max_misc_nodes=MAX_MISC_CLUSTER_NODES)
+        stage.items = num_clusters
+    
+    # Add group information for better clustering
+    print("Adding group information for clustering...")
+    with report.stage('group') as stage:
+        groups = compute_node_groups(clusters)
+        roles = compute_node_roles(is_bestseller, in_degrees, ranks)
+        stage.items = graph.num_nodes
+    
+    # Pre-compute converged positions so the client can render without a warm-up simulation
+    print("Computing force-directed layout (3D and 2D)...")
+    with report.stage('layout') as stage:
+        positions_3d, positions_2d = compute_node_positions(graph, clusters)
+        stage.items = graph.num_nodes
+    
+    # Sort nodes for consistent ordering
+    order = sorted(range(graph.num_nodes), key=lambda i: (-subscriber_counts[i], names[i]))
+    
+    def node_record(i: int) -> Dict:
+        """Create one node with pre-computed properties."""
+        url = urls[i]
+        bestseller = bool(is_bestseller[i])
+        subscriber_count = subscriber_counts[i]
+        return {
             'id': url,
-            'name': extract_publication_name(url),
+            'name': names[i],
             'category': categorize_publication(url),
             'subscriber_count': subscriber_count,
-            'is_bestseller': is_bestseller,
+            'is_bestseller': bestseller,
             # Pre-computed visual properties
-            'val': calculate_node_size(subscriber_count, is_bestseller),
-            'color': get_node_color(subscriber_count, is_bestseller),
+            'val': calculate_node_size(subscriber_count, bestseller),
+            'color': get_node_color(subscriber_count, bestseller),
             # Pre-computed label
-            'label': f"{extract_publication_name(url)} ({subscriber_count:,} subs)" if subscriber_count > 0 else extract_publication_name(url)
+            'label': f"{names[i]} ({subscriber_count:,} subs)" if subscriber_count > 0 else names[i],
+            'inDegree': in_degrees[i],
+            'outDegree': out_degrees[i],
+            'group': groups[i],
+            'role': roles[i],
+            'community': communities[i],
+            'pagerank': float(f"{ranks[i]:.4g}"),
+            'hub': float(f"{hubs[i]:.4g}"),
+            'authority': float(f"{authorities[i]:.4g}"),
+            'x': round(positions_3d[0][i], 2),
+            'y': round(positions_3d[1][i], 2),
+            'z': round(positions_3d[2][i], 2),
+            'x2d': round(positions_2d[0][i], 2),
+            'y2d': round(positions_2d[1][i], 2)
         }
-        nodes.append(node)
     
-    # Sort nodes for consistent ordering
-    nodes.sort(key=lambda x: (-x['subscriber_count'], x['name']))
+    def iter_nodes() -> Iterator[Dict]:
+        """Create nodes one at a time, in output order."""
+        for i in order:
+            yield node_record(i)
     
-    # Add group information for better clustering
-    print("Adding group information for clustering...")
-    add_node_groups(nodes, recommendations_list)
-    
-    # Create final graph structure
-    graph_data = {
-        'nodes': nodes,
-        'links': recommendations_list,
-        'metadata': {
-            'total_nodes': len(nodes),
-            'total_links': len(recommendations_list),
-            'bestsellers_count': sum(1 for n in nodes if n['is_bestseller']),
-            'nodes_with_subscribers': sum(1 for n in nodes if n['subscriber_count'] > 0)
-        }
+    def iter_links() -> Iterator[Dict]:
+        """Expand CSR edges back into URL links for the client."""
+        for source, target in graph.edges():
+            yield {'source': urls[source], 'target': urls[target]}
+    
+    metadata = {
+        'total_nodes': graph.num_nodes,
+        'total_links': graph.num_edges,
+        'bestsellers_count': sum(is_bestseller),
+        'nodes_with_subscribers': sum(1 for count in subscriber_counts if count > 0),
+        'communities': max(communities) + 1 if graph.num_nodes else 0,
+        'groups': num_clusters,
+        'layout_seed': LAYOUT_SEED
     }
     
-    # Save processed data
+    # Stream the final graph structure to disk
     output_file = 'static/jsons/graph_data_optimized.json'
-    with open(output_file, 'w') as f:
-        json.dump(graph_data, f, indent=2)
+    with report.stage('serialize') as stage:
+        stage.items = write_json_object(output_file, {
+            'nodes': iter_nodes(),
+            'links': iter_links(),
+            'metadata': metadata
+        })['nodes']
+    
+    # Columnar binary sibling: typed arrays the client can wrap without parsing JSON
+    columnar_file = 'static/jsons/graph_data_optimized.bin'
+    with report.stage('serialize_columnar') as stage:
+        columnar_size = write_columnar_graph(columnar_file, graph, order, urls, names, subscriber_counts,
+                                             is_bestseller, groups, roles, communities, ranks, hubs, authorities,
+                                             positions_3d, positions_2d, metadata)
+        stage.items = graph.num_nodes
+    
+    # Level-of-detail hierarchy: a few KB cluster overview plus per-cluster shards fetched on demand
+    print("Writing level-of-detail shards...")
+    with report.stage('serialize_lod') as stage:
+        lod_index_size = write_level_of_detail(LOD_DIRECTORY, graph, order, clusters, num_clusters, node_record,
+                                               urls, names, subscriber_counts, is_bestseller,
+                                               positions_3d, positions_2d, metadata)
+        stage.items = num_clusters
+    
+    # Ego networks: one small shard fetch per clicked publication
+    print("Writing per-publication ego network shards...")
+    with report.stage('serialize_ego') as stage:
+        ego_index = write_ego_shards(
+            EGO_DIRECTORY, graph, urls, ranks,
+            lambda i: {'id': urls[i], 'name': names[i], 'subscriber_count': subscriber_counts[i]},
+            top_k=EGO_TOP_K, two_hop_k=EGO_TWO_HOP_K, similar_k=EGO_TOP_K,
+            target_nodes_per_shard=EGO_NODES_PER_SHARD)
+        stage.items = graph.num_nodes
+    
+    for key, value in metadata.items():
+        report.count(key, value)
+    report.count('lod_clusters', num_clusters)
+    report.count('ego_shards', ego_index['buckets'])
+    report_file = report.write(output_file)
     
     print(f"\nProcessing complete!")
     print(f"Output saved to: {output_file}")
-    print(f"Total nodes: {graph_data['metadata']['total_nodes']}")
-    print(f"Total links: {graph_data['metadata']['total_links']}")
-    print(f"Bestsellers: {graph_data['metadata']['bestsellers_count']}")
-    print(f"Nodes with subscriber data: {graph_data['metadata']['nodes_with_subscribers']}")
+    print(f"Run report saved to: {report_file}")
+    print(f"Columnar output saved to: {columnar_file} ({columnar_size / 1024:.0f} KB)")
+    print(f"Level-of-detail index saved to: {LOD_DIRECTORY}/index.json "
+          f"({num_clusters} clusters, {lod_index_size / 1024:.0f} KB)")
+    print(f"Ego network shards saved to: {EGO_DIRECTORY} ({ego_index['buckets']} shards)")
+    print(f"Total nodes: {metadata['total_nodes']}")
+    print(f"Total links: {metadata['total_links']}")
+    print(f"Bestsellers: {metadata['bestsellers_count']}")
+    print(f"Nodes with subscriber data: {metadata['nodes_with_subscribers']}")
+    print(f"Communities: {metadata['communities']} ({metadata['groups']} cluster groups)")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -1,182 +1,165 @@
 #!/usr/bin/env python3
 """
 Preprocess recommendation counts for each publication.
-Takes recommendations.json and subscriber_counts.json and outputs
-a mapping of publication URLs to their incoming/outgoing recommendation counts.
+Takes recommendations.json and subscriber_counts.json (the graph through the
+graph snapshot, graph_snapshot.py) and outputs
+a mapping of publication URLs to their incoming/outgoing recommendation counts,
+plus publications_merged.json (publications joined with their counts).
 """
 
-import json
-from typing import Dict, Set
+from typing import Dict, Iterable, Iterator, List
 from collections import defaultdict
 
-def normalize_url(url: str) -> str:
-    """Normalize URL by ensuring it has https:// protocol."""
-    if url.startswith('http://') or url.startswith('https://'):
-        return url
-    else:
-        return f'https://{url}'
+from graph_snapshot import open_snapshot
+from instrumentation import RunReport
+from json_stream import iter_json_array, write_json_array
+from publication_resolver import PublicationResolver
+from publications_merge import MERGED_OUTPUTS, PublicationTable, write_merged_publications
 
-def extract_publication_identifier(url: str) -> str:
-    """Extract the key identifier from a publication URL.
-    
-    Examples:
-    - https://lenny.substack.com -> lenny
-    - https://lenny.com -> lenny  
-    - https://www.lennysnewsletter.com -> lennysnewsletter
-    - https://yourlocalepidemiologist.substack.com -> yourlocalepidemiologist
-    - https://fixthenews.com -> fixthenews
-    """
-    # Remove protocol
-    url = url.replace('https://', '').replace('http://', '')
-    
-    # Split by dots to get domain parts
-    parts = url.split('.')
-    
-    if len(parts) >= 2:
-        # If it's a substack.com subdomain, return the subdomain
-        if len(parts) >= 3 and parts[-2] == 'substack' and parts[-1] == 'com':
-            return parts[0]  # e.g., "lenny" from "lenny.substack.com"
-        else:
-            # For custom domains, handle www prefix and extract main domain name
-            if parts[0] == 'www' and len(parts) >= 3:
-                # e.g., "lennysnewsletter" from "www.lennysnewsletter.com"
-                return parts[1]
-            else:
-                # e.g., "lenny" from "lenny.com" or "fixthenews" from "fixthenews.com"
-                return parts[0]
-    
-    # Fallback: return the whole thing if we can't parse it
-    return url
+def rank_publications(publications: Iterable[str], incoming_counts: Dict[str, int],
+                      outgoing_counts: Dict[str, int]) -> List[str]:
+    """Publications sorted by total recommendations (descending), ties in input order."""
+    return sorted(publications, key=lambda url: incoming_counts.get(url, 0) + outgoing_counts.get(url, 0),
+                  reverse=True)
+
+def iter_recommendation_counts(ranked_publications: Iterable[str], incoming_counts: Dict[str, int],
+                               outgoing_counts: Dict[str, int]) -> Iterator[Dict]:
+    """Create the final record for each publication as it is written."""
+    for pub_url in ranked_publications:
+        incoming = incoming_counts.get(pub_url, 0)
+        outgoing = outgoing_counts.get(pub_url, 0)
+        yield {
+            'publication_url': pub_url,
+            'incoming_recommendations': incoming,
+            'outgoing_recommendations': outgoing,
+            'total_recommendations': incoming + outgoing
+        }
 
 def main():
     """Main processing function."""
     
-    # Load input data
-    print("Loading data files...")
-    with open('static/jsons/recommendations.json', 'r') as f:
-        recommendations_data = json.load(f)
-    
-    with open('static/jsons/subscriber_counts.json', 'r') as f:
-        subscriber_counts_data = json.load(f)
-    
-    # Extract recommendation data
-    recommendation_dict = recommendations_data[0]
+    report = RunReport('preprocess_recommendation_counts')
     
-    # Create a mapping of identifiers to URLs from subscriber_counts.json
-    known_publications = set()
-    identifier_to_url = {}
-    url_to_identifier = {}
+    # Stream input data record by record
+    print("Loading data files...")
     
-    for item in subscriber_counts_data:
-        if item.get('publication_url'):
-            url = item['publication_url']
-            identifier = extract_publication_identifier(url)
-            known_publications.add(url)
-            identifier_to_url[identifier] = url
-            url_to_identifier[url] = identifier
+    # The alias index of known publications (in input order, for a deterministic
+    # output) and the CSR recommendation graph over canonical URLs, from the graph snapshot
+    with report.stage('load') as stage:
+        with open_snapshot() as snapshot:
+            resolver = snapshot.resolver()
+            interner, graph, recommenders = snapshot.recommendation_graph()
+        known_publications = resolver.urls
+        stage.items = len(known_publications)
     
     print(f"Found {len(known_publications)} publications in subscriber_counts.json")
     
+    # The projected rows for publications_merged.json
+    with report.stage('project') as stage:
+        publications = PublicationTable()
+        publications.load(iter_json_array('static/jsons/subscriber_counts.json'))
+        stage.items = len(publications.rows)
+    
+    with report.stage('resolve') as stage:
+        # Match each node to its known publication once (memoized), instead of once per occurrence
+        matched_urls = [resolver.resolve(url) for url in interner.keys]
+        stage.items = graph.num_edges
+    
+    print(f"Found {len(recommenders)} recommenders in recommendations.json")
+    
+    # Diagnostics over every URL, only on request (PREPROCESS_VERBOSITY >= 1)
+    if report.debug():
+        # Check URL format differences
+        sample_recommendation_urls = [interner.keys[node] for node in recommenders[:3]]
+        sample_subscriber_urls = known_publications[:3]
+        print(f"\nSample recommendation URLs: {sample_recommendation_urls}")
+        print(f"Sample subscriber URLs: {sample_subscriber_urls}")
+        
+        # Check how many recommenders and recommended publications resolve to known publications
+        recommended_nodes = set(graph.targets)
+        print(f"\nURL resolution analysis:")
+        print(f"Recommenders in subscriber_counts: {sum(1 for node in recommenders if matched_urls[node])}")
+        print(f"Recommended publications in subscriber_counts: {sum(1 for node in recommended_nodes if matched_urls[node])}")
+        # The snapshot keeps no alias conflicts, so index the publications again for them
+        conflicts = PublicationResolver(iter_json_array('static/jsons/subscriber_counts.json')).conflicts
+        print(f"Aliases claimed by more than one publication: {len(conflicts)}")
+        for alias, owners in list(conflicts.items())[:3]:
+            print(f"  {alias} -> {owners[0]} (also {', '.join(owners[1:])})")
+    
+    total_edges = graph.num_edges
+    
     # Count incoming and outgoing recommendations for each publication
     incoming_counts = defaultdict(int)
     outgoing_counts = defaultdict(int)
     
-    # Debug: Check the structure of recommendations data
-    print(f"Found {len(recommendation_dict)} recommenders in recommendations.json")
-    
-    # Debug: Check URL format differences
-    sample_recommendation_urls = list(recommendation_dict.keys())[:3]
-    sample_subscriber_urls = list(known_publications)[:3]
-    print(f"\nSample recommendation URLs: {sample_recommendation_urls}")
-    print(f"Sample subscriber URLs: {sample_subscriber_urls}")
-    
-    # Check for identifier overlap (using our new matching logic)
-    recommender_identifiers = set(extract_publication_identifier(url) for url in recommendation_dict.keys())
-    all_recommended_identifiers = set()
-    for recommended_urls in recommendation_dict.values():
-        all_recommended_identifiers.update(extract_publication_identifier(url) for url in recommended_urls)
-    
-    known_identifiers = set(identifier_to_url.keys())
-    
-    print(f"\nIdentifier overlap analysis:")
-    print(f"Recommender identifiers in subscriber_counts: {len(recommender_identifiers & known_identifiers)}")
-    print(f"Recommended identifiers in subscriber_counts: {len(all_recommended_identifiers & known_identifiers)}")
-    
-    # Debug: Check some specific examples of overlap
-    overlap_recommended = all_recommended_identifiers & known_identifiers
-    if overlap_recommended:
-        print(f"Some overlapping recommended identifiers: {list(overlap_recommended)[:5]}")
-        # Show the URL mappings for these
-        for identifier in list(overlap_recommended)[:3]:
-            print(f"  {identifier} -> {identifier_to_url[identifier]}")
-    else:
-        print("No overlapping recommended identifiers found!")
-        print(f"First 5 recommended identifiers: {list(all_recommended_identifiers)[:5]}")
-        print(f"First 5 subscriber identifiers: {list(known_identifiers)[:5]}")
-    
-    # Process recommendations - count ALL incoming recommendations to our known publications
-    total_recommendations = 0
-    for recommender_url, recommended_urls in recommendation_dict.items():
-        total_recommendations += len(recommended_urls)
-        
-        # Extract recommender identifier and find matching URL in our known publications
-        recommender_identifier = extract_publication_identifier(recommender_url)
+    with report.stage('count') as stage:
+        out_degrees = graph.out_degrees()
         
         # Count outgoing recommendations (only if recommender is in our known publications)
-        if recommender_identifier in identifier_to_url:
-            matched_recommender_url = identifier_to_url[recommender_identifier]
-            outgoing_counts[matched_recommender_url] = len(recommended_urls)
+        for node in recommenders:
+            matched_recommender_url = matched_urls[node]
+            if matched_recommender_url is not None:
+                outgoing_counts[matched_recommender_url] = out_degrees[node]
         
         # Count incoming recommendations for ALL recommended publications that are in our known set
-        # This counts every time a known publication is recommended, regardless of who recommends it
-        for recommended_url in recommended_urls:
-            recommended_identifier = extract_publication_identifier(recommended_url)
-            if recommended_identifier in identifier_to_url:
-                matched_recommended_url = identifier_to_url[recommended_identifier]
-                incoming_counts[matched_recommended_url] += 1
-    
-    print(f"\nTotal recommendation relationships: {total_recommendations}")
+        # Every edge into a URL counts, so fold the per-URL in-degree into its matched publication
+        for node, in_degree in enumerate(graph.in_degrees()):
+            matched_recommended_url = matched_urls[node]
+            if in_degree and matched_recommended_url is not None:
+                incoming_counts[matched_recommended_url] += in_degree
+        stage.items = graph.num_nodes
+    
+    print(f"\nTotal recommendation relationships: {total_edges}")
     print(f"Publications with outgoing recommendations: {len(outgoing_counts)}")
     print(f"Publications with incoming recommendations: {len(incoming_counts)}")
     
-    # Debug: Show a few examples
-    if incoming_counts:
+    if not incoming_counts:
+        print("\nNo incoming recommendations found - likely URL format mismatch!")
+    elif report.debug():
         print(f"\nTop 5 publications by incoming recommendations:")
         top_incoming = sorted(incoming_counts.items(), key=lambda x: x[1], reverse=True)[:5]
         for url, count in top_incoming:
             print(f"  {count}: {url}")
-    else:
-        print("\nNo incoming recommendations found - likely URL format mismatch!")
     
-    # Create final mapping for all publications
-    recommendation_counts = {}
-    for pub_url in known_publications:
-        recommendation_counts[pub_url] = {
-            'publication_url': pub_url,
-            'incoming_recommendations': incoming_counts.get(pub_url, 0),
-            'outgoing_recommendations': outgoing_counts.get(pub_url, 0),
-            'total_recommendations': incoming_counts.get(pub_url, 0) + outgoing_counts.get(pub_url, 0)
-        }
+    # Sort all publications by total recommendations (descending)
+    def total_recommendations(pub_url: str) -> int:
+        return incoming_counts.get(pub_url, 0) + outgoing_counts.get(pub_url, 0)
     
-    # Convert to list and sort by total recommendations (descending)
-    recommendation_list = list(recommendation_counts.values())
-    recommendation_list.sort(key=lambda x: x['total_recommendations'], reverse=True)
+    with report.stage('group') as stage:
+        ranked_publications = rank_publications(known_publications, incoming_counts, outgoing_counts)
+        stage.items = len(ranked_publications)
     
-    # Save processed data
+    # Stream processed data to disk
     output_file = 'static/jsons/recommendation_counts.json'
-    with open(output_file, 'w') as f:
-        json.dump(recommendation_list, f, indent=2)
+    with report.stage('serialize') as stage:
+        with open(output_file, 'w') as f:
+            stage.items = write_json_array(f, iter_recommendation_counts(ranked_publications, incoming_counts, outgoing_counts))
+    
+    # Join the counts straight into the merged publications, without reparsing the file above
+    with report.stage('merge') as stage:
+        stage.items = write_merged_publications(publications, incoming_counts, outgoing_counts)
     
     # Calculate stats
-    total_with_incoming = sum(1 for item in recommendation_list if item['incoming_recommendations'] > 0)
-    total_with_outgoing = sum(1 for item in recommendation_list if item['outgoing_recommendations'] > 0)
-    total_with_any = sum(1 for item in recommendation_list if item['total_recommendations'] > 0)
-    max_incoming = max(item['incoming_recommendations'] for item in recommendation_list)
-    max_outgoing = max(item['outgoing_recommendations'] for item in recommendation_list)
+    total_with_incoming = sum(1 for count in incoming_counts.values() if count > 0)
+    total_with_outgoing = sum(1 for count in outgoing_counts.values() if count > 0)
+    total_with_any = sum(1 for pub_url in known_publications if total_recommendations(pub_url) > 0)
+    max_incoming = max(incoming_counts.values(), default=0)
+    max_outgoing = max(outgoing_counts.values(), default=0)
+    
+    report.count('publications', len(known_publications))
+    report.count('recommenders', len(recommenders))
+    report.count('recommendations', graph.num_edges)
+    report.count('alias_conflicts', len(resolver.conflicts))
+    report.count('duplicate_publications', publications.duplicates)
+    report.count('with_incoming', total_with_incoming)
+    report.count('with_outgoing', total_with_outgoing)
+    report_file = report.write(output_file)
     
     print(f"\nProcessing complete!")
     print(f"Output saved to: {output_file}")
-    print(f"Total publications: {len(recommendation_list)}")
+    print(f"Merged publications saved to: {', '.join(MERGED_OUTPUTS)}")
+    print(f"Run report saved to: {report_file}")
+    print(f"Total publications: {len(known_publications)}")
     print(f"Publications with incoming recommendations: {total_with_incoming}")
     print(f"Publications with outgoing recommendations: {total_with_outgoing}")
     print(f"Publications with any recommendations: {total_with_any}")
@@ -185,8 +168,8 @@ def main():
     
     # Show top 10 publications by total recommendations
     print(f"\nTop 10 publications by total recommendations:")
-    for i, item in enumerate(recommendation_list[:10], 1):
-        print(f"{i:2d}. {item['publication_url']}: {item['incoming_recommendations']} in, {item['outgoing_recommendations']} out, {item['total_recommendations']} total")
+    for i, pub_url in enumerate(ranked_publications[:10], 1):
+        print(f"{i:2d}. {pub_url}: {incoming_counts.get(pub_url, 0)} in, {outgoing_counts.get(pub_url, 0)} out, {total_recommendations(pub_url)} total")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Build a sharded publication search index for search-as-you-type.
+Takes subscriber_counts.json and indexes each publication's name, slug,
+subdomain and custom_domain into:
+
+- prefix shards: sorted terms with their posting lists, keyed by term prefix
+  (split further while a shard holds too many terms), plus precomputed top-k
+  results for short prefixes (the upper levels of the prefix trie)
+- trigram shards: trigram -> posting list, keyed by the trigram's first
+  character, for substring matches
+- document shards: display fields by document ID
+
+Document IDs are assigned in ranking order (subscriber count, descending), so
+every posting list is a sorted integer array whose first entries are the best
+matches, and intersecting or merging lists keeps results ranked.
+"""
+
+import glob
+import json
+import os
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Set
+
+from instrumentation import RunReport
+from json_stream import iter_json_array
+from publication_resolver import normalize_host
+
+OUTPUT_DIRECTORY = 'static/jsons/search'
+INDEX_VERSION = 1
+
+# A prefix shard is split by one more character while it holds more terms than this
+MAX_TERMS_PER_SHARD = 400
+MAX_KEY_LENGTH = 4
+# Prefixes up to this length get precomputed top-k results
+TOP_PREFIX_LENGTH = 3
+TOP_K = 10
+DOCS_PER_SHARD = 500
+
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+
+
+def normalize(text: str) -> str:
+    """Casefold and strip accents, so 'Café' and 'cafe' index the same."""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(normalize(text))
+
+
+def publication_terms(item: Dict) -> Set[str]:
+    """Search terms for one publication record."""
+    terms: Set[str] = set()
+    for field in ('name', 'publication_name'):
+        if item.get(field):
+            terms.update(tokenize(item[field]))
+    for field in ('slug', 'subdomain'):
+        if item.get(field):
+            value = normalize(item[field])
+            terms.add(value.replace('-', ''))
+            terms.update(tokenize(value))
+    if item.get('custom_domain'):
+        # Every label but the TLD: 'www.lennysnewsletter.com' -> 'lennysnewsletter'
+        labels = normalize_host(item['custom_domain']).split('.')
+        for label in labels[:-1] if len(labels) > 1 else labels:
+            terms.update(tokenize(label))
+            terms.add(label.replace('-', ''))
+    terms.discard('')
+    return terms
+
+
+def trigrams(term: str) -> Iterator[str]:
+    for start in range(len(term) - 2):
+        yield term[start:start + 3]
+
+
+def shard_keys(terms: List[str], prefix: str = '') -> Iterator[str]:
+    """
+    Partition sorted terms into shard keys: split a prefix by one more
+    character while it covers more than MAX_TERMS_PER_SHARD terms. A term
+    equal to a split prefix keeps a shard keyed by the prefix itself.
+    """
+    if prefix and (len(terms) <= MAX_TERMS_PER_SHARD or len(prefix) >= MAX_KEY_LENGTH):
+        yield prefix
+        return
+    if prefix and terms and terms[0] == prefix:
+        yield prefix
+        terms = terms[1:]
+    groups: Dict[str, List[str]] = {}
+    for term in terms:
+        groups.setdefault(term[:len(prefix) + 1], []).append(term)
+    for key, group in groups.items():
+        yield from shard_keys(group, key)
+
+
+def owner_key(prefix: str, keys: Set[str]) -> str:
+    """Longest shard key that is a prefix of prefix, or '' if none is."""
+    for length in range(min(len(prefix), MAX_KEY_LENGTH), 0, -1):
+        if prefix[:length] in keys:
+            return prefix[:length]
+    return ''
+
+
+def top_matches(postings: Iterable[List[int]], k: int = TOP_K) -> List[int]:
+    """Best k document IDs across posting lists (lowest IDs rank highest)."""
+    best: Set[int] = set()
+    for ids in postings:
+        best.update(ids[:k])
+    return sorted(best)[:k]
+
+
+def shard_file(kind: str, key: str) -> str:
+    # Keys may hold any character, so file names use their UTF-8 hex
+    return f"{kind}-{key.encode('utf-8').hex()}.json"
+
+
+def write_json(path: str, data) -> int:
+    with open(path, 'w') as f:
+        json.dump(data, f, separators=(',', ':'), ensure_ascii=False)
+    return os.path.getsize(path)
+
+
+def main():
+    """Main processing function."""
+
+    report = RunReport('preprocess_search_index')
+
+    print("Loading data files...")
+    with report.stage('load') as stage:
+        publications: Dict[str, Dict] = {}
+        for item in iter_json_array('static/jsons/subscriber_counts.json'):
+            url = item.get('publication_url')
+            if url and url not in publications:
+                publications[url] = {
+                    'url': url,
+                    'name': item.get('name') or item.get('publication_name') or normalize_host(url),
+                    'subscriber_count': item.get('subscriber_count') or 0,
+                    'terms': publication_terms(item)
+                }
+        stage.items = len(publications)
+
+    print(f"Indexing {len(publications)} publications")
+
+    # Document IDs in ranking order, so posting lists are ranked as well as sorted
+    with report.stage('rank') as stage:
+        docs = sorted(publications.values(), key=lambda doc: (-doc['subscriber_count'], doc['name'].casefold()))
+        stage.items = len(docs)
+
+    with report.stage('index') as stage:
+        postings: Dict[str, List[int]] = defaultdict(list)
+        trigram_postings: Dict[str, Set[int]] = defaultdict(set)
+        for doc_id, doc in enumerate(docs):
+            for term in doc['terms']:
+                postings[term].append(doc_id)
+                for trigram in trigrams(term):
+                    trigram_postings[trigram].add(doc_id)
+        terms = sorted(postings)
+        stage.items = len(terms)
+
+    os.makedirs(OUTPUT_DIRECTORY, exist_ok=True)
+    for stale in glob.glob(os.path.join(OUTPUT_DIRECTORY, '*.json')):
+        os.remove(stale)
+
+    with report.stage('serialize') as stage:
+        # Prefix shards
+        keys = list(shard_keys(terms))
+        key_set = set(keys)
+        shard_terms: Dict[str, List[str]] = defaultdict(list)
+        for term in terms:
+            shard_terms[owner_key(term, key_set)].append(term)
+
+        # Top-k for the upper trie levels, stored with the shard that owns the prefix
+        # (or in the index for prefixes shorter than every shard key under them)
+        prefix_terms: Dict[str, List[str]] = defaultdict(list)
+        for term in terms:
+            for length in range(1, min(len(term), TOP_PREFIX_LENGTH) + 1):
+                prefix_terms[term[:length]].append(term)
+        shard_top: Dict[str, Dict[str, List[int]]] = defaultdict(dict)
+        index_top: Dict[str, List[int]] = {}
+        for prefix, matching in prefix_terms.items():
+            best = top_matches(postings[term] for term in matching)
+            owner = owner_key(prefix, key_set)
+            if owner:
+                shard_top[owner][prefix] = best
+            else:
+                index_top[prefix] = best
+
+        prefix_shards = {}
+        largest_shard = 0
+        for key in keys:
+            members = shard_terms[key]
+            referenced = sorted({doc_id for top in shard_top[key].values() for doc_id in top})
+            size = write_json(os.path.join(OUTPUT_DIRECTORY, shard_file('prefix', key)), {
+                'key': key,
+                'terms': members,
+                'postings': [postings[term] for term in members],
+                'top': shard_top[key],
+                # Display fields for the precomputed results, so a typed prefix needs one fetch
+                'docs': {doc_id: [docs[doc_id]['name'], docs[doc_id]['url'], docs[doc_id]['subscriber_count']]
+                         for doc_id in referenced}
+            })
+            largest_shard = max(largest_shard, size)
+            prefix_shards[key] = {'file': shard_file('prefix', key), 'terms': len(members), 'bytes': size}
+
+        # Trigram shards by first character
+        trigram_groups: Dict[str, Dict[str, List[int]]] = defaultdict(dict)
+        for trigram in sorted(trigram_postings):
+            trigram_groups[trigram[0]][trigram] = sorted(trigram_postings[trigram])
+        trigram_shards = {}
+        for key, group in trigram_groups.items():
+            size = write_json(os.path.join(OUTPUT_DIRECTORY, shard_file('trigram', key)), group)
+            trigram_shards[key] = {'file': shard_file('trigram', key), 'trigrams': len(group), 'bytes': size}
+
+        # Document shards by ID range
+        doc_shards = []
+        for start in range(0, len(docs), DOCS_PER_SHARD):
+            name = f"docs-{start // DOCS_PER_SHARD:03d}.json"
+            write_json(os.path.join(OUTPUT_DIRECTORY, name),
+                       [[doc['name'], doc['url'], doc['subscriber_count']] for doc in docs[start:start + DOCS_PER_SHARD]])
+            doc_shards.append(name)
+
+        index_top_ids = sorted({doc_id for top in index_top.values() for doc_id in top})
+        index = {
+            'version': INDEX_VERSION,
+            'total_docs': len(docs),
+            'total_terms': len(terms),
+            'top_k': TOP_K,
+            'top_prefix_length': TOP_PREFIX_LENGTH,
+            'docs_per_shard': DOCS_PER_SHARD,
+            'prefix_shards': prefix_shards,
+            'trigram_shards': trigram_shards,
+            'doc_shards': doc_shards,
+            'top': index_top,
+            'docs': {doc_id: [docs[doc_id]['name'], docs[doc_id]['url'], docs[doc_id]['subscriber_count']]
+                     for doc_id in index_top_ids}
+        }
+        index_size = write_json(os.path.join(OUTPUT_DIRECTORY, 'index.json'), index)
+        stage.items = len(prefix_shards) + len(trigram_shards) + len(doc_shards)
+
+    report.count('documents', len(docs))
+    report.count('terms', len(terms))
+    report.count('trigrams', len(trigram_postings))
+    report.count('prefix_shards', len(prefix_shards))
+    report.count('largest_prefix_shard_bytes', largest_shard)
+    report_file = report.write(os.path.join(OUTPUT_DIRECTORY, 'index.json'))
+
+    print(f"\nProcessing complete!")
+    print(f"Output saved to: {OUTPUT_DIRECTORY}/ (index {index_size / 1024:.0f} KB)")
+    print(f"Run report saved to: {report_file}")
+    print(f"Documents: {len(docs)}, terms: {len(terms)}, trigrams: {len(trigram_postings)}")
+    print(f"Prefix shards: {len(prefix_shards)} (largest {largest_shard / 1024:.0f} KB), "
+          f"trigram shards: {len(trigram_shards)}, document shards: {len(doc_shards)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,663 @@
+#!/usr/bin/env python3
+"""
+Generate the post-level topic analytics from the crawled posts table:
+
+- static/jsons/topics_meta/*.json: feature impact with t-tests, temporal
+  patterns, feature combinations, content length bins, viral posts,
+  correlations, descriptive statistics, publication performance, sample
+  posts and the index
+- static/jsons/topics/knowledge_graph.json (topics linked by co-occurrence
+  on posts) and knowledge_graph_by_publication.json (topics linked by
+  publications that publish both)
+- static/jsons/topic_explorer/index.json and timeseries/<slug>.json
+
+The posts are loaded once into a columnar PostsTable (posts_table.py). The
+feature, temporal, combination and content-length outputs all come from one
+shared grouped pass; the remaining analyses (statistics, publications, sample
+posts, topic aggregates, topic links) are independent and run in parallel
+across a process pool, each worker holding the table once.
+
+Run from the repository root (posts in data/posts.json, a JSON array or
+JSON lines; see posts_table.py for the fields):
+    python preprocess_topic_analytics.py
+"""
+
+import calendar
+import glob
+import heapq
+import json
+import math
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from itertools import combinations
+from typing import Callable, Dict, List, Optional, Tuple
+
+from instrumentation import RunReport
+from posts_table import (DAY_NAMES, Aggregate, PostsTable, bin_index, grouped_aggregates, iter_posts,
+                         load_subscriber_counts, median, pearson, quantile, t_test)
+
+POSTS_FILE = 'data/posts.json'
+SUBSCRIBER_COUNTS_FILE = 'static/jsons/subscriber_counts.json'
+META_DIRECTORY = 'static/jsons/topics_meta'
+TOPICS_DIRECTORY = 'static/jsons/topics'
+EXPLORER_DIRECTORY = 'static/jsons/topic_explorer'
+
+IMPACT_FEATURES = ('has_images', 'has_number', 'has_question', 'has_exclamation', 'has_lists',
+                   'is_weekend', 'is_morning', 'is_evening')
+FEATURE_PAIRS = (('has_images', 'has_question'), ('has_images', 'has_lists'),
+                 ('has_number', 'has_question'), ('is_weekend', 'has_images'))
+LENGTH_EDGES = (0, 1000, 5000, 10000, 20000, 50000)
+LENGTH_BINS = ('<1K', '1-5K', '5-10K', '10-20K', '20-50K', '50K+')
+CORRELATION_FEATURES = ('reaction_count', 'comment_count', 'restacks', 'engagement_score', 'title_length',
+                        'content_length', 'link_count', 'hour', 'has_number', 'has_question', 'has_images',
+                        'has_lists')
+VIRAL_PERCENTILE = 95
+VIRAL_FEATURES = ('title_length', 'has_number', 'has_question', 'has_exclamation', 'content_length',
+                  'has_images', 'has_lists', 'link_count')
+MIN_PUBLICATION_POSTS = 10
+TOP_PUBLICATIONS = 20
+PERFORMANCE_BANDS = ((0, 0.25), (0.25, 0.5), (0.5, 0.75), (0.75, 0.9), (0.9, 0.95), (0.95, 1.0))
+MIN_LINK_WEIGHT = 10
+
+# Value columns of the shared grouped pass; the first four give the mean_* fields
+GROUP_VALUES = ('engagement_score', 'reaction_count', 'comment_count', 'restacks',
+                'engagement_score_per_1k', 'reaction_count_per_1k', 'comment_count_per_1k', 'restacks_per_1k')
+MEAN_FIELDS = ('mean_engagement', 'mean_reactions', 'mean_comments', 'mean_restacks')
+
+TOPIC_VALUES = ('reaction_count', 'comment_count', 'restacks', 'raw_reaction_count', 'raw_comment_count',
+                'raw_restacks', 'reaction_count_per_1k', 'comment_count_per_1k', 'restacks_per_1k',
+                'subscriber_count')
+TOPIC_METRICS = ('reactions', 'comments', 'restacks')
+
+# topics_meta/index.json groups (files are filled in from the analyses that ran)
+META_CATEGORIES = {
+    'feature_impact': {
+        'description': 'Binary feature impact on engagement metrics',
+        'files': [f"topics_{feature}.json" for feature in IMPACT_FEATURES],
+        'chart_types': ['bar_chart', 'comparison_chart'],
+        'metrics': ['mean_engagement', 'mean_reactions', 'mean_comments', 'mean_restacks', 'count', 'percentage']
+    },
+    'temporal_patterns': {
+        'description': 'Time-based engagement analysis',
+        'files': ['temporal_hourly.json', 'temporal_daily.json', 'temporal_monthly.json', 'temporal_yearly.json'],
+        'chart_types': ['line_chart', 'bar_chart', 'area_chart'],
+        'metrics': ['mean_engagement', 'count', 'hour', 'day_of_week', 'month', 'year']
+    },
+    'viral_analysis': {
+        'description': 'High-performing content analysis (top 5%)',
+        'files': ['viral_posts_analysis.json'],
+        'chart_types': ['scatter_plot', 'bar_chart', 'table'],
+        'metrics': ['feature_comparison', 'top_viral_posts', 'threshold_score']
+    },
+    'statistical_analysis': {
+        'description': 'Correlations and descriptive statistics',
+        'files': ['correlation_analysis.json', 'basic_statistics.json'],
+        'chart_types': ['heatmap', 'correlation_matrix', 'histogram'],
+        'metrics': ['correlation', 'mean', 'std', 'min', 'max', 'percentiles']
+    },
+    'content_analysis': {
+        'description': 'Content-focused metrics and publication performance',
+        'files': ['content_length_analysis.json', 'publication_performance.json'],
+        'chart_types': ['bar_chart', 'histogram', 'scatter_plot'],
+        'metrics': ['length_bins', 'publication_stats', 'performance_distribution']
+    },
+    'feature_combinations': {
+        'description': 'Interaction analysis between feature pairs',
+        'files': [f"combination_{first}_{second}.json" for first, second in FEATURE_PAIRS],
+        'chart_types': ['grouped_bar_chart', 'matrix_chart'],
+        'metrics': ['combination_stats', 'interaction_effects']
+    }
+}
+
+
+def percentage(part: int, total: int) -> float:
+    return part / total * 100 if total else 0.0
+
+
+def change(value: float, baseline: float) -> float:
+    """Relative difference in percent (0 when the baseline is 0)."""
+    return (value - baseline) / baseline * 100 if baseline else 0.0
+
+
+def group_means(aggregate: Aggregate, per_1k: bool = False) -> Dict:
+    """mean_* fields of one group, optionally with the per-1k-subscriber means."""
+    record = {field: aggregate.mean(i) for i, field in enumerate(MEAN_FIELDS)}
+    if per_1k:
+        for i, field in enumerate(MEAN_FIELDS, len(MEAN_FIELDS)):
+            record[f"{field}_per_1k"] = aggregate.mean(i, aggregate.subscribed)
+        record['posts_with_subscriber_data'] = aggregate.subscribed
+    return record
+
+
+# Shared grouped pass: feature impact, temporal patterns, combinations, content length
+
+def grouped_analyses(table: PostsTable) -> Dict[str, Dict]:
+    hour, day, month, year = table['hour'], table['day_of_week'], table['month'], table['year']
+    length = table['content_length']
+    groupings: Dict[str, Callable[[int], object]] = {
+        'hour': hour.__getitem__,
+        'day': day.__getitem__,
+        'month': month.__getitem__,
+        'year': year.__getitem__,
+        'length': lambda row: bin_index(LENGTH_EDGES, length[row]),
+    }
+    for feature in IMPACT_FEATURES:
+        groupings[feature] = table[feature].__getitem__
+    for first, second in FEATURE_PAIRS:
+        first_column, second_column = table[first], table[second]
+        groupings[f"{first}_{second}"] = (
+            lambda row, a=first_column, b=second_column: (a[row], b[row]))
+    groups = grouped_aggregates(table, groupings, GROUP_VALUES, collect=('length',))
+    total = len(table)
+    empty = Aggregate(len(GROUP_VALUES), False)
+    outputs = {}
+
+    for feature in IMPACT_FEATURES:
+        with_feature = groups[feature].get(1, empty)
+        without_feature = groups[feature].get(0, empty)
+        t_statistic, p_value = t_test(with_feature, without_feature, 0)
+        sides = {}
+        for name, aggregate in (('with_feature', with_feature), ('without_feature', without_feature)):
+            sides[name] = {'count': aggregate.count, 'percentage': percentage(aggregate.count, total),
+                           **group_means(aggregate, per_1k=True)}
+        outputs[f"topics_meta/topics_{feature}.json"] = {
+            'feature': feature,
+            'metric': 'engagement_score',
+            **sides,
+            'effect_percentage': change(sides['with_feature']['mean_engagement'],
+                                        sides['without_feature']['mean_engagement']),
+            'effect_percentage_per_1k': change(sides['with_feature']['mean_engagement_per_1k'],
+                                               sides['without_feature']['mean_engagement_per_1k']),
+            'statistical_significance': {
+                't_statistic': t_statistic,
+                'p_value': p_value,
+                'significant': bool(p_value < 0.05)
+            }
+        }
+
+    hourly = [{'hour': key, 'count': aggregate.count, **group_means(aggregate, per_1k=True)}
+              for key, aggregate in sorted(groups['hour'].items())]
+    ranked_hours = sorted(hourly, key=lambda entry: entry['mean_engagement'])
+    outputs['topics_meta/temporal_hourly.json'] = {
+        'chart_type': 'hourly_patterns',
+        'best_hour': ranked_hours[-1]['hour'] if hourly else None,
+        'worst_hour': ranked_hours[0]['hour'] if hourly else None,
+        'data': hourly
+    }
+
+    daily = [{'day_of_week': key, 'day_name': DAY_NAMES[key], 'count': aggregate.count,
+              **group_means(aggregate), 'is_weekend': key >= 5}
+             for key, aggregate in sorted(groups['day'].items())]
+    weekend = groups['is_weekend'].get(1, empty)
+    weekday = groups['is_weekend'].get(0, empty)
+    outputs['topics_meta/temporal_daily.json'] = {
+        'chart_type': 'daily_patterns',
+        'weekend_vs_weekday': {'weekend_better': bool(weekend.mean(0) > weekday.mean(0))},
+        'data': daily
+    }
+    outputs['topics_meta/temporal_monthly.json'] = {
+        'chart_type': 'monthly_patterns',
+        'data': [{'month': key, 'month_name': calendar.month_name[key], 'count': aggregate.count,
+                  **group_means(aggregate)} for key, aggregate in sorted(groups['month'].items())]
+    }
+    outputs['topics_meta/temporal_yearly.json'] = {
+        'chart_type': 'yearly_trend',
+        'data': [{'year': key, 'count': aggregate.count, **group_means(aggregate)}
+                 for key, aggregate in sorted(groups['year'].items())]
+    }
+
+    for first, second in FEATURE_PAIRS:
+        labels = {(0, 0): 'Neither', (1, 0): f"{first}_only", (0, 1): f"{second}_only", (1, 1): 'Both'}
+        cells = groups[f"{first}_{second}"]
+        outputs[f"topics_meta/combination_{first}_{second}.json"] = {
+            'feature1': first,
+            'feature2': second,
+            'combinations': [{
+                'combination': label,
+                'feature1_value': key[0],
+                'feature2_value': key[1],
+                'count': cells.get(key, empty).count,
+                'percentage': percentage(cells.get(key, empty).count, total),
+                **group_means(cells.get(key, empty))
+            } for key, label in labels.items()]
+        }
+
+    length_data = []
+    for index, label in enumerate(LENGTH_BINS):
+        aggregate = groups['length'].get(index)
+        if aggregate is None:
+            continue
+        means = group_means(aggregate)
+        length_data.append({
+            'length_bin': label,
+            'count': aggregate.count,
+            'percentage': percentage(aggregate.count, total),
+            'mean_engagement': means['mean_engagement'],
+            'median_engagement': median([values[0] for values in aggregate.values]),
+            'mean_reactions': means['mean_reactions'],
+            'mean_comments': means['mean_comments'],
+            'mean_restacks': means['mean_restacks']
+        })
+    outputs['topics_meta/content_length_analysis.json'] = {
+        'chart_type': 'content_length_analysis',
+        'bins': list(LENGTH_BINS),
+        'data': length_data
+    }
+    return outputs
+
+
+# Independent analyses
+
+def statistics_analyses(table: PostsTable) -> Dict[str, Dict]:
+    """Descriptive statistics, the correlation matrix and the viral post analysis."""
+    start, end = table.date_range()
+    outputs = {}
+
+    described = []
+    for metric in ('reaction_count', 'comment_count', 'restacks', 'engagement_score'):
+        values = sorted(table[metric])
+        count = len(values)
+        mean = math.fsum(values) / count if count else 0.0
+        variance = math.fsum((value - mean) ** 2 for value in values) / (count - 1) if count > 1 else 0.0
+        described.append({
+            'metric': metric, 'count': count, 'mean': mean, 'std': math.sqrt(variance),
+            'min': values[0] if values else 0.0, 'q25': quantile(values, 0.25), 'median': quantile(values, 0.5),
+            'q75': quantile(values, 0.75), 'max': values[-1] if values else 0.0
+        })
+    outputs['topics_meta/basic_statistics.json'] = {
+        'total_posts': len(table),
+        'date_range': {'start': start, 'end': end},
+        'unique_publications': len(set(table['publication_id'])),
+        'basic_statistics': described
+    }
+
+    columns = [table[name] for name in CORRELATION_FEATURES]
+    size = len(CORRELATION_FEATURES)
+    matrix = [[0.0] * size for _ in range(size)]
+    for i in range(size):
+        matrix[i][i] = 1.0
+        for j in range(i + 1, size):
+            matrix[i][j] = matrix[j][i] = pearson(columns[i], columns[j])
+    engagement = CORRELATION_FEATURES.index('engagement_score')
+    outputs['topics_meta/correlation_analysis.json'] = {
+        'correlation_matrix': [{'feature1': CORRELATION_FEATURES[i], 'feature2': CORRELATION_FEATURES[j],
+                                'correlation': matrix[i][j], 'row_index': i, 'col_index': j}
+                               for i in range(size) for j in range(size)],
+        'features': list(CORRELATION_FEATURES),
+        'top_engagement_correlations': sorted(
+            ({'feature': feature, 'correlation': matrix[engagement][i]}
+             for i, feature in enumerate(CORRELATION_FEATURES) if i != engagement),
+            key=lambda entry: -abs(entry['correlation']))
+    }
+
+    scores = table['engagement_score']
+    threshold = quantile(sorted(scores), VIRAL_PERCENTILE / 100)
+    viral = [score >= threshold for score in scores]
+    viral_count = sum(viral)
+    comparison = []
+    for feature in VIRAL_FEATURES:
+        sums = [0.0, 0.0]
+        for is_viral, value in zip(viral, table[feature]):
+            sums[is_viral] += value
+        viral_mean = sums[1] / viral_count if viral_count else 0.0
+        normal_mean = sums[0] / (len(table) - viral_count) if len(table) > viral_count else 0.0
+        comparison.append({'feature': feature, 'viral_mean': viral_mean, 'normal_mean': normal_mean,
+                           'difference_percentage': change(viral_mean, normal_mean)})
+    top_rows = heapq.nlargest(10, range(len(table)), key=scores.__getitem__)
+    outputs['topics_meta/viral_posts_analysis.json'] = {
+        'threshold_percentile': VIRAL_PERCENTILE,
+        'threshold_score': threshold,
+        'viral_count': viral_count,
+        'viral_percentage': percentage(viral_count, len(table)),
+        'feature_comparison': comparison,
+        'top_viral_posts': [{'title': table['title'][row], 'engagement_score': scores[row],
+                             'reaction_count': table['reaction_count'][row],
+                             'comment_count': table['comment_count'][row], 'restacks': table['restacks'][row]}
+                            for row in top_rows]
+    }
+    return outputs
+
+
+def publication_performance(table: PostsTable) -> Dict[str, Dict]:
+    """Per-publication engagement for publications with MIN_PUBLICATION_POSTS or more posts."""
+    publication = table['publication_id']
+    groups = grouped_aggregates(table, {'publication': publication.__getitem__}, GROUP_VALUES[:4],
+                                collect=('publication',))['publication']
+    active = {key: aggregate for key, aggregate in groups.items() if aggregate.count >= MIN_PUBLICATION_POSTS}
+    performance = sorted(aggregate.mean(0) for aggregate in active.values())
+
+    top = sorted(active.items(), key=lambda item: -item[1].mean(0))[:TOP_PUBLICATIONS]
+    top_publications = []
+    for key, aggregate in top:
+        top_publications.append({
+            'publication_id': key,
+            'post_count': aggregate.count,
+            'mean_engagement': round(aggregate.mean(0), 1),
+            'median_engagement': round(median([values[0] for values in aggregate.values]), 1),
+            'std_engagement': round(math.sqrt(aggregate.variance(0)), 1),
+            'mean_reactions': round(aggregate.mean(1), 1),
+            'mean_comments': round(aggregate.mean(2), 1),
+            'mean_restacks': round(aggregate.mean(3), 1)
+        })
+
+    distribution = []
+    for low, high in PERFORMANCE_BANDS:
+        lower, upper = quantile(performance, low), quantile(performance, high)
+        members = [value for value in performance
+                   if (lower < value or (low == 0 and value == lower)) and value <= upper]
+        distribution.append({
+            'percentile_range': f"{round(low * 100)}-{round(high * 100)}%",
+            'min_engagement': lower,
+            'max_engagement': upper,
+            'count': len(members),
+            'mean_engagement': math.fsum(members) / len(members) if members else 0.0
+        })
+
+    return {'topics_meta/publication_performance.json': {
+        'total_publications': len(groups),
+        'active_publications': len(active),
+        'median_performance': round(quantile(performance, 0.5), 2),
+        'top_publications': top_publications,
+        'performance_distribution': distribution
+    }}
+
+
+def sample_posts(table: PostsTable) -> Dict[str, Dict]:
+    """Example posts per theme, with unclipped engagement numbers."""
+    reactions, comments, restacks = table['raw_reaction_count'], table['raw_comment_count'], table['raw_restacks']
+    scores = table['raw_engagement_score']
+    subscribers = table['subscriber_count']
+
+    def per_1k(value: float, row: int) -> float:
+        return value / subscribers[row] * 1000 if subscribers[row] > 0 else 0
+
+    def post(row: int, extra: Dict) -> Dict:
+        return {
+            'title': table['title'][row], 'url': table['url'][row], 'engagement_score': scores[row],
+            'reaction_count': reactions[row], 'comment_count': comments[row], 'restacks': restacks[row],
+            'subscriber_count': subscribers[row], 'publication_id': table['publication_id'][row],
+            'post_date': table['post_date'][row], **extra,
+            'engagement_per_1k': per_1k(scores[row], row), 'reactions_per_1k': per_1k(reactions[row], row),
+            'comments_per_1k': per_1k(comments[row], row), 'restacks_per_1k': per_1k(restacks[row], row)
+        }
+
+    rows = range(len(table))
+    content_length = table['content_length']
+    engagement_rate = [per_1k(scores[row], row) for row in rows]
+    comment_ratio = [comments[row] / (reactions[row] + 1) for row in rows]
+    restack_ratio = [restacks[row] / (reactions[row] + 1) for row in rows]
+    # name: (filter, ranking, count, extra fields)
+    themes = {
+        'top_viral': (None, scores, 15, lambda row: {
+            'has_images': bool(table['has_images'][row]), 'has_question': bool(table['has_question'][row]),
+            'content_length': content_length[row]}),
+        'with_images': (table['has_images'], scores, 10, lambda row: {'content_length': content_length[row]}),
+        'with_questions': (table['has_question'], scores, 10, None),
+        'with_numbers': (table['has_number'], scores, 10, None),
+        'with_lists': (table['has_lists'], scores, 10, None),
+        'weekend_posts': (table['is_weekend'], scores, 10,
+                          lambda row: {'day_of_week': DAY_NAMES[table['day_of_week'][row]]}),
+        'long_form': ([length >= 20000 for length in content_length], scores, 10, lambda row: {
+            'content_length': content_length[row], 'reading_time_minutes': content_length[row] // 1000}),
+        'high_engagement_rate': ([count >= 1000 for count in subscribers], engagement_rate, 10,
+                                 lambda row: {'engagement_rate': engagement_rate[row]}),
+        'discussion_drivers': ([count >= 50 for count in comments], comment_ratio, 10,
+                               lambda row: {'comment_ratio': comment_ratio[row]}),
+        'highly_shareable': ([count >= 50 for count in restacks], restack_ratio, 10,
+                             lambda row: {'restack_ratio': restack_ratio[row]}),
+    }
+
+    start, end = table.date_range()
+    output = {'metadata': {'total_posts': len(table), 'date_range': {'start': start, 'end': end},
+                           'generated': datetime.now().isoformat()}}
+    for name, (selected, ranking, count, extra) in themes.items():
+        candidates = rows if selected is None else [row for row in rows if selected[row]]
+        output[name] = [post(row, extra(row) if extra else {})
+                        for row in heapq.nlargest(count, candidates, key=ranking.__getitem__)]
+    return {'topics_meta/sample_posts.json': output}
+
+
+def topic_aggregates(table: PostsTable) -> Dict[str, Dict]:
+    """Per-topic totals and means, and the per-topic monthly series."""
+    topics, months, publication = table['topics'], table['month_key'], table['publication_id']
+    groups = grouped_aggregates(table, {
+        'topic': lambda row: list(topics[row]),
+        'topic_month': lambda row: [(topic, months[row]) for topic in topics[row]],
+        'topic_publication': lambda row: [(topic, publication[row]) for topic in topics[row]],
+    }, TOPIC_VALUES)
+
+    publications: Dict[str, List[float]] = {}
+    subscriber_column = TOPIC_VALUES.index('subscriber_count')
+    for (topic, _), aggregate in groups['topic_publication'].items():
+        publications.setdefault(topic, []).append(aggregate.mean(subscriber_column))
+
+    stats = {}
+    for topic, aggregate in groups['topic'].items():
+        subscribers = [count for count in publications[topic] if count > 0]
+        subscriber_sum = int(sum(subscribers))
+        record = {
+            'topic': topic,
+            'post_count': aggregate.count,
+            'pub_count': len(publications[topic]),
+            'subscriber_sum': subscriber_sum,
+            'avg_subscriber_count': round(subscriber_sum / len(subscribers)) if subscribers else 0,
+        }
+        for i, metric in enumerate(TOPIC_METRICS):
+            record[f"total_{metric}"] = int(aggregate.sums[3 + i])
+        for i, metric in enumerate(TOPIC_METRICS):
+            record[f"avg_{metric}"] = aggregate.mean(i)
+        for i, metric in enumerate(TOPIC_METRICS):
+            record[f"avg_{metric}_per_1k"] = aggregate.mean(6 + i, aggregate.subscribed)
+        stats[topic] = record
+
+    series: Dict[str, List[Dict]] = {}
+    for (topic, month), aggregate in sorted(groups['topic_month'].items()):
+        point = {'month': month, 'post_count': aggregate.count}
+        for i, metric in enumerate(TOPIC_METRICS):
+            point[f"avg_{metric}"] = aggregate.mean(i)
+        for i, metric in enumerate(TOPIC_METRICS):
+            point[f"avg_{metric}_per_1k"] = aggregate.mean(6 + i, aggregate.subscribed)
+        series.setdefault(topic, []).append(point)
+    return {'topic_stats': stats, 'topic_series': series}
+
+
+def topic_links(table: PostsTable) -> Dict[str, Dict]:
+    """Topic pair weights: posts tagged with both, and publications publishing both."""
+    cooccurs: Counter = Counter()
+    publication_topics: Dict[int, set] = {}
+    for topics, publication in zip(table['topics'], table['publication_id']):
+        cooccurs.update(combinations(sorted(topics), 2))
+        publication_topics.setdefault(publication, set()).update(topics)
+    co_published: Counter = Counter()
+    for topics in publication_topics.values():
+        co_published.update(combinations(sorted(topics), 2))
+    return {'topic_links': {'cooccurs': dict(cooccurs), 'co_published': dict(co_published)}}
+
+
+ANALYSES: Dict[str, Callable[[PostsTable], Dict]] = {
+    'grouped': grouped_analyses,
+    'statistics': statistics_analyses,
+    'publications': publication_performance,
+    'samples': sample_posts,
+    'topics': topic_aggregates,
+    'topic_links': topic_links,
+}
+
+_table: Optional[PostsTable] = None
+
+
+def _init_worker(table: PostsTable) -> None:
+    global _table
+    _table = table
+
+
+def _run_analysis(name: str) -> Tuple[str, Dict]:
+    return name, ANALYSES[name](_table)
+
+
+def run_analyses(table: PostsTable, workers: Optional[int] = None) -> Dict[str, Dict]:
+    """Run every analysis, in a process pool unless workers is 1; returns their merged outputs."""
+    workers = min(workers or os.cpu_count() or 1, len(ANALYSES))
+    outputs: Dict[str, Dict] = {}
+    if workers == 1:
+        for analysis in ANALYSES.values():
+            outputs.update(analysis(table))
+        return outputs
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(table,)) as pool:
+        for _, result in pool.map(_run_analysis, ANALYSES):
+            outputs.update(result)
+    return outputs
+
+
+# Topic outputs
+
+def slugify(text: str) -> str:
+    """Same slug the timeseries files are named by (see Sparkline.svelte)."""
+    slug = ''.join(ch if 'a' <= ch <= 'z' or '0' <= ch <= '9' else '-' for ch in text.lower())
+    return '-'.join(part for part in slug.split('-') if part)
+
+
+def topic_node(stats: Dict) -> Dict:
+    node = {'id': stats['topic'], 'type': 'topic'}
+    for field in ('subscriber_sum', 'avg_subscriber_count', 'pub_count', 'post_count'):
+        node[field] = stats[field]
+    for field in ('avg_reactions', 'avg_comments', 'avg_restacks',
+                  'avg_reactions_per_1k', 'avg_comments_per_1k', 'avg_restacks_per_1k'):
+        node[field] = stats[field]
+    node['val'] = 5 + 5 * math.log10(max(stats['subscriber_sum'], 1))
+    node['label'] = stats['topic']
+    return node
+
+
+def knowledge_graph(stats: Dict[str, Dict], weights: Dict[Tuple[str, str], int], link_type: str,
+                    order: Callable[[Dict], Tuple]) -> Dict:
+    ranked = sorted(stats.values(), key=order)
+    links = [{'source': source, 'target': target, 'type': link_type, 'weight': weight}
+             for (source, target), weight in sorted(weights.items(), key=lambda item: (-item[1], item[0]))
+             if weight >= MIN_LINK_WEIGHT]
+    return {
+        'nodes': [topic_node(record) for record in ranked],
+        'links': links,
+        'topic_meta': {record['topic']: record for record in ranked}
+    }
+
+
+def explorer_index(graphs: Dict[str, Dict], generated_at: str) -> Dict:
+    """topic_explorer/index.json: the graph nodes without the graph-only fields."""
+    index: Dict = {'generated_at': generated_at}
+    for key, label in (('co_occurrence', 'co-occurrence'), ('by_publication', 'by-publication')):
+        nodes = graphs[key]['nodes']
+        index[key] = {
+            'meta': {'label': label, 'topic_count': len(nodes)},
+            'topics': [{'id': node['id'], 'label': node['label'],
+                        **{field: value for field, value in node.items()
+                           if field not in ('id', 'label', 'type', 'val')}} for node in nodes]
+        }
+    return index
+
+
+def meta_index(outputs: Dict[str, Dict], total_posts: int) -> Dict:
+    """topics_meta/index.json from the analyses' outputs."""
+    basic = outputs['topics_meta/basic_statistics.json']
+    effects = sorted(((feature, outputs[f"topics_meta/topics_{feature}.json"]['effect_percentage'])
+                      for feature in IMPACT_FEATURES), key=lambda item: -abs(item[1]))
+    viral = {entry['feature']: entry['difference_percentage']
+             for entry in outputs['topics_meta/viral_posts_analysis.json']['feature_comparison']}
+    categories = {name: dict(info, files=[file for file in info['files'] if f"topics_meta/{file}" in outputs])
+                  for name, info in META_CATEGORIES.items()}
+    return {
+        'meta': {
+            'generated': datetime.now().strftime('%Y-%m-%d'),
+            'total_posts': total_posts,
+            'unique_publications': basic['unique_publications'],
+            'date_range': {key: value[:10] for key, value in basic['date_range'].items()},
+            'files_count': sum(len(info['files']) for info in categories.values())
+        },
+        'categories': categories,
+        'quick_access': {
+            'most_impactful_features': [f"{feature} ({effect:+.1f}% engagement)" for feature, effect in effects[:3]],
+            'best_posting_times': {
+                'hour': outputs['topics_meta/temporal_hourly.json']['best_hour'],
+                'day': 'varies by publication',
+                'weekend_effect': 'mixed'
+            },
+            'viral_characteristics': {
+                'longer_content': viral.get('content_length', 0) > 0,
+                'more_images': viral.get('has_images', 0) > 0,
+                'fewer_lists': viral.get('has_lists', 0) < 0,
+                'fewer_numbers_in_titles': viral.get('has_number', 0) < 0
+            }
+        },
+        'usage_examples': {
+            'load_feature_impact': "fetch('topics_meta/topics_has_images.json')",
+            'load_temporal': "fetch('topics_meta/temporal_hourly.json')",
+            'load_correlations': "fetch('topics_meta/correlation_analysis.json')"
+        }
+    }
+
+
+def write_json(path: str, data) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(data, f, separators=(',', ':'), ensure_ascii=False)
+
+
+def main():
+    """Main processing function."""
+
+    report = RunReport('preprocess_topic_analytics')
+
+    print("Loading data files...")
+    with report.stage('load') as stage:
+        subscriber_counts = load_subscriber_counts(SUBSCRIBER_COUNTS_FILE)
+        table = PostsTable.from_records(iter_posts(POSTS_FILE), subscriber_counts)
+        stage.items = len(table)
+    print(f"Loaded {len(table)} posts in {stage.seconds:.2f}s ({stage.process_peak_rss_mb:.0f} MB process peak)")
+
+    with report.stage('analyses') as stage:
+        outputs = run_analyses(table)
+        stage.items = len(ANALYSES)
+    print(f"Ran {len(ANALYSES)} analyses in {stage.seconds:.2f}s")
+
+    with report.stage('write') as stage:
+        generated_at = datetime.now(timezone.utc).replace(microsecond=0)
+        stats = outputs.pop('topic_stats')
+        series = outputs.pop('topic_series')
+        links = outputs.pop('topic_links')
+        graphs = {
+            'co_occurrence': knowledge_graph(stats, links['cooccurs'], 'cooccurs',
+                                             lambda record: (-record['post_count'], record['topic'])),
+            'by_publication': knowledge_graph(stats, links['co_published'], 'co_published',
+                                              lambda record: (-record['pub_count'], record['topic'])),
+        }
+        outputs['topics_meta/index.json'] = meta_index(outputs, len(table))
+        outputs['topics/knowledge_graph.json'] = graphs['co_occurrence']
+        outputs['topics/knowledge_graph_by_publication.json'] = graphs['by_publication']
+        outputs['topic_explorer/index.json'] = explorer_index(graphs, generated_at.strftime('%Y-%m-%dT%H:%M:%SZ'))
+
+        # One series file per slug (the most-posted topic wins a slug collision)
+        timeseries_directory = os.path.join(EXPLORER_DIRECTORY, 'timeseries')
+        written = set()
+        for node in graphs['co_occurrence']['nodes']:
+            slug = slugify(node['id'])
+            if slug and slug not in written:
+                written.add(slug)
+                outputs[f"topic_explorer/timeseries/{slug}.json"] = {
+                    'topic': node['id'], 'generated_at': generated_at.isoformat(), 'series': series[node['id']]}
+        for stale in glob.glob(os.path.join(timeseries_directory, '*.json')):
+            if os.path.splitext(os.path.basename(stale))[0] not in written:
+                os.remove(stale)
+
+        for name, data in outputs.items():
+            write_json(os.path.join('static/jsons', name), data)
+        stage.items = len(outputs)
+
+    print(f"Wrote {len(outputs)} files ({len(stats)} topics, "
+          f"{len(graphs['co_occurrence']['links'])} co-occurrence and "
+          f"{len(graphs['by_publication']['links'])} co-publication links)")
+    report.write(os.path.join(META_DIRECTORY, 'index.json'))
+
+if __name__ == '__main__':
+    main()
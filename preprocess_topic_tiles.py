@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Lay out the topic knowledge graphs in 2D and cut them into a quadtree tile
+pyramid the topic map streams by viewport.
+
+Outputs (static/jsons/topics/tiles/<graph>/, one directory per graph):
+
+- index.json: world bounds, pyramid depth and budgets, the list of non-empty
+  tiles, colour-scale ranges, and per topic its position and zoom level (for
+  search and focus without loading tiles).
+- <z>-<x>-<y>.json: the nodes that first appear at zoom z inside tile (x, y),
+  the links that first appear there ([source, target, weight], stored in the
+  tiles of both ends), and [x, y, val] of link ends lying outside the tile.
+
+Tiles are incremental: the view at zoom z is the union of the tiles of
+levels 0..z that intersect it, so nothing is stored twice. Thinning is by
+importance: nodes are placed by descending val (the size they are drawn at)
+at the coarsest level whose tile still has room under TILE_NODE_BUDGET, and
+links by descending weight at the coarsest level where both endpoints are
+shown and both endpoint tiles have room under TILE_LINK_BUDGET. A view thus
+holds a bounded number of nodes and links whatever the size of the graph;
+the one exception is the deepest level, which keeps every remaining link, so
+the tile of a hub topic can exceed the link budget there.
+"""
+
+import glob
+import json
+import os
+from array import array
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+from graph_engine import CSRGraph, Interner
+from graph_layout import force_layout
+from instrumentation import RunReport
+
+GRAPHS = {
+    'co-occurrence': 'static/jsons/topics/knowledge_graph.json',
+    'by-publication': 'static/jsons/topics/knowledge_graph_by_publication.json',
+}
+OUTPUT_DIRECTORY = 'static/jsons/topics/tiles'
+
+VERSION = 1
+LAYOUT_SEED = 42
+LAYOUT_ITERATIONS = 300
+# Matches the client's link distance for topics, so node sizes fit the spacing
+LINK_DISTANCE = 120.0
+# Empty margin around the layout, as a share of its extent
+WORLD_PADDING = 0.05
+
+MAX_ZOOM = 6
+TILE_NODE_BUDGET = 64
+TILE_LINK_BUDGET = 256
+# On-screen size (device pixels) a tile is meant to cover; picks the level for a zoom
+TILE_SIZE = 512
+
+# Node metrics the map can colour by; their ranges keep colours stable as tiles load
+COLOR_METRICS = ('avg_subscriber_count', 'avg_reactions', 'avg_comments', 'avg_restacks',
+                 'avg_reactions_per_1k', 'avg_comments_per_1k', 'avg_restacks_per_1k', 'pub_count', 'post_count')
+
+TileKey = Tuple[int, int, int]
+
+
+def layout_positions(nodes: List[Dict], links: List[Dict]) -> List[Tuple[float, float]]:
+    """Offline 2D force layout of the topic graph, in node order."""
+    ids = Interner()
+    for node in nodes:
+        ids.intern(node['id'])
+    sources, targets = array('q'), array('q')
+    for link in links:
+        source, target = ids.get(link['source']), ids.get(link['target'])
+        if source is not None and target is not None:
+            sources.append(source)
+            targets.append(target)
+    graph = CSRGraph.from_edges(len(ids), sources, targets)
+    xs, ys = force_layout(graph, dimensions=2, iterations=LAYOUT_ITERATIONS, seed=LAYOUT_SEED,
+                          link_distance=LINK_DISTANCE)
+    return [(round(x, 1), round(y, 1)) for x, y in zip(xs, ys)]
+
+
+class Pyramid:
+    """Square world over the layout, split into 2^z x 2^z tiles at zoom z."""
+
+    def __init__(self, positions: List[Tuple[float, float]]) -> None:
+        xs = [x for x, _ in positions] or [0.0]
+        ys = [y for _, y in positions] or [0.0]
+        extent = max(max(xs) - min(xs), max(ys) - min(ys), 1.0)
+        self.size = round(extent * (1 + 2 * WORLD_PADDING), 1)
+        self.x = round((min(xs) + max(xs) - self.size) / 2, 1)
+        self.y = round((min(ys) + max(ys) - self.size) / 2, 1)
+        self.positions = positions
+
+    def tile(self, node: int, zoom: int) -> TileKey:
+        x, y = self.positions[node]
+        scale = 1 << zoom
+        return (zoom,
+                min(max(int((x - self.x) / self.size * scale), 0), scale - 1),
+                min(max(int((y - self.y) / self.size * scale), 0), scale - 1))
+
+    def max_zoom(self, count: int) -> int:
+        """Shallowest zoom (up to MAX_ZOOM) at which no tile holds more than TILE_NODE_BUDGET nodes."""
+        for zoom in range(MAX_ZOOM + 1):
+            counts = Counter(self.tile(node, zoom) for node in range(count))
+            if not counts or max(counts.values()) <= TILE_NODE_BUDGET:
+                return zoom
+        return MAX_ZOOM
+
+
+def node_zooms(pyramid: Pyramid, importance: List[float], max_zoom: int) -> List[int]:
+    """Zoom at which each node first appears: the coarsest level with room in its tile."""
+    counts: Counter = Counter()
+    zooms = [max_zoom] * len(importance)
+    for node in sorted(range(len(importance)), key=lambda i: -importance[i]):
+        zoom = next((z for z in range(max_zoom + 1)
+                     if counts[pyramid.tile(node, z)] < TILE_NODE_BUDGET), max_zoom)
+        zooms[node] = zoom
+        for z in range(zoom, max_zoom + 1):
+            counts[pyramid.tile(node, z)] += 1
+    return zooms
+
+
+def link_zooms(pyramid: Pyramid, links: List[Tuple[int, int, float]], zooms: List[int],
+               max_zoom: int) -> List[int]:
+    """Zoom at which each link first appears: both ends shown and room in both end tiles."""
+    counts: Counter = Counter()
+    result = [max_zoom] * len(links)
+    for index in sorted(range(len(links)), key=lambda i: -links[i][2]):
+        source, target, _ = links[index]
+        start = max(zooms[source], zooms[target])
+        zoom = next((z for z in range(start, max_zoom + 1)
+                     if counts[pyramid.tile(source, z)] < TILE_LINK_BUDGET
+                     and counts[pyramid.tile(target, z)] < TILE_LINK_BUDGET), max_zoom)
+        result[index] = zoom
+        for z in range(zoom, max_zoom + 1):
+            for tile in {pyramid.tile(source, z), pyramid.tile(target, z)}:
+                counts[tile] += 1
+    return result
+
+
+def metric_ranges(nodes: List[Dict]) -> Dict[str, List[float]]:
+    """[min, max] of the positive values of each colour metric."""
+    ranges = {}
+    for metric in COLOR_METRICS:
+        values = [node[metric] for node in nodes if node.get(metric) is not None and node[metric] > 0]
+        if values:
+            ranges[metric] = [min(values), max(values)]
+    return ranges
+
+
+def write_json(path: str, data) -> int:
+    with open(path, 'w') as f:
+        json.dump(data, f, separators=(',', ':'), ensure_ascii=False)
+    return os.path.getsize(path)
+
+
+def build_tiles(name: str, graph_file: str, directory: str) -> Dict:
+    """Lay out one knowledge graph and write its tiles; returns the written index."""
+    with open(graph_file, 'r') as f:
+        data = json.load(f)
+    nodes = data['nodes']
+    positions = layout_positions(nodes, data['links'])
+    position_of = {node['id']: i for i, node in enumerate(nodes)}
+    links = [(position_of[link['source']], position_of[link['target']], link.get('weight', 1))
+             for link in data['links'] if link['source'] in position_of and link['target'] in position_of]
+
+    pyramid = Pyramid(positions)
+    max_zoom = pyramid.max_zoom(len(nodes))
+    importance = [node.get('val', 1) for node in nodes]
+    zooms = node_zooms(pyramid, importance, max_zoom)
+    first_seen = link_zooms(pyramid, links, zooms, max_zoom)
+
+    tiles: Dict[TileKey, Dict[str, list]] = defaultdict(lambda: {'nodes': [], 'links': []})
+    for node, zoom in enumerate(zooms):
+        tiles[pyramid.tile(node, zoom)]['nodes'].append(node)
+    for index, zoom in enumerate(first_seen):
+        source, target, _ = links[index]
+        for tile in {pyramid.tile(source, zoom), pyramid.tile(target, zoom)}:
+            tiles[tile]['links'].append(index)
+
+    os.makedirs(directory, exist_ok=True)
+    for stale in glob.glob(os.path.join(directory, '*-*-*.json')):
+        os.remove(stale)
+
+    manifest = {}
+    for key in sorted(tiles):
+        members = tiles[key]
+        anchors = {}
+        for index in members['links']:
+            for end in links[index][:2]:
+                if pyramid.tile(end, key[0]) != key:
+                    anchors[nodes[end]['id']] = [*positions[end], importance[end]]
+        tile_name = '-'.join(map(str, key))
+        manifest[tile_name] = write_json(os.path.join(directory, f"{tile_name}.json"), {
+            'tile': list(key),
+            'nodes': [{**nodes[node], 'x': positions[node][0], 'y': positions[node][1]}
+                      for node in sorted(members['nodes'], key=lambda i: -importance[i])],
+            'links': [[nodes[links[index][0]]['id'], nodes[links[index][1]]['id'], links[index][2]]
+                      for index in sorted(members['links'], key=lambda i: -links[i][2])],
+            'anchors': anchors
+        })
+
+    order = sorted(range(len(nodes)), key=lambda i: (zooms[i], -importance[i]))
+    index = {
+        'version': VERSION,
+        'graph': name,
+        'bounds': {'x': pyramid.x, 'y': pyramid.y, 'size': pyramid.size},
+        'maxZoom': max_zoom,
+        'tileSize': TILE_SIZE,
+        'nodeBudget': TILE_NODE_BUDGET,
+        'linkBudget': TILE_LINK_BUDGET,
+        'nodeCount': len(nodes),
+        'linkCount': len(links),
+        'ranges': metric_ranges(nodes),
+        # Non-empty tiles only: "z-x-y" -> bytes
+        'tiles': manifest,
+        # Per topic, coarsest zoom first: id, x, y, zoom, subscriber_sum, pub_count
+        'topics': [[nodes[i]['id'], *positions[i], zooms[i], nodes[i].get('subscriber_sum', 0),
+                    nodes[i].get('pub_count', 0)] for i in order]
+    }
+    write_json(os.path.join(directory, 'index.json'), index)
+    return index
+
+
+def main():
+    """Main processing function."""
+
+    report = RunReport('preprocess_topic_tiles')
+
+    for name, graph_file in GRAPHS.items():
+        directory = os.path.join(OUTPUT_DIRECTORY, name)
+        with report.stage(name) as stage:
+            index = build_tiles(name, graph_file, directory)
+            stage.items = index['nodeCount']
+        largest = max(index['tiles'].values())
+        index_bytes = os.path.getsize(os.path.join(directory, 'index.json'))
+        print(f"{name}: {index['nodeCount']} topics, {index['linkCount']} links -> "
+              f"{len(index['tiles'])} tiles over zoom 0-{index['maxZoom']} "
+              f"(largest {largest / 1024:.0f} KB, index {index_bytes / 1024:.0f} KB) "
+              f"in {stage.seconds:.2f}s")
+
+    report.write(os.path.join(OUTPUT_DIRECTORY, 'index.json'))
+
+if __name__ == '__main__':
+    main()
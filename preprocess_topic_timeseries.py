@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Pack the per-topic monthly series in static/jsons/topic_explorer/timeseries/
+into one binary file the topic explorer reads with HTTP range requests.
+
+Outputs (static/jsons/topic_explorer/):
+
+- timeseries.bin: one section per granularity (month, quarter, year) plus a
+  sparkline section. Topics are laid out in the explorer's list order
+  (index.json), so the topics on one page of the table are adjacent and a
+  batch of them is a single byte range.
+- timeseries_index.json: section offsets and, per topic, the point range of
+  each granularity.
+
+Each topic block of a granularity section is columnar: int32 period (month:
+year * 12 + month - 1, quarter: year * 4 + quarter - 1, year: year), uint32
+post_count, then one float32 column per metric, so a block of n points is
+n * POINT_BYTES bytes. Quarter and year points are post-weighted means of the
+monthly averages, which is exact for per-post averages. The sparkline section
+holds, per topic, the last SPARKLINE_MONTHS months up to the latest month in
+the data (zero-filled), one float32 row per sparkline metric.
+
+All numbers are little-endian.
+"""
+
+import glob
+import json
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, List, Tuple
+
+from instrumentation import RunReport
+
+SOURCE_DIRECTORY = 'static/jsons/topic_explorer/timeseries'
+EXPLORER_INDEX_FILE = 'static/jsons/topic_explorer/index.json'
+OUTPUT_FILE = 'static/jsons/topic_explorer/timeseries.bin'
+INDEX_FILE = 'static/jsons/topic_explorer/timeseries_index.json'
+
+MAGIC = b'STTS'
+VERSION = 1
+ALIGNMENT = 8
+
+METRICS = ('avg_reactions', 'avg_comments', 'avg_restacks',
+           'avg_reactions_per_1k', 'avg_comments_per_1k', 'avg_restacks_per_1k')
+# period + post_count + metrics, 4 bytes each
+POINT_BYTES = 4 * (2 + len(METRICS))
+GRANULARITIES = ('month', 'quarter', 'year')
+
+SPARKLINE_MONTHS = 12
+SPARKLINE_METRICS = ('avg_reactions_per_1k', 'avg_comments_per_1k', 'avg_restacks_per_1k')
+
+
+def month_period(month: str) -> int:
+    """'2024-03' -> 2024 * 12 + 2"""
+    year, number = month.split('-')
+    return int(year) * 12 + int(number) - 1
+
+
+def format_month(period: int) -> str:
+    return f"{period // 12:04d}-{period % 12 + 1:02d}"
+
+
+def rollup(points: List[Tuple], group) -> List[Tuple]:
+    """
+    Aggregate (period, post_count, *metrics) points by group(period):
+    post counts add up, metrics are averaged weighted by post count.
+    """
+    totals: Dict[int, List[float]] = {}
+    for period, count, *values in points:
+        total = totals.setdefault(group(period), [0] * (1 + len(METRICS)))
+        total[0] += count
+        for i, value in enumerate(values, 1):
+            total[i] += value * count
+    return [(period, total[0], *(value / total[0] if total[0] else 0.0 for value in total[1:]))
+            for period, total in sorted(totals.items())]
+
+
+def _little_endian(data: array) -> array:
+    if sys.byteorder == 'big':
+        data = array(data.typecode, data)
+        data.byteswap()
+    return data
+
+
+def pack_block(points: List[Tuple]) -> bytes:
+    """One topic's points as columns: periods, post counts, then each metric."""
+    columns = [array('i', (point[0] for point in points)), array('I', (point[1] for point in points))]
+    columns += [array('f', (point[2 + i] for point in points)) for i in range(len(METRICS))]
+    return b''.join(_little_endian(column).tobytes() for column in columns)
+
+
+def pack_sparkline(points: List[Tuple], last_period: int) -> bytes:
+    """Dense last SPARKLINE_MONTHS months of the sparkline metrics, one row per metric."""
+    by_period = {point[0]: point for point in points}
+    first_period = last_period - SPARKLINE_MONTHS + 1
+    rows = []
+    for metric in SPARKLINE_METRICS:
+        column = 2 + METRICS.index(metric)
+        rows.append(array('f', (by_period[period][column] if period in by_period else 0.0
+                                for period in range(first_period, last_period + 1))))
+    return b''.join(_little_endian(row).tobytes() for row in rows)
+
+
+def load_series(directory: str = SOURCE_DIRECTORY) -> Dict[str, Dict]:
+    """slug -> {'topic': name, 'points': [(period, post_count, *metrics)]} sorted by period."""
+    series = {}
+    for path in sorted(glob.glob(os.path.join(directory, '*.json'))):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        points = sorted((month_period(point['month']), int(point.get('post_count') or 0),
+                         *(float(point.get(metric) or 0.0) for metric in METRICS))
+                        for point in data.get('series', []))
+        series[os.path.splitext(os.path.basename(path))[0]] = {'topic': data.get('topic'), 'points': points}
+    return series
+
+
+def explorer_order(slugs: List[str], index_file: str = EXPLORER_INDEX_FILE) -> List[str]:
+    """Slugs in the explorer's topic list order, then any remaining ones alphabetically."""
+    ordered = []
+    if os.path.exists(index_file):
+        with open(index_file, 'r') as f:
+            explorer_index = json.load(f)
+        known = set(slugs)
+        for topic in explorer_index.get('co_occurrence', {}).get('topics', []):
+            slug = slugify(str(topic.get('id', '')))
+            if slug in known and slug not in ordered:
+                ordered.append(slug)
+    listed = set(ordered)
+    return ordered + sorted(slug for slug in slugs if slug not in listed)
+
+
+def slugify(text: str) -> str:
+    """Same slug the timeseries files are named by (see Sparkline.svelte)."""
+    slug = ''.join(ch if 'a' <= ch <= 'z' or '0' <= ch <= '9' else '-' for ch in text.lower())
+    return '-'.join(part for part in slug.split('-') if part)
+
+
+def main():
+    """Main processing function."""
+
+    report = RunReport('preprocess_topic_timeseries')
+
+    print("Loading data files...")
+    with report.stage('load') as stage:
+        series = load_series()
+        stage.items = sum(len(entry['points']) for entry in series.values())
+    if not series:
+        print(f"No series found in {SOURCE_DIRECTORY}/")
+        return
+    print(f"Loaded {len(series)} topics with {stage.items} monthly points")
+
+    order = explorer_order(list(series))
+    last_period = max(point[0] for entry in series.values() for point in entry['points'])
+
+    with report.stage('rollup') as stage:
+        levels = {
+            'month': {slug: series[slug]['points'] for slug in order},
+            'quarter': {slug: rollup(series[slug]['points'], lambda p: (p // 12) * 4 + (p % 12) // 3)
+                        for slug in order},
+            'year': {slug: rollup(series[slug]['points'], lambda p: p // 12) for slug in order},
+        }
+        stage.items = sum(len(points) for level in levels.values() for points in level.values())
+
+    with report.stage('pack') as stage:
+        buffers = [MAGIC, struct.pack('<I', VERSION)]
+        position = len(MAGIC) + 4
+        sections = {}
+        ranges: Dict[str, List[int]] = {slug: [] for slug in order}
+
+        def align() -> None:
+            nonlocal position
+            padding = -position % ALIGNMENT
+            buffers.append(b'\0' * padding)
+            position += padding
+
+        for granularity in GRANULARITIES:
+            align()
+            sections[granularity] = {'offset': position, 'points': 0}
+            for slug in order:
+                points = levels[granularity][slug]
+                ranges[slug] += [sections[granularity]['points'], len(points)]
+                block = pack_block(points)
+                buffers.append(block)
+                position += len(block)
+                sections[granularity]['points'] += len(points)
+
+        align()
+        stride = 4 * SPARKLINE_MONTHS * len(SPARKLINE_METRICS)
+        sections['sparkline'] = {
+            'offset': position,
+            'stride': stride,
+            'months': SPARKLINE_MONTHS,
+            'end': format_month(last_period),
+            'metrics': list(SPARKLINE_METRICS)
+        }
+        for slug in order:
+            buffers.append(pack_sparkline(series[slug]['points'], last_period))
+            position += stride
+
+        with open(OUTPUT_FILE, 'wb') as f:
+            for buffer in buffers:
+                f.write(buffer)
+        stage.items = position
+
+    index = {
+        'version': VERSION,
+        'file': os.path.basename(OUTPUT_FILE),
+        'bytes': position,
+        'pointBytes': POINT_BYTES,
+        'metrics': list(METRICS),
+        'sections': sections,
+        # Per topic, in file order: slug, topic name, then [start, count] points per granularity
+        'topics': [[slug, series[slug]['topic'], *ranges[slug]] for slug in order]
+    }
+    with open(INDEX_FILE, 'w') as f:
+        json.dump(index, f, separators=(',', ':'))
+
+    print(f"Packed {len(order)} topics into {OUTPUT_FILE} ({position / 1024:.0f} KB), "
+          f"index {os.path.getsize(INDEX_FILE) / 1024:.0f} KB")
+    print(f"Sparklines cover {format_month(last_period - SPARKLINE_MONTHS + 1)} to {format_month(last_period)}")
+    report.write(OUTPUT_FILE)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Canonical publication ID resolver.
+Builds an alias index once from the subdomain, custom_domain and slug fields
+in subscriber_counts.json and resolves each distinct raw URL only once
+through a memoized cache, so joins cost O(1) per edge.
+"""
+
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+from graph_engine import ID_TYPECODE
+
+
+def normalize_host(url: str) -> str:
+    """Reduce a raw URL or bare domain to a lowercase host without www. or path."""
+    host = url.strip().lower()
+    if '://' in host:
+        host = host.split('://', 1)[1]
+    host = host.split('/', 1)[0].split('?', 1)[0].split(':', 1)[0]
+    if host.startswith('www.'):
+        host = host[4:]
+    return host
+
+
+def extract_publication_identifier(url: str) -> str:
+    """Extract the key identifier from a publication URL.
+
+    Examples:
+    - https://lenny.substack.com -> lenny
+    - https://lenny.com -> lenny
+    - https://www.lennysnewsletter.com -> lennysnewsletter
+    - https://yourlocalepidemiologist.substack.com -> yourlocalepidemiologist
+    - https://fixthenews.com -> fixthenews
+    """
+    # Remove protocol
+    url = url.replace('https://', '').replace('http://', '')
+
+    # Split by dots to get domain parts
+    parts = url.split('.')
+
+    if len(parts) >= 2:
+        # If it's a substack.com subdomain, return the subdomain
+        if len(parts) >= 3 and parts[-2] == 'substack' and parts[-1] == 'com':
+            return parts[0]  # e.g., "lenny" from "lenny.substack.com"
+        else:
+            # For custom domains, handle www prefix and extract main domain name
+            if parts[0] == 'www' and len(parts) >= 3:
+                # e.g., "lennysnewsletter" from "www.lennysnewsletter.com"
+                return parts[1]
+            else:
+                # e.g., "lenny" from "lenny.com" or "fixthenews" from "fixthenews.com"
+                return parts[0]
+
+    # Fallback: return the whole thing if we can't parse it
+    return url
+
+
+class PublicationResolver:
+    """
+    Resolve raw publication URLs to the canonical publication_url.
+
+    Every publication's own publication_url host is registered first, then
+    its aliases (custom_domain, <subdomain>.substack.com, <slug>.substack.com),
+    so an alias never takes over another publication's canonical host. An
+    alias claimed by several publications goes to the first one that is
+    hosted at its own custom_domain or subdomain (contributor records carry
+    the author handle as slug and the publication they write for as
+    subdomain/custom_domain), else to the first claimant; every contested
+    alias is recorded in `conflicts`, owner first. Hosts that are not in the
+    index fall back to the bare identifier (see
+    extract_publication_identifier), but only when exactly one publication
+    has that identifier, so lenny.com and lenny.substack.com no longer
+    collide.
+    """
+
+    def __init__(self, publications: Iterable[Dict]) -> None:
+        self.urls: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.conflicts: Dict[str, List[str]] = {}
+        self._cache: Dict[str, int] = {}
+
+        aliases = []
+        self_hosted = set()
+        for item in publications:
+            url = item.get('publication_url')
+            if not url:
+                continue
+            host = normalize_host(url)
+            if host in self.index:
+                continue  # repeated publication
+            pub_id = len(self.urls)
+            self.urls.append(url)
+            self.index[host] = pub_id
+
+            if item.get('custom_domain'):
+                aliases.append((normalize_host(item['custom_domain']), pub_id))
+            for field in ('subdomain', 'slug'):
+                if item.get(field):
+                    aliases.append((f"{item[field].lower()}.substack.com", pub_id))
+            if host in (normalize_host(item.get('custom_domain') or ''),
+                        f"{(item.get('subdomain') or '').lower()}.substack.com"):
+                self_hosted.add(pub_id)
+
+        claims: Dict[str, List[int]] = {}
+        for host, pub_id in aliases:
+            claimants = claims.setdefault(host, [])
+            if pub_id not in claimants:
+                claimants.append(pub_id)
+
+        for host, claimants in claims.items():
+            owner = self.index.get(host)
+            if owner is None:
+                owner = next((pub_id for pub_id in claimants if pub_id in self_hosted), claimants[0])
+                self.index[host] = owner
+            others = [pub_id for pub_id in claimants if pub_id != owner]
+            if others:
+                self.conflicts[host] = [self.urls[owner]] + [self.urls[pub_id] for pub_id in others]
+
+        # Identifier fallback, restricted to identifiers owned by a single publication
+        owners: Dict[str, int] = {}
+        ambiguous = set()
+        for host, pub_id in self.index.items():
+            identifier = extract_publication_identifier(host)
+            if owners.setdefault(identifier, pub_id) != pub_id:
+                ambiguous.add(identifier)
+        self.identifier_index = {k: v for k, v in owners.items() if k not in ambiguous}
+
+    @classmethod
+    def from_index(cls, urls: Iterable[str], index: Dict[str, int],
+                   identifier_index: Dict[str, int]) -> 'PublicationResolver':
+        """Resolver over an alias index built earlier (see graph_snapshot); conflicts are not kept."""
+        resolver = cls(())
+        resolver.urls = list(urls)
+        resolver.index = index
+        resolver.identifier_index = identifier_index
+        return resolver
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def resolve_id(self, raw_url: str) -> int:
+        """Publication index for a raw URL, or -1 if it is not a known publication."""
+        pub_id = self._cache.get(raw_url)
+        if pub_id is None:
+            host = normalize_host(raw_url)
+            pub_id = self.index.get(host)
+            if pub_id is None:
+                pub_id = self.identifier_index.get(extract_publication_identifier(host), -1)
+            self._cache[raw_url] = pub_id
+        return pub_id
+
+    def resolve(self, raw_url: str) -> Optional[str]:
+        """Canonical publication_url for a raw URL, or None if it is unknown."""
+        pub_id = self.resolve_id(raw_url)
+        return self.urls[pub_id] if pub_id >= 0 else None
+
+    def canonical_url(self, raw_url: str) -> str:
+        """Canonical publication_url if known, otherwise the normalized https:// URL."""
+        pub_id = self.resolve_id(raw_url)
+        return self.urls[pub_id] if pub_id >= 0 else f"https://{normalize_host(raw_url)}"
+
+    def resolve_ids(self, raw_urls: Iterable[str]) -> array:
+        """Batch-resolve a whole URL column to publication indices (-1 for unknown)."""
+        return array(ID_TYPECODE, map(self.resolve_id, raw_urls))
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+In-memory merge of subscriber_counts.json with recommendation counts into
+publications_merged.json, the leaderboard data imported by the home route.
+Publication records are deduplicated by URL and projected onto the declared
+columns as they stream past, then hash-joined against the counts computed in
+the same run, so nothing is reparsed from an intermediate file.
+"""
+
+import os
+import shutil
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from json_stream import write_json_object
+
+MERGED_OUTPUTS = ['static/jsons/publications_merged.json', 'src/lib/files/publications_merged.json']
+
+# Columns the routes read (src/routes/+page.svelte); the rest of each record is dropped
+MERGED_COLUMNS = (
+    'publication_url',
+    'name',
+    'subscriber_count',
+    'leaderboard_category',
+    'payments_enabled',
+    'incoming_recommendations',
+    'outgoing_recommendations',
+)
+
+# Columns supplied by the join rather than by subscriber_counts.json
+COUNT_COLUMNS = ('incoming_recommendations', 'outgoing_recommendations', 'total_recommendations',
+                 'recommendation_count')
+
+
+class PublicationTable:
+    """Deduplicated publication rows, projected onto the publication-side columns."""
+
+    def __init__(self, columns: Sequence[str] = MERGED_COLUMNS) -> None:
+        self.columns = tuple(columns)
+        self.source_columns = tuple(column for column in self.columns if column not in COUNT_COLUMNS)
+        self.rows: Dict[str, Tuple] = {}
+        self.categories = set()
+        self.board_types = set()
+        self.duplicates = 0
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def load(self, items: Iterable[Dict]) -> None:
+        """Fill the table from records no other consumer needs."""
+        for _ in self.collect(items):
+            pass
+
+    def collect(self, items: Iterable[Dict]) -> Iterator[Dict]:
+        """
+        Pass records through unchanged while keeping the first row per
+        publication URL, so the table fills during another consumer's scan.
+        """
+        for item in items:
+            url = item.get('publication_url')
+            if url:
+                if url in self.rows:
+                    self.duplicates += 1
+                else:
+                    self.rows[url] = tuple(item.get(column) for column in self.source_columns)
+                    if item.get('category'):
+                        self.categories.add(item['category'])
+                    if item.get('board'):
+                        self.board_types.add(item['board'])
+            yield item
+
+    def update(self, url: str, column: str, value) -> None:
+        """Set one projected column of a publication's row (ignored if the column is not kept)."""
+        if url in self.rows and column in self.source_columns:
+            row = list(self.rows[url])
+            row[self.source_columns.index(column)] = value
+            self.rows[url] = tuple(row)
+
+    def merge(self, incoming: Dict[str, int], outgoing: Dict[str, int]) -> Iterator[Dict]:
+        """Hash join every row with its counts (zero when a publication has none)."""
+        for url, row in self.rows.items():
+            record = dict(zip(self.source_columns, row))
+            counts = {
+                'incoming_recommendations': incoming.get(url, 0),
+                'outgoing_recommendations': outgoing.get(url, 0),
+                'total_recommendations': incoming.get(url, 0) + outgoing.get(url, 0),
+                'recommendation_count': outgoing.get(url, 0)
+            }
+            yield {column: record[column] if column in record else counts[column] for column in self.columns}
+
+    def stats(self) -> Dict:
+        return {
+            'total': len(self.rows),
+            'validCount': len(self.rows),
+            'invalidCount': 0,
+            'categories': sorted(self.categories),
+            'boardTypes': sorted(self.board_types)
+        }
+
+
+def write_merged_publications(table: PublicationTable, incoming: Dict[str, int], outgoing: Dict[str, int],
+                              outputs: List[str] = MERGED_OUTPUTS) -> int:
+    """
+    Stream the merged publications to the first output and copy it to the
+    others (static for runtime fetch, src/lib for build-time import).
+    Returns the number of publications written.
+    """
+    for path in outputs:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    count = write_json_object(outputs[0], {
+        'publications': table.merge(incoming, outgoing),
+        'stats': table.stats
+    })['publications']
+    for path in outputs[1:]:
+        shutil.copyfile(outputs[0], path)
+    return count
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Publish the served data files as immutable, precompressed assets.
+Every published file is minified (JSON) and copied to
+static/jsons/immutable/ under a content-hashed name, with .gz and .br
+siblings compressed at maximum level, and manifest.json maps each logical
+name (its path under static/jsons) to the hashed file. Since a hashed name
+never changes content, it can be cached forever (see static/_headers).
+
+The .br siblings need the optional brotli package; without it only .gz
+siblings are written.
+"""
+
+import glob
+import gzip
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+
+from instrumentation import RunReport
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+SOURCE_DIRECTORY = 'static/jsons'
+ASSET_DIRECTORY = 'static/jsons/immutable'
+MANIFEST_FILE = 'static/jsons/manifest.json'
+HASH_LENGTH = 12
+
+# Served files to publish, relative to SOURCE_DIRECTORY. The sharded outputs
+# (graph_data_lod, graph_data_ego, search, topics/tiles) reference their shards
+# by name and are served as they are.
+ASSET_PATTERNS = [
+    'graph_data_optimized.json',
+    'graph_data_optimized.bin',
+    'category_graph_data_optimized.json',
+    'categories.json',
+    'recommendation_counts.json',
+    'publications_merged.json',
+    'bipartite_network.json',
+    'topics/*.json',
+    'topics_meta/*.json',
+    'topic_explorer/*.json',
+    'topic_explorer/timeseries/*.json',
+]
+
+
+def asset_sources(patterns: List[str] = ASSET_PATTERNS) -> List[str]:
+    """Logical names of the files matching patterns, sorted."""
+    found = set()
+    for pattern in patterns:
+        for path in glob.glob(os.path.join(SOURCE_DIRECTORY, pattern)):
+            found.add(os.path.relpath(path, SOURCE_DIRECTORY).replace(os.sep, '/'))
+    return sorted(found)
+
+
+def minify(name: str, data: bytes) -> bytes:
+    """Minified bytes of a JSON file; other files are returned unchanged."""
+    if not name.endswith('.json'):
+        return data
+    value = json.loads(data)
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def hashed_name(name: str, data: bytes) -> str:
+    """'topics/knowledge_graph.json' -> 'topics/knowledge_graph.<hash>.json'"""
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    stem, extension = os.path.splitext(name)
+    return f"{stem}.{digest}{extension}"
+
+
+def compress(suffix: str, data: bytes) -> Optional[bytes]:
+    """
+    Maximum-level gzip (with a fixed mtime, so output is reproducible) or
+    brotli encoding of data; None when brotli is not installed.
+    """
+    if suffix == '.gz':
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    return brotli.compress(data, quality=11) if brotli else None
+
+
+def write_if_changed(path: str, data: bytes) -> bool:
+    """Write data unless the file already holds it (hashed names are usually unchanged)."""
+    if os.path.exists(path) and os.path.getsize(path) == len(data):
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return True
+
+
+def publish(names: List[str]) -> Dict[str, Dict]:
+    """Write the hashed and compressed copies of every logical name; returns the manifest assets."""
+    assets = {}
+    for name in names:
+        with open(os.path.join(SOURCE_DIRECTORY, name), 'rb') as f:
+            data = minify(name, f.read())
+        target = hashed_name(name, data)
+        entry = {'file': f"immutable/{target}", 'bytes': len(data)}
+        changed = write_if_changed(os.path.join(ASSET_DIRECTORY, target), data)
+        for suffix, key in (('.gz', 'gzip_bytes'), ('.br', 'br_bytes')):
+            path = os.path.join(ASSET_DIRECTORY, target + suffix)
+            if changed or not os.path.exists(path):
+                encoded = compress(suffix, data)
+                if encoded is not None:
+                    write_if_changed(path, encoded)
+            if os.path.exists(path):
+                entry[key] = os.path.getsize(path)
+        assets[name] = entry
+    return assets
+
+
+def remove_stale(assets: Dict[str, Dict]) -> int:
+    """Delete hashed files no longer referenced by the manifest; returns how many were removed."""
+    keep = set()
+    for entry in assets.values():
+        path = os.path.join(SOURCE_DIRECTORY, entry['file'])
+        keep.update({path, path + '.gz', path + '.br'})
+    removed = 0
+    for path in glob.glob(os.path.join(ASSET_DIRECTORY, '**', '*'), recursive=True):
+        if os.path.isfile(path) and path not in keep:
+            os.remove(path)
+            removed += 1
+    return removed
+
+
+def main():
+    """Main processing function."""
+
+    report = RunReport('publish_assets')
+    if not brotli:
+        print("brotli is not installed; writing .gz siblings only, .br output is skipped (pip install brotli)")
+
+    with report.stage('publish') as stage:
+        names = asset_sources()
+        assets = publish(names)
+        stage.items = len(assets)
+
+    with report.stage('clean') as stage:
+        stage.items = remove_stale(assets)
+
+    manifest = {
+        'version': 1,
+        'hash': f"sha256:{HASH_LENGTH}",
+        'encodings': ['br', 'gzip'] if brotli else ['gzip'],
+        'assets': assets
+    }
+    with open(MANIFEST_FILE, 'w') as f:
+        json.dump(manifest, f, separators=(',', ':'))
+
+    total = sum(entry['bytes'] for entry in assets.values())
+    total_gzip = sum(entry.get('gzip_bytes', 0) for entry in assets.values())
+    report.count('assets', len(assets))
+    report.count('bytes', total)
+    report.count('gzip_bytes', total_gzip)
+    report.count('br_skipped', sum(1 for entry in assets.values() if 'br_bytes' not in entry))
+    report.count('stale_removed', stage.items)
+    report_file = report.write(MANIFEST_FILE)
+
+    print(f"Published {len(assets)} assets to {ASSET_DIRECTORY}/")
+    print(f"Manifest saved to: {MANIFEST_FILE}")
+    print(f"Run report saved to: {report_file}")
+    print(f"Minified: {total / 1024 / 1024:.2f} MB, gzip: {total_gzip / 1024 / 1024:.2f} MB")
+    if not brotli:
+        print(f"Skipped .br siblings for {report.counters['br_skipped']} assets (brotli is not installed)")
+
+if __name__ == '__main__':
+    main()
@@ -23,6 +23,13 @@ export interface GraphNode {
   is_bestseller: boolean;
   color?: string;
   val?: number; // Node size based on subscriber count
+  // Graph analytics (preprocess_graph_data.py)
+  group?: string; // Level-of-detail cluster ('cluster-<id>', as the cluster stand-ins)
+  role?: string;
+  community?: number;
+  pagerank?: number;
+  hub?: number;
+  authority?: number;
 }
 
 export interface GraphLink {
@@ -58,6 +65,9 @@ export interface NodeT {
   id: string;
   x?: number;
   y?: number;
+  // Offline 2D layout position (preprocess_graph_data.py)
+  x2d?: number;
+  y2d?: number;
   fx?: number | null;
   fy?: number | null;
   val?: number;
@@ -77,6 +87,9 @@ export interface NodeT {
   post_count?: number;
   // Knowledge graph properties
   topic_type?: string;
+  // Stand-in for a collapsed level-of-detail cluster (graphLod.ts)
+  cluster?: number;
+  size?: number;
 }
 
 export interface LinkT {
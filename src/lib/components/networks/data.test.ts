@@ -5,9 +5,11 @@ import {
   calculateNodePositions,
   createEdges,
   bundleEdges,
-  calculateEdgeStatistics
+  calculateEdgeStatistics,
+  hydrateNetwork,
+  bsplinePath
 } from './data.js';
-import type { Publication, Recommendation, ProcessedNode } from './types.js';
+import type { Publication, Recommendation, ProcessedNode, PrecomputedNetwork } from './types.js';
 
 describe('Node Processing Utilities', () => {
   const mockPublications: Publication[] = [
@@ -282,4 +284,43 @@ describe('Node Processing Utilities', () => {
       });
     });
   });
-});
\ No newline at end of file
+});
+
+describe('Precomputed network', () => {
+  const network: PrecomputedNetwork = {
+    nodes: [
+      { id: 'https://a.substack.com', name: 'A', category: 'Newsletter', subscriber_count: 1000, x: 200, y: 80, nodeType: 'dual' },
+      { id: 'https://b.com', name: 'B', category: 'Website', subscriber_count: null, x: 600, y: 80, nodeType: 'recommendation' }
+    ],
+    edges: [
+      [0, 1, 0.6, [80, 80]],
+      [1, 0, 0.6, []]
+    ],
+    statistics: { totalEdges: 2, averageStrength: 0.6, maxConnectionsPerNode: 2, nodesWithMultipleConnections: 2 },
+    metadata: { width: 800, height: 160, left_nodes: 1, right_nodes: 1 }
+  };
+
+  it('resolves node indexes and derives side and group', () => {
+    const layout = hydrateNetwork(network);
+    expect(layout.nodes.map((n) => [n.side, n.group])).toEqual([
+      ['left', 'dual-role'],
+      ['right', 'recommendation-only']
+    ]);
+    expect(layout.edges[0].source.id).toBe('https://a.substack.com');
+    expect(layout.edges[0].target.id).toBe('https://b.com');
+    expect(layout.edges[0].path).toBe('M 200 80 C 260 80, 540 80, 600 80');
+  });
+
+  it('draws bundled edges through their waypoints and leaves the others plain', () => {
+    const layout = hydrateNetwork(network);
+    expect(layout.edges[0].bundledPath.startsWith('M 200 80 C ')).toBe(true);
+    expect(layout.edges[0].bundledPath.endsWith(', 600 80')).toBe(true);
+    expect(layout.edges[1].bundledPath).toBe(layout.edges[1].path);
+  });
+
+  it('starts and ends the B-spline on the end control points', () => {
+    expect(bsplinePath([[0, 0], [30, 30], [60, 0]])).toBe(
+      'M 0 0 C 0 0, 0 0, 5 5 C 10 10, 20 20, 30 20 C 40 20, 50 10, 55 5 C 60 0, 60 0, 60 0'
+    );
+  });
+});
@@ -1,4 +1,13 @@
-import type { Publication, Recommendation, ProcessedNode, Edge } from './types.js';
+import type {
+  Publication,
+  Recommendation,
+  ProcessedNode,
+  Edge,
+  PrecomputedNetwork,
+  NetworkLayout,
+  NetworkNode,
+  NetworkEdge
+} from './types.js';
 
 // Temporary interface extensions to allow null subscriber_count until types.ts is updated
 interface PublicationWithNullableSubscriberCount extends Omit<Publication, 'subscriber_count'> {
@@ -91,6 +100,90 @@ export async function loadRecommendationData(): Promise<{
   }
 }
 
+// Load the layout, bundling waypoints and statistics precomputed by preprocess_bipartite_network.py
+export async function loadPrecomputedNetwork(fetchFn: typeof fetch = fetch): Promise<NetworkLayout> {
+  const response = await fetchFn('/jsons/bipartite_network.json');
+  if (!response.ok) {
+    throw new Error(`Failed to load precomputed network: ${response.status}`);
+  }
+  return hydrateNetwork(await response.json());
+}
+
+/**
+ * Resolve the node indexes of a precomputed network and build the SVG paths of its edges
+ * @param network Network as written by preprocess_bipartite_network.py
+ * @returns Nodes with side and group, edges with node objects, plain and bundled paths
+ */
+export function hydrateNetwork(network: PrecomputedNetwork): NetworkLayout {
+  const nodes: NetworkNode[] = network.nodes.map((node, index) => ({
+    ...node,
+    side: index < network.metadata.left_nodes ? 'left' : 'right',
+    group: node.nodeType === 'dual' ? 'dual-role' : node.nodeType === 'bestseller' ? 'bestseller' : 'recommendation-only'
+  }));
+
+  const edges: NetworkEdge[] = network.edges.map(([sourceIndex, targetIndex, strength, waypoints], index) => {
+    const source = nodes[sourceIndex];
+    const target = nodes[targetIndex];
+    const path = generateCurvedPath(source, target);
+    return {
+      id: `edge-${index}`,
+      source,
+      target,
+      path,
+      bundledPath: waypoints.length > 0 ? bundledPath(source, target, waypoints) : path,
+      strength
+    };
+  });
+
+  return { nodes, edges, statistics: network.statistics, metadata: network.metadata };
+}
+
+/**
+ * Draw a bundled edge: the control polygon runs from the source through the waypoints,
+ * evenly spaced in x, to the target, as bundled_control_points in bipartite_layout.py
+ * @param source Source node position
+ * @param target Target node position
+ * @param waypoints y of each interior control point
+ * @returns SVG path of the cubic B-spline over the control polygon
+ */
+export function bundledPath(
+  source: { x: number; y: number },
+  target: { x: number; y: number },
+  waypoints: number[]
+): string {
+  const span = target.x - source.x;
+  const points: [number, number][] = [
+    [source.x, source.y],
+    ...waypoints.map((y, i): [number, number] => [source.x + (span * (i + 1)) / (waypoints.length + 1), y]),
+    [target.x, target.y]
+  ];
+  return bsplinePath(points);
+}
+
+/**
+ * SVG path of the clamped uniform cubic B-spline over the control points: endpoints are
+ * repeated three times so the curve starts and ends on them, and each span is emitted as
+ * one cubic Bezier segment
+ * @param points Control polygon
+ * @returns SVG path string
+ */
+export function bsplinePath(points: [number, number][]): string {
+  const fmt = (value: number) => String(Number(value.toFixed(1)));
+  const first = points[0];
+  const last = points[points.length - 1];
+  const padded = [first, first, ...points, last, last];
+  const parts = [`M ${fmt(first[0])} ${fmt(first[1])}`];
+  for (let i = 1; i < padded.length - 2; i++) {
+    const [[bx, by], [cx, cy], [dx, dy]] = padded.slice(i, i + 3);
+    parts.push(
+      `C ${fmt((2 * bx + cx) / 3)} ${fmt((2 * by + cy) / 3)}, ` +
+        `${fmt((bx + 2 * cx) / 3)} ${fmt((by + 2 * cy) / 3)}, ` +
+        `${fmt((bx + 4 * cx + dx) / 6)} ${fmt((by + 4 * cy + dy) / 6)}`
+    );
+  }
+  return parts.join(' ');
+}
+
 // Extract a readable name from the publication URL
 function extractPublicationName(url: string): string {
   try {
@@ -457,7 +550,7 @@ function calculateConnectionStrength(sourceNode: ProcessedNodeWithNullableSubscr
  * @param targetNode Target node position
  * @returns SVG path string for curved connection
  */
-function generateCurvedPath(sourceNode: ProcessedNodeWithNullableSubscriberCount, targetNode: ProcessedNodeWithNullableSubscriberCount): string {
+function generateCurvedPath(sourceNode: { x: number; y: number }, targetNode: { x: number; y: number }): string {
   const x1 = sourceNode.x;
   const y1 = sourceNode.y;
   const x2 = targetNode.x;
@@ -1,11 +1,17 @@
 // Network components exports
 export { default as NetworkGraph } from './NetworkGraph.svelte';
-export { loadRecommendationData } from './data.js';
+export { loadRecommendationData, loadPrecomputedNetwork, hydrateNetwork } from './data.js';
 export type {
   Publication,
   Recommendation,
   ProcessedNode,
   Edge,
   LayoutConfig,
-  NetworkGraphProps
+  NetworkGraphProps,
+  PrecomputedNode,
+  PrecomputedEdge,
+  PrecomputedNetwork,
+  NetworkNode,
+  NetworkEdge,
+  NetworkLayout
 } from './types.js';
\ No newline at end of file
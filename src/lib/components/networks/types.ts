@@ -52,8 +52,56 @@ export interface LayoutConfig {
 }
 
 export interface NetworkGraphProps {
-  publications: Publication[];
-  recommendations: Recommendation[];
-  width?: number;
-  height?: number;
-}
\ No newline at end of file
+  network: NetworkLayout;
+  bundled?: boolean;
+}
+
+// Precomputed layout written by preprocess_bipartite_network.py
+export type PrecomputedNode = Omit<ProcessedNode, 'subscriber_count' | 'side' | 'group'> & {
+  subscriber_count: number | null;
+};
+
+// [source node index, target node index, strength, waypoints]: waypoints are the y of the
+// bundled route's interior control points, evenly spaced in x (empty for unbundled edges)
+export type PrecomputedEdge = [number, number, number, number[]];
+
+export interface NetworkStatistics {
+  totalEdges: number;
+  averageStrength: number;
+  maxConnectionsPerNode: number;
+  nodesWithMultipleConnections: number;
+}
+
+export interface NetworkMetadata {
+  width: number;
+  height: number;
+  left_nodes: number;
+  right_nodes: number;
+  [key: string]: unknown;
+}
+
+export interface PrecomputedNetwork {
+  nodes: PrecomputedNode[];
+  edges: PrecomputedEdge[];
+  statistics: NetworkStatistics;
+  metadata: NetworkMetadata;
+}
+
+// PrecomputedNetwork with node objects on the edges and drawable paths
+export type NetworkNode = Omit<ProcessedNode, 'subscriber_count'> & { subscriber_count: number | null };
+
+export interface NetworkEdge {
+  id: string;
+  source: NetworkNode;
+  target: NetworkNode;
+  path: string; // SVG path data, as generateCurvedPath
+  bundledPath: string; // SVG path data after hierarchical edge bundling
+  strength: number;
+}
+
+export interface NetworkLayout {
+  nodes: NetworkNode[];
+  edges: NetworkEdge[];
+  statistics: NetworkStatistics;
+  metadata: NetworkMetadata;
+}
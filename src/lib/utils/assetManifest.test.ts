@@ -0,0 +1,44 @@
+import { describe, it, expect, vi } from 'vitest';
+import { createAssetResolver } from './assetManifest.js';
+
+const manifest = {
+	version: 1,
+	hash: 'sha256:12',
+	encodings: ['gzip'],
+	assets: {
+		'categories.json': { file: 'immutable/categories.15cb63fe580f.json', bytes: 5851, gzip_bytes: 1235 }
+	}
+};
+
+describe('createAssetResolver', () => {
+	it('resolves logical names to hashed files and fetches the manifest once', async () => {
+		const fetchFn = vi.fn(async () => ({ ok: true, status: 200, json: async () => manifest }) as Response);
+		const resolver = createAssetResolver(fetchFn as unknown as typeof fetch);
+
+		expect(await resolver.resolve('categories.json')).toBe('/jsons/immutable/categories.15cb63fe580f.json');
+		expect(await resolver.resolve('topics/other.json')).toBe('/jsons/topics/other.json');
+		expect(fetchFn).toHaveBeenCalledTimes(1);
+	});
+
+	it('falls back to unhashed files without a manifest', async () => {
+		const fetchFn = vi.fn(async () => ({ ok: false, status: 404 }) as Response);
+		const resolver = createAssetResolver(fetchFn as unknown as typeof fetch);
+
+		expect(await resolver.resolve('categories.json')).toBe('/jsons/categories.json');
+	});
+
+	it('routes data URLs through the manifest and leaves other URLs alone', async () => {
+		const fetchFn = vi.fn(async (url: string) => ({ ok: true, status: 200, json: async () => manifest, url }) as unknown as Response);
+		const resolver = createAssetResolver(fetchFn as unknown as typeof fetch);
+
+		await resolver.fetch('/jsons/categories.json');
+		await resolver.fetch('/jsons/graph_data_lod/index.json');
+		await resolver.fetch('/api/other');
+		expect(fetchFn.mock.calls.map(([url]) => url)).toEqual([
+			'/jsons/manifest.json',
+			'/jsons/immutable/categories.15cb63fe580f.json',
+			'/jsons/graph_data_lod/index.json',
+			'/api/other'
+		]);
+	});
+});
@@ -0,0 +1,55 @@
+// Resolve data files to the content-hashed copies listed in manifest.json (written by publish_assets.py).
+// Hashed files are immutable and cached for a year; the manifest itself is always revalidated.
+
+export const ASSET_BASE_URL = '/jsons';
+
+export interface AssetEntry {
+	/** Hashed file, relative to the base URL */
+	file: string;
+	bytes: number;
+	gzip_bytes?: number;
+	br_bytes?: number;
+}
+
+export interface AssetManifest {
+	version: number;
+	hash: string;
+	encodings: string[];
+	/** Logical name (path under /jsons) -> hashed asset */
+	assets: Record<string, AssetEntry>;
+}
+
+/**
+ * Create a resolver bound to a fetch function. The manifest is fetched once;
+ * names missing from it (or a missing manifest) resolve to the unhashed file.
+ */
+export function createAssetResolver(fetchFn: typeof fetch, baseUrl: string = ASSET_BASE_URL) {
+	let manifest: Promise<AssetManifest | null> | null = null;
+
+	function loadManifest(): Promise<AssetManifest | null> {
+		if (!manifest) {
+			manifest = fetchFn(`${baseUrl}/manifest.json`)
+				.then((response) => (response.ok ? response.json() : null))
+				.catch(() => null);
+		}
+		return manifest;
+	}
+
+	/** URL to fetch for a logical name such as 'topics/knowledge_graph.json' */
+	async function resolve(name: string): Promise<string> {
+		const entry = (await loadManifest())?.assets[name];
+		return `${baseUrl}/${entry ? entry.file : name}`;
+	}
+
+	async function fetchAsset(name: string, init?: RequestInit): Promise<Response> {
+		return fetchFn(await resolve(name), init);
+	}
+
+	/** Drop-in fetch for the data loaders: URLs under the base URL go through the manifest */
+	const fetchWithManifest = ((input: RequestInfo | URL, init?: RequestInit) =>
+		typeof input === 'string' && input.startsWith(`${baseUrl}/`)
+			? fetchAsset(input.slice(baseUrl.length + 1), init)
+			: fetchFn(input, init)) as typeof fetch;
+
+	return { loadManifest, resolve, fetchAsset, fetch: fetchWithManifest };
+}
@@ -0,0 +1,91 @@
+import { describe, it, expect } from 'vitest';
+import { parseColumnarGraph, toGraphData } from './columnarGraph.js';
+
+// Build a file the same way graph_columnar.py does: magic, version, header, 8-byte aligned body
+function buildFile(header: Record<string, any>, buffers: ArrayBufferView[]): ArrayBuffer {
+	const encoder = new TextEncoder();
+	let headerBytes = encoder.encode(JSON.stringify(header));
+	const padding = (8 - ((12 + headerBytes.length) % 8)) % 8;
+	headerBytes = encoder.encode(JSON.stringify(header) + ' '.repeat(padding));
+
+	const bodyLength = buffers.reduce((end, b) => Math.ceil(end / 8) * 8 + b.byteLength, 0);
+	const out = new Uint8Array(12 + headerBytes.length + bodyLength);
+	out.set(encoder.encode('SGCB'), 0);
+	const prefix = new DataView(out.buffer, 4, 8);
+	prefix.setUint32(0, 1, true);
+	prefix.setUint32(4, headerBytes.length, true);
+	out.set(headerBytes, 12);
+
+	let offset = 0;
+	for (const b of buffers) {
+		offset = Math.ceil(offset / 8) * 8;
+		out.set(new Uint8Array(b.buffer, b.byteOffset, b.byteLength), 12 + headerBytes.length + offset);
+		offset += b.byteLength;
+	}
+	return out.buffer;
+}
+
+describe('parseColumnarGraph', () => {
+	const strings = new TextEncoder().encode('https://a.comAhttps://b.comB');
+	const file = buildFile(
+		{
+			version: 1,
+			nodeCount: 2,
+			edgeCount: 1,
+			columns: {
+				id: { type: 'uint32', offset: 0, length: 2, strings: true },
+				name: { type: 'uint32', offset: 8, length: 2, strings: true },
+				subscriber_count: { type: 'uint32', offset: 16, length: 2 },
+				group: { type: 'uint8', offset: 24, length: 2, dictionary: ['bestseller', 'other'] },
+				val: { type: 'float32', offset: 32, length: 2 }
+			},
+			edges: {
+				source: { type: 'uint32', offset: 40, length: 1 },
+				target: { type: 'uint32', offset: 48, length: 1 }
+			},
+			strings: {
+				count: 4,
+				offsets: { type: 'uint32', offset: 56, length: 5 },
+				data: { type: 'uint8', offset: 80, length: strings.length }
+			},
+			metadata: { total_nodes: 2 }
+		},
+		[
+			new Uint32Array([0, 2]),
+			new Uint32Array([1, 3]),
+			new Uint32Array([1200, 0]),
+			new Uint8Array([0, 1]),
+			new Float32Array([2.5, 4]),
+			new Uint32Array([0]),
+			new Uint32Array([1]),
+			new Uint32Array([0, 13, 14, 27, 28]),
+			strings
+		]
+	);
+
+	it('wraps columns as typed array views', () => {
+		const graph = parseColumnarGraph(file);
+		expect(graph.nodeCount).toBe(2);
+		expect(graph.columns.val).toBeInstanceOf(Float32Array);
+		expect(Array.from(graph.columns.subscriber_count)).toEqual([1200, 0]);
+		expect(graph.string(2)).toBe('https://b.com');
+	});
+
+	it('materializes nodes and links in the JSON shape', () => {
+		const data = toGraphData(parseColumnarGraph(file));
+		expect(data.nodes[0]).toMatchObject({
+			id: 'https://a.com',
+			name: 'A',
+			group: 'bestseller',
+			val: 2.5,
+			label: 'A (1,200 subs)'
+		});
+		expect(data.nodes[1].label).toBe('B');
+		expect(data.links).toEqual([{ source: 'https://a.com', target: 'https://b.com' }]);
+		expect(data.metadata).toEqual({ total_nodes: 2 });
+	});
+
+	it('rejects files without the magic prefix', () => {
+		expect(() => parseColumnarGraph(new ArrayBuffer(16))).toThrow(/Not a columnar graph/);
+	});
+});
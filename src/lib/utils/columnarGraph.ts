@@ -0,0 +1,156 @@
+// Reader for the columnar binary graph format written by graph_columnar.py.
+// Every column is wrapped zero-copy as a TypedArray view over the fetched buffer.
+
+type ColumnType = 'uint8' | 'uint16' | 'uint32' | 'int32' | 'float32' | 'float64';
+type TypedColumn =
+	| Uint8Array
+	| Uint16Array
+	| Uint32Array
+	| Int32Array
+	| Float32Array
+	| Float64Array;
+
+interface BufferDescriptor {
+	type: ColumnType;
+	offset: number;
+	length: number;
+	dictionary?: string[];
+	strings?: boolean;
+}
+
+interface ColumnarHeader {
+	version: number;
+	nodeCount: number;
+	edgeCount: number;
+	columns: Record<string, BufferDescriptor>;
+	edges: Record<string, BufferDescriptor>;
+	strings: { count: number; offsets: BufferDescriptor; data: BufferDescriptor };
+	metadata: Record<string, any>;
+}
+
+export interface ColumnarGraph {
+	nodeCount: number;
+	edgeCount: number;
+	metadata: Record<string, any>;
+	/** Raw column views: numbers, dictionary codes or string-table indices */
+	columns: Record<string, TypedColumn>;
+	/** Distinct values of dictionary-encoded columns, indexed by code */
+	dictionaries: Record<string, string[]>;
+	/** Names of columns holding string-table indices */
+	stringColumns: Set<string>;
+	sources: Uint32Array;
+	targets: Uint32Array;
+	weights: TypedColumn | null;
+	/** Decode entry i of the shared string table */
+	string: (index: number) => string;
+}
+
+const MAGIC = 'SGCB';
+const SUPPORTED_VERSION = 1;
+
+const ARRAY_TYPES = {
+	uint8: Uint8Array,
+	uint16: Uint16Array,
+	uint32: Uint32Array,
+	int32: Int32Array,
+	float32: Float32Array,
+	float64: Float64Array
+} as const;
+
+function view(buffer: ArrayBuffer, bodyOffset: number, d: BufferDescriptor): TypedColumn {
+	return new ARRAY_TYPES[d.type](buffer, bodyOffset + d.offset, d.length);
+}
+
+export function parseColumnarGraph(buffer: ArrayBuffer): ColumnarGraph {
+	const bytes = new Uint8Array(buffer);
+	const magic = String.fromCharCode(...bytes.subarray(0, 4));
+	if (magic !== MAGIC) {
+		throw new Error(`Not a columnar graph file (magic ${JSON.stringify(magic)})`);
+	}
+
+	const prefix = new DataView(buffer, 4, 8);
+	const version = prefix.getUint32(0, true);
+	if (version !== SUPPORTED_VERSION) {
+		throw new Error(`Unsupported columnar graph version ${version}`);
+	}
+	const headerLength = prefix.getUint32(4, true);
+	const decoder = new TextDecoder();
+	const header: ColumnarHeader = JSON.parse(decoder.decode(bytes.subarray(12, 12 + headerLength)));
+	const bodyOffset = 12 + headerLength;
+
+	const columns: Record<string, TypedColumn> = {};
+	const dictionaries: Record<string, string[]> = {};
+	const stringColumns = new Set<string>();
+	for (const [name, d] of Object.entries(header.columns)) {
+		columns[name] = view(buffer, bodyOffset, d);
+		if (d.dictionary) dictionaries[name] = d.dictionary;
+		if (d.strings) stringColumns.add(name);
+	}
+
+	const stringOffsets = view(buffer, bodyOffset, header.strings.offsets) as Uint32Array;
+	const stringData = view(buffer, bodyOffset, header.strings.data) as Uint8Array;
+	const cache = new Map<number, string>();
+	const string = (index: number) => {
+		let value = cache.get(index);
+		if (value === undefined) {
+			value = decoder.decode(stringData.subarray(stringOffsets[index], stringOffsets[index + 1]));
+			cache.set(index, value);
+		}
+		return value;
+	};
+
+	return {
+		nodeCount: header.nodeCount,
+		edgeCount: header.edgeCount,
+		metadata: header.metadata,
+		columns,
+		dictionaries,
+		stringColumns,
+		sources: view(buffer, bodyOffset, header.edges.source) as Uint32Array,
+		targets: view(buffer, bodyOffset, header.edges.target) as Uint32Array,
+		weights: header.edges.weight ? view(buffer, bodyOffset, header.edges.weight) : null,
+		string
+	};
+}
+
+/** Value of column `name` for node i, with dictionary and string columns decoded */
+export function columnValue(graph: ColumnarGraph, name: string, i: number): any {
+	const raw = graph.columns[name][i];
+	if (graph.dictionaries[name]) return graph.dictionaries[name][raw];
+	if (graph.stringColumns.has(name)) return graph.string(raw);
+	return raw;
+}
+
+/**
+ * Materialize {nodes, links, metadata} in the same shape as the JSON output,
+ * for components that need one object per node (e.g. d3-force).
+ */
+export function toGraphData(graph: ColumnarGraph) {
+	const names = Object.keys(graph.columns);
+	const nodes: any[] = new Array(graph.nodeCount);
+	for (let i = 0; i < graph.nodeCount; i++) {
+		const node: Record<string, any> = {};
+		for (const name of names) node[name] = columnValue(graph, name, i);
+		if ('is_bestseller' in node) node.is_bestseller = node.is_bestseller === 1;
+		// Labels are derived rather than stored (see preprocess_graph_data.py)
+		if (node.label === undefined && node.name !== undefined) {
+			node.label =
+				node.subscriber_count > 0
+					? `${node.name} (${node.subscriber_count.toLocaleString('en-US')} subs)`
+					: node.name;
+		}
+		nodes[i] = node;
+	}
+
+	const links: any[] = new Array(graph.edgeCount);
+	for (let e = 0; e < graph.edgeCount; e++) {
+		const link: Record<string, any> = {
+			source: nodes[graph.sources[e]].id,
+			target: nodes[graph.targets[e]].id
+		};
+		if (graph.weights) link.value = graph.weights[e];
+		links[e] = link;
+	}
+
+	return { nodes, links, metadata: graph.metadata };
+}
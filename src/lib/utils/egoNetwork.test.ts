@@ -0,0 +1,40 @@
+import { describe, it, expect, vi } from 'vitest';
+import { createEgoNetworkLoader, egoShardFile, fnv1a32 } from './egoNetwork.js';
+
+const index = {
+	version: 1,
+	hash: 'fnv1a32' as const,
+	buckets: 2,
+	total_nodes: 2,
+	shards: [
+		{ file: 'ego-0.json', nodes: 1 },
+		{ file: 'ego-1.json', nodes: 1 }
+	]
+};
+
+describe('fnv1a32', () => {
+	it('matches the Python implementation', () => {
+		expect(fnv1a32('')).toBe(0x811c9dc5);
+		expect(fnv1a32('hello')).toBe(1335831723);
+	});
+});
+
+describe('createEgoNetworkLoader', () => {
+	it('fetches only the shard that holds the publication', async () => {
+		const url = 'https://a.com';
+		const file = egoShardFile(index, url);
+		const fetchFn = vi.fn(async (path: string) => {
+			const body = path.endsWith('index.json')
+				? index
+				: path.endsWith(file)
+					? { [url]: { recommends: ['https://b.com'], recommenders: [] } }
+					: {};
+			return { ok: true, status: 200, json: async () => body } as Response;
+		});
+		const loader = createEgoNetworkLoader(fetchFn as unknown as typeof fetch, '/ego');
+
+		expect((await loader.load(url))?.recommends).toEqual(['https://b.com']);
+		expect(await loader.load('https://missing.com')).toBeNull();
+		expect(fetchFn.mock.calls[1][0]).toBe(`/ego/${file}`);
+	});
+});
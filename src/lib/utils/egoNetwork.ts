@@ -0,0 +1,84 @@
+// Lookup of per-publication ego networks written by ego_networks.py:
+// records are bucketed by FNV-1a hash of the publication URL, one shard per bucket.
+
+export const EGO_BASE_URL = '/jsons/graph_data_ego';
+
+export interface EgoNeighbour {
+	id: string;
+	name: string;
+	subscriber_count: number;
+	pagerank: number;
+}
+
+export interface EgoNetwork {
+	/** 1-hop neighbours ranked by PageRank */
+	recommends: string[];
+	recommenders: string[];
+	top_recommends: EgoNeighbour[];
+	top_recommenders: EgoNeighbour[];
+	two_hop_out: { count: number; top: string[] };
+	two_hop_in: { count: number; top: string[] };
+	/** Publications recommended by the same recommenders (cosine similarity) */
+	similar: { id: string; shared: number; score: number }[];
+}
+
+export interface EgoIndex {
+	version: number;
+	hash: 'fnv1a32';
+	buckets: number;
+	total_nodes: number;
+	shards: { file: string; nodes: number }[];
+}
+
+/** 32-bit FNV-1a over the UTF-8 bytes, matching fnv1a_32 in ego_networks.py */
+export function fnv1a32(text: string): number {
+	let hash = 0x811c9dc5;
+	for (const byte of new TextEncoder().encode(text)) {
+		hash ^= byte;
+		hash = Math.imul(hash, 0x01000193);
+	}
+	return hash >>> 0;
+}
+
+export function egoShardFile(index: EgoIndex, url: string): string {
+	return index.shards[fnv1a32(url) % index.buckets].file;
+}
+
+/**
+ * Create a loader bound to a fetch function. The index and each shard are
+ * fetched at most once; looking up a publication costs one small shard fetch.
+ */
+export function createEgoNetworkLoader(fetchFn: typeof fetch, baseUrl: string = EGO_BASE_URL) {
+	let index: Promise<EgoIndex> | null = null;
+	const shards = new Map<string, Promise<Record<string, EgoNetwork>>>();
+
+	async function fetchJson<T>(url: string): Promise<T> {
+		const response = await fetchFn(url);
+		if (!response.ok) {
+			throw new Error(`Failed to load ${url}: ${response.status}`);
+		}
+		return response.json();
+	}
+
+	function loadIndex(): Promise<EgoIndex> {
+		if (!index) {
+			index = fetchJson<EgoIndex>(`${baseUrl}/index.json`);
+			index.catch(() => (index = null));
+		}
+		return index;
+	}
+
+	/** Ego network of a publication (by its graph node id), or null if it is not in the graph */
+	async function load(url: string): Promise<EgoNetwork | null> {
+		const file = egoShardFile(await loadIndex(), url);
+		let shard = shards.get(file);
+		if (!shard) {
+			shard = fetchJson<Record<string, EgoNetwork>>(`${baseUrl}/${file}`);
+			shards.set(file, shard);
+			shard.catch(() => shards.delete(file));
+		}
+		return (await shard)[url] ?? null;
+	}
+
+	return { loadIndex, load };
+}
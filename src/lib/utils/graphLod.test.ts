@@ -0,0 +1,89 @@
+import { describe, it, expect, vi } from 'vitest';
+import { buildLodView, clustersToExpand, createGraphLodLoader, type ClusterIndex, type ClusterShard } from './graphLod.js';
+
+const index = {
+	clusters: [{ id: 0, label: 'A', shard: 'cluster-0000.json' }],
+	links: [],
+	metadata: { total_clusters: 1 }
+};
+const shard = { cluster: 0, nodes: [{ id: 'https://a.com' }], links: [], boundary_links: [] };
+
+function mockFetch() {
+	return vi.fn(async (url: string) => {
+		const body = url.endsWith('index.json') ? index : url.endsWith('cluster-0000.json') ? shard : null;
+		return { ok: body !== null, status: body ? 200 : 404, json: async () => body } as Response;
+	});
+}
+
+describe('createGraphLodLoader', () => {
+	it('fetches the index and each shard only once', async () => {
+		const fetchFn = mockFetch();
+		const loader = createGraphLodLoader(fetchFn as unknown as typeof fetch, '/lod');
+
+		const [a, b] = await Promise.all([loader.loadCluster(0), loader.loadCluster(0)]);
+		expect(a).toBe(b);
+		expect(a.nodes[0].id).toBe('https://a.com');
+		expect((await loader.loadIndex()).metadata.total_clusters).toBe(1);
+		expect(fetchFn.mock.calls.map(([url]) => url)).toEqual(['/lod/index.json', '/lod/cluster-0000.json']);
+	});
+
+	it('rejects unknown clusters and allows a retry', async () => {
+		const loader = createGraphLodLoader(mockFetch() as unknown as typeof fetch, '/lod');
+		await expect(loader.loadCluster(7)).rejects.toThrow(/Unknown cluster 7/);
+		expect(loader.isLoaded(7)).toBe(false);
+	});
+});
+
+// Two clusters side by side, 100 layout units wide each, linked once
+const twoClusters = {
+	clusters: [
+		{ id: 0, label: 'A', size: 2, x2d: 50, y2d: 50, extent2d: [0, 0, 100, 100], shard: 'cluster-0000.json' },
+		{ id: 1, label: 'C', size: 1, x2d: 250, y2d: 50, extent2d: [200, 0, 300, 100], shard: 'cluster-0001.json' }
+	],
+	links: [{ source: 0, target: 1, value: 1 }],
+	metadata: {}
+} as unknown as ClusterIndex;
+
+const shardA: ClusterShard = {
+	cluster: 0,
+	nodes: [
+		{ id: 'a', x2d: 10, y2d: 10 },
+		{ id: 'b', x2d: 90, y2d: 90 }
+	],
+	links: [{ source: 'a', target: 'b' }],
+	boundary_links: [{ source: 'b', target: 'c', cluster: 1 }]
+};
+const shardC: ClusterShard = {
+	cluster: 1,
+	nodes: [{ id: 'c', x2d: 250, y2d: 50 }],
+	links: [],
+	boundary_links: [{ source: 'b', target: 'c', cluster: 0 }]
+};
+
+describe('clustersToExpand', () => {
+	it('expands clusters in view that are large enough on screen', () => {
+		const view = { minX: 0, minY: 0, maxX: 150, maxY: 100 };
+		expect(clustersToExpand(twoClusters, view, 1, 400)).toEqual([]);
+		expect(clustersToExpand(twoClusters, view, 4, 400)).toEqual([0]);
+	});
+});
+
+describe('buildLodView', () => {
+	it('draws collapsed clusters as one node and links to them from expanded ones', () => {
+		const view = buildLodView(twoClusters, new Map([[0, shardA]]));
+		expect(view.nodes.map((n) => n.id)).toEqual(['cluster-1', 'a', 'b']);
+		expect(view.links.map((l) => `${l.source.id}>${l.target.id}`)).toEqual(['a>b', 'b>cluster-1']);
+		expect(view.nodes[1]).toMatchObject({ x: 10, y: 10 });
+	});
+
+	it('keeps one copy of a link between two expanded clusters', () => {
+		const view = buildLodView(twoClusters, new Map([[0, shardA], [1, shardC]]));
+		expect(view.links.map((l) => `${l.source.id}>${l.target.id}`)).toEqual(['a>b', 'b>c']);
+	});
+
+	it('shows the aggregated cluster links when nothing is expanded', () => {
+		const view = buildLodView(twoClusters, new Map());
+		expect(view.links).toHaveLength(1);
+		expect(view.links[0]).toMatchObject({ value: 1 });
+	});
+});
@@ -0,0 +1,199 @@
+// Loader for the level-of-detail graph written by preprocess_graph_data.py:
+// a small cluster overview (index.json) plus per-cluster shards fetched on demand.
+// A view shows one stand-in node per cluster until the cluster is zoomed into,
+// then the cluster's publications at their offline layout positions.
+
+export const LOD_BASE_URL = '/jsons/graph_data_lod';
+
+export interface ClusterSummary {
+	id: number;
+	label: string;
+	top_node: string;
+	size: number;
+	subscriber_count: number;
+	bestsellers_count: number;
+	internal_links: number;
+	x: number;
+	y: number;
+	z: number;
+	x2d: number;
+	y2d: number;
+	/** 2D bounding box of the members: [minX, minY, maxX, maxY] */
+	extent2d: [number, number, number, number];
+	shard: string;
+	shard_bytes: number;
+}
+
+export interface ClusterIndex {
+	clusters: ClusterSummary[];
+	/** Aggregated recommendations between clusters, by cluster id */
+	links: { source: number; target: number; value: number }[];
+	metadata: Record<string, any>;
+}
+
+export interface ClusterShard {
+	cluster: number;
+	nodes: Record<string, any>[];
+	links: { source: string; target: string }[];
+	/** Links with one end in another cluster, tagged with that cluster's id */
+	boundary_links: { source: string; target: string; cluster: number }[];
+}
+
+export interface ViewBounds {
+	minX: number;
+	minY: number;
+	maxX: number;
+	maxY: number;
+}
+
+export interface LodNode extends Record<string, any> {
+	id: string;
+	x: number;
+	y: number;
+	/** Set on the stand-in node of a collapsed cluster */
+	cluster?: number;
+}
+
+export interface LodView {
+	nodes: LodNode[];
+	links: { source: LodNode; target: LodNode; value?: number }[];
+}
+
+// A cluster is expanded into its publications once its extent covers this many screen pixels
+export const EXPAND_SCREEN_SIZE = 400;
+const CLUSTER_COLOR = '#45b7d1';
+
+type Fetch = typeof fetch;
+
+async function fetchJson<T>(fetchFn: Fetch, url: string): Promise<T> {
+	const response = await fetchFn(url);
+	if (!response.ok) {
+		throw new Error(`Failed to load ${url}: ${response.status}`);
+	}
+	return response.json();
+}
+
+/**
+ * Create a loader bound to a fetch function (e.g. the one SvelteKit passes to load).
+ * The index and every shard are requested at most once; concurrent calls share the request.
+ */
+export function createGraphLodLoader(fetchFn: Fetch, baseUrl: string = LOD_BASE_URL) {
+	let index: Promise<ClusterIndex> | null = null;
+	const shards = new Map<number, Promise<ClusterShard>>();
+
+	function loadIndex(): Promise<ClusterIndex> {
+		if (!index) {
+			index = fetchJson<ClusterIndex>(fetchFn, `${baseUrl}/index.json`);
+			index.catch(() => (index = null));
+		}
+		return index;
+	}
+
+	async function loadCluster(id: number): Promise<ClusterShard> {
+		let shard = shards.get(id);
+		if (!shard) {
+			shard = loadIndex().then((idx) => {
+				const summary = idx.clusters.find((c) => c.id === id);
+				if (!summary) throw new Error(`Unknown cluster ${id}`);
+				return fetchJson<ClusterShard>(fetchFn, `${baseUrl}/${summary.shard}`);
+			});
+			shards.set(id, shard);
+			shard.catch(() => shards.delete(id));
+		}
+		return shard;
+	}
+
+	/** Everything to draw for a view at a scale of k screen pixels per layout unit */
+	async function loadView(view: ViewBounds, k: number): Promise<LodView> {
+		const idx = await loadIndex();
+		const ids = clustersToExpand(idx, view, k);
+		const loaded = await Promise.all(ids.map(loadCluster));
+		return buildLodView(idx, new Map(ids.map((id, i) => [id, loaded[i]])));
+	}
+
+	return { loadIndex, loadCluster, loadView, isLoaded: (id: number) => shards.has(id) };
+}
+
+/**
+ * Clusters to expand for a view at a scale of k screen pixels per layout unit:
+ * those intersecting the view whose extent covers at least minScreenSize pixels.
+ */
+export function clustersToExpand(
+	index: ClusterIndex,
+	view: ViewBounds,
+	k: number,
+	minScreenSize: number = EXPAND_SCREEN_SIZE
+): number[] {
+	return index.clusters
+		.filter(({ extent2d: [minX, minY, maxX, maxY] }) => {
+			if (maxX < view.minX || maxY < view.minY || minX > view.maxX || minY > view.maxY) return false;
+			return Math.max(maxX - minX, maxY - minY) * k >= minScreenSize;
+		})
+		.map((cluster) => cluster.id);
+}
+
+/** Stand-in node drawn for a collapsed cluster */
+export function clusterNode(cluster: ClusterSummary): LodNode {
+	return {
+		id: `cluster-${cluster.id}`,
+		cluster: cluster.id,
+		name: cluster.label,
+		label: cluster.size > 1 ? `${cluster.label} +${cluster.size - 1}` : cluster.label,
+		subscriber_count: cluster.subscriber_count,
+		size: cluster.size,
+		val: cluster.size,
+		color: CLUSTER_COLOR,
+		x: cluster.x2d,
+		y: cluster.y2d
+	};
+}
+
+/**
+ * Nodes and links to draw with the given clusters expanded: publications of
+ * expanded clusters at their offline 2D position, one stand-in node per
+ * collapsed cluster. Links between collapsed clusters are the aggregated
+ * cluster links; links leaving an expanded cluster end at the publication
+ * when its cluster is expanded too, at the stand-in node otherwise.
+ */
+export function buildLodView(index: ClusterIndex, expanded: Map<number, ClusterShard>): LodView {
+	const standIns = new Map<number, LodNode>();
+	const byId = new Map<string, LodNode>();
+	for (const cluster of index.clusters) {
+		if (!expanded.has(cluster.id)) standIns.set(cluster.id, clusterNode(cluster));
+	}
+	for (const shard of expanded.values()) {
+		for (const node of shard.nodes) {
+			node.x = node.x2d;
+			node.y = node.y2d;
+			byId.set(node.id, node as LodNode);
+		}
+	}
+
+	const links: LodView['links'] = [];
+	for (const link of index.links) {
+		const source = standIns.get(link.source);
+		const target = standIns.get(link.target);
+		if (source && target) links.push({ source, target, value: link.value });
+	}
+	const seen = new Set<string>();
+	for (const shard of expanded.values()) {
+		for (const link of shard.links) {
+			links.push({ source: byId.get(link.source)!, target: byId.get(link.target)! });
+		}
+		for (const link of shard.boundary_links) {
+			const other = standIns.get(link.cluster);
+			if (other) {
+				const source = byId.get(link.source) ?? other;
+				const target = byId.get(link.target) ?? other;
+				links.push({ source, target });
+			} else {
+				// Both clusters are expanded, so the link is in both shards
+				const key = `${link.source}|${link.target}`;
+				if (seen.has(key)) continue;
+				seen.add(key);
+				links.push({ source: byId.get(link.source)!, target: byId.get(link.target)! });
+			}
+		}
+	}
+	return { nodes: [...standIns.values(), ...byId.values()], links };
+}
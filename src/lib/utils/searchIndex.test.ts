@@ -0,0 +1,109 @@
+import { describe, it, expect, vi } from 'vitest';
+import { createSearchIndexLoader, intersectSorted, ownerKey, tokenizeQuery } from './searchIndex.js';
+
+const docs = [
+	['The Free Press', 'https://thefp.com', 900],
+	['Free Thinker', 'https://freethinker.substack.com', 500],
+	['Theory Weekly', 'https://theory.substack.com', 100]
+];
+
+const index = {
+	version: 1,
+	total_docs: 3,
+	total_terms: 6,
+	top_k: 10,
+	top_prefix_length: 3,
+	docs_per_shard: 500,
+	prefix_shards: {
+		t: { file: 'prefix-74.json', terms: 3, bytes: 0 },
+		f: { file: 'prefix-66.json', terms: 2, bytes: 0 }
+	},
+	trigram_shards: { r: { file: 'trigram-72.json', trigrams: 1, bytes: 0 }, e: { file: 'trigram-65.json', trigrams: 1, bytes: 0 } },
+	doc_shards: ['docs-000.json'],
+	top: {},
+	docs: {}
+};
+
+const files: Record<string, unknown> = {
+	'index.json': index,
+	'prefix-74.json': {
+		key: 't',
+		terms: ['the', 'thefp', 'theory'],
+		postings: [[0], [0], [2]],
+		top: { t: [0, 2], th: [0, 2], the: [0, 2] },
+		docs: { 0: docs[0], 2: docs[2] }
+	},
+	'prefix-66.json': {
+		key: 'f',
+		terms: ['free', 'freethinker'],
+		postings: [[0, 1], [1]],
+		top: { f: [0, 1], fr: [0, 1], fre: [0, 1] },
+		docs: { 0: docs[0], 1: docs[1] }
+	},
+	'trigram-72.json': { ree: [0, 1] },
+	'trigram-65.json': { eet: [1] },
+	'docs-000.json': docs
+};
+
+function mockFetch(served: Record<string, unknown> = files) {
+	return vi.fn(async (path: string) => {
+		const body = served[path.split('/').pop()!];
+		return { ok: body !== undefined, status: body ? 200 : 404, json: async () => body } as Response;
+	});
+}
+
+describe('search index helpers', () => {
+	it('normalizes queries like the builder', () => {
+		expect(tokenizeQuery('Café  Society!')).toEqual(['cafe', 'society']);
+	});
+
+	it('picks the longest shard key that prefixes the term', () => {
+		expect(ownerKey('thefp', { t: 1, th: 1 })).toBe('th');
+		expect(ownerKey('x', { t: 1 })).toBeNull();
+	});
+
+	it('intersects sorted posting lists', () => {
+		expect(intersectSorted([[0, 2, 5, 9], [2, 3, 9], [1, 2, 9]])).toEqual([2, 9]);
+	});
+});
+
+describe('createSearchIndexLoader', () => {
+	it('answers a short prefix from one shard in ranking order', async () => {
+		const fetchFn = mockFetch();
+		const client = createSearchIndexLoader(fetchFn as unknown as typeof fetch, '/search');
+
+		expect((await client.search('Th')).map((r) => r.name)).toEqual(['The Free Press', 'Theory Weekly']);
+		expect(fetchFn).toHaveBeenCalledTimes(2);
+	});
+
+	it('intersects multi-word queries and substring matches', async () => {
+		const client = createSearchIndexLoader(mockFetch() as unknown as typeof fetch, '/search');
+
+		expect((await client.search('the free')).map((r) => r.url)).toEqual(['https://thefp.com']);
+		expect((await client.searchSubstring('reet')).map((r) => r.name)).toEqual(['Free Thinker']);
+	});
+
+	it('matches a short token against every shard under it, not just its top-k', async () => {
+		// 'th' is shorter than the shard keys 'the' and 'theo'; its precomputed top-1 misses Theory Weekly
+		const split = {
+			'index.json': {
+				...index,
+				total_docs: 2,
+				top_k: 1,
+				prefix_shards: {
+					the: { file: 'prefix-the.json', terms: 2, bytes: 0 },
+					theo: { file: 'prefix-theo.json', terms: 1, bytes: 0 },
+					w: { file: 'prefix-77.json', terms: 1, bytes: 0 }
+				},
+				top: { t: [0], th: [0] }
+			},
+			'prefix-the.json': { key: 'the', terms: ['the', 'thefp'], postings: [[0], [0]], top: {}, docs: { 0: docs[0] } },
+			'prefix-theo.json': { key: 'theo', terms: ['theory'], postings: [[1]], top: {}, docs: { 1: docs[2] } },
+			'prefix-77.json': { key: 'w', terms: ['weekly'], postings: [[1]], top: {}, docs: { 1: docs[2] } }
+		};
+		const client = createSearchIndexLoader(mockFetch(split) as unknown as typeof fetch, '/search');
+
+		expect((await client.search('weekly th')).map((r) => r.name)).toEqual(['Theory Weekly']);
+		expect((await client.search('th w')).map((r) => r.name)).toEqual(['Theory Weekly']);
+	});
+});
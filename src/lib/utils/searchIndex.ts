@@ -0,0 +1,205 @@
+// Client for the sharded publication search index written by preprocess_search_index.py.
+// Document IDs are in ranking order (subscriber count, descending), so every
+// posting list is a sorted integer array and smaller IDs are better matches.
+
+export const SEARCH_BASE_URL = '/jsons/search';
+
+/** [name, publication_url, subscriber_count] */
+export type SearchDoc = [string, string, number];
+
+export interface SearchResult {
+	id: number;
+	name: string;
+	url: string;
+	subscriber_count: number;
+}
+
+export interface SearchIndex {
+	version: number;
+	total_docs: number;
+	total_terms: number;
+	top_k: number;
+	top_prefix_length: number;
+	docs_per_shard: number;
+	prefix_shards: Record<string, { file: string; terms: number; bytes: number }>;
+	trigram_shards: Record<string, { file: string; trigrams: number; bytes: number }>;
+	doc_shards: string[];
+	/** Top-k for prefixes shorter than every shard key under them */
+	top: Record<string, number[]>;
+	docs: Record<string, SearchDoc>;
+}
+
+export interface PrefixShard {
+	key: string;
+	/** Sorted terms, with posting lists in the same order */
+	terms: string[];
+	postings: number[][];
+	top: Record<string, number[]>;
+	docs: Record<string, SearchDoc>;
+}
+
+/** Casefold and strip accents like normalize() in preprocess_search_index.py */
+export function normalizeQuery(text: string): string {
+	return text.normalize('NFKD').replace(/\p{M}/gu, '').toLowerCase();
+}
+
+export function tokenizeQuery(text: string): string[] {
+	return normalizeQuery(text).match(/[\p{L}\p{N}]+/gu) ?? [];
+}
+
+/** Longest shard key that is a prefix of term, as owner_key() in the builder */
+export function ownerKey(term: string, keys: Record<string, unknown>): string | null {
+	for (let length = term.length; length > 0; length--) {
+		if (term.slice(0, length) in keys) return term.slice(0, length);
+	}
+	return null;
+}
+
+/** Intersection of sorted posting lists */
+export function intersectSorted(lists: number[][]): number[] {
+	if (lists.length === 0) return [];
+	return lists.reduce((acc, list) => {
+		const out: number[] = [];
+		let i = 0;
+		let j = 0;
+		while (i < acc.length && j < list.length) {
+			if (acc[i] === list[j]) {
+				out.push(acc[i]);
+				i++;
+				j++;
+			} else if (acc[i] < list[j]) i++;
+			else j++;
+		}
+		return out;
+	});
+}
+
+/** Sorted union of posting lists */
+export function unionSorted(lists: number[][]): number[] {
+	return [...new Set(lists.flat())].sort((a, b) => a - b);
+}
+
+function lowerBound(terms: string[], prefix: string): number {
+	let lo = 0;
+	let hi = terms.length;
+	while (lo < hi) {
+		const mid = (lo + hi) >> 1;
+		if (terms[mid] < prefix) lo = mid + 1;
+		else hi = mid;
+	}
+	return lo;
+}
+
+/**
+ * Create a search client bound to a fetch function. The index and every shard
+ * are fetched at most once; a typed prefix usually costs one small shard fetch.
+ */
+export function createSearchIndexLoader(fetchFn: typeof fetch, baseUrl: string = SEARCH_BASE_URL) {
+	let index: Promise<SearchIndex> | null = null;
+	const files = new Map<string, Promise<any>>();
+
+	async function fetchJson<T>(url: string): Promise<T> {
+		const response = await fetchFn(url);
+		if (!response.ok) {
+			throw new Error(`Failed to load ${url}: ${response.status}`);
+		}
+		return response.json();
+	}
+
+	function loadIndex(): Promise<SearchIndex> {
+		if (!index) {
+			index = fetchJson<SearchIndex>(`${baseUrl}/index.json`);
+			index.catch(() => (index = null));
+		}
+		return index;
+	}
+
+	function loadFile<T>(file: string): Promise<T> {
+		let request = files.get(file);
+		if (!request) {
+			request = fetchJson<T>(`${baseUrl}/${file}`);
+			files.set(file, request);
+			request.catch(() => files.delete(file));
+		}
+		return request;
+	}
+
+	async function resolveDocs(ids: number[], known: Record<string, SearchDoc>[] = []): Promise<SearchResult[]> {
+		const idx = await loadIndex();
+		const results: SearchResult[] = [];
+		for (const id of ids) {
+			let doc = known.map((docs) => docs[id]).find(Boolean);
+			if (!doc) {
+				const shard = await loadFile<SearchDoc[]>(idx.doc_shards[Math.floor(id / idx.docs_per_shard)]);
+				doc = shard[id % idx.docs_per_shard];
+			}
+			const [name, url, subscriber_count] = doc;
+			results.push({ id, name, url, subscriber_count });
+		}
+		return results;
+	}
+
+	/**
+	 * Document IDs of every term starting with prefix. A short prefix can span
+	 * several shards (its owner, if any, and every longer key under it); all of
+	 * them are loaded, so the result is complete rather than the top-k.
+	 */
+	async function prefixMatches(prefix: string): Promise<{ ids: number[]; shards: PrefixShard[] }> {
+		const idx = await loadIndex();
+		const owner = ownerKey(prefix, idx.prefix_shards);
+		const keys = Object.keys(idx.prefix_shards).filter((key) => key !== owner && key.startsWith(prefix));
+		if (owner !== null) keys.unshift(owner);
+
+		const shards = await Promise.all(keys.map((key) => loadFile<PrefixShard>(idx.prefix_shards[key].file)));
+		const lists: number[][] = [];
+		for (const shard of shards) {
+			for (let i = lowerBound(shard.terms, prefix); i < shard.terms.length && shard.terms[i].startsWith(prefix); i++) {
+				lists.push(shard.postings[i]);
+			}
+		}
+		return { ids: unionSorted(lists), shards };
+	}
+
+	/** Search-as-you-type: every query token must prefix-match a term of the publication */
+	async function search(query: string, limit: number = 10): Promise<SearchResult[]> {
+		const idx = await loadIndex();
+		const tokens = tokenizeQuery(query);
+		if (tokens.length === 0) return [];
+
+		if (tokens.length === 1 && tokens[0].length <= idx.top_prefix_length && limit <= idx.top_k) {
+			// Precomputed: one shard fetch at most, and display fields come with it
+			const key = ownerKey(tokens[0], idx.prefix_shards);
+			if (key === null) {
+				return resolveDocs((idx.top[tokens[0]] ?? []).slice(0, limit), [idx.docs]);
+			}
+			const shard = await loadFile<PrefixShard>(idx.prefix_shards[key].file);
+			return resolveDocs((shard.top[tokens[0]] ?? []).slice(0, limit), [shard.docs]);
+		}
+
+		const matches = await Promise.all(tokens.map(prefixMatches));
+		const ids = intersectSorted(matches.map((match) => match.ids)).slice(0, limit);
+		return resolveDocs(ids, [idx.docs, ...matches.flatMap((match) => match.shards.map((shard) => shard.docs))]);
+	}
+
+	/** Substring search: publications whose terms contain every trigram of the query */
+	async function searchSubstring(query: string, limit: number = 10): Promise<SearchResult[]> {
+		const idx = await loadIndex();
+		const grams = new Set<string>();
+		for (const token of tokenizeQuery(query)) {
+			for (let i = 0; i + 3 <= token.length; i++) grams.add(token.slice(i, i + 3));
+		}
+		if (grams.size === 0) return search(query, limit);
+
+		const lists: number[][] = [];
+		for (const gram of grams) {
+			const shard = idx.trigram_shards[gram[0]];
+			if (!shard) return [];
+			const postings = (await loadFile<Record<string, number[]>>(shard.file))[gram];
+			if (!postings) return [];
+			lists.push(postings);
+		}
+		return resolveDocs(intersectSorted(lists).slice(0, limit));
+	}
+
+	return { loadIndex, search, searchSubstring };
+}
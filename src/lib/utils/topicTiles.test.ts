@@ -0,0 +1,92 @@
+import { describe, it, expect, vi } from 'vitest';
+import { createTopicTileLoader, levelForScale, mergeTiles, visibleTiles, type TileIndex, type TopicTile } from './topicTiles.js';
+
+// A 1024-unit world: one root tile and two of the four level-1 tiles
+const index: TileIndex = {
+	version: 1,
+	graph: 'co-occurrence',
+	bounds: { x: 0, y: 0, size: 1024 },
+	maxZoom: 1,
+	tileSize: 512,
+	nodeBudget: 1,
+	linkBudget: 4,
+	nodeCount: 3,
+	linkCount: 2,
+	ranges: { post_count: [1, 30] },
+	tiles: { '0-0-0': 100, '1-0-0': 100, '1-1-1': 100 },
+	topics: [
+		['Finance', 100, 100, 0, 10, 1],
+		['Crypto', 200, 200, 1, 5, 1],
+		['Books', 900, 900, 1, 5, 1]
+	]
+};
+
+const tiles: Record<string, TopicTile> = {
+	'0-0-0': { tile: [0, 0, 0], nodes: [{ id: 'Finance', x: 100, y: 100 }], links: [], anchors: {} },
+	'1-0-0': {
+		tile: [1, 0, 0],
+		nodes: [{ id: 'Crypto', x: 200, y: 200 }],
+		links: [['Crypto', 'Finance', 12], ['Books', 'Crypto', 10]],
+		anchors: { Books: [900, 900, 5] }
+	},
+	'1-1-1': {
+		tile: [1, 1, 1],
+		nodes: [{ id: 'Books', x: 900, y: 900 }],
+		links: [['Books', 'Crypto', 10]],
+		anchors: { Crypto: [200, 200, 5] }
+	}
+};
+
+function mockFetch() {
+	return vi.fn(async (url: string) => {
+		const name = url.split('/').pop()!.replace('.json', '');
+		const body = name === 'index' ? index : tiles[name];
+		return { ok: !!body, status: body ? 200 : 404, json: async () => body } as Response;
+	});
+}
+
+describe('levelForScale', () => {
+	it('picks the level whose tiles cover about tileSize pixels', () => {
+		expect(levelForScale(index, 0.25)).toBe(0);
+		expect(levelForScale(index, 1)).toBe(1);
+		// Clamped to the pyramid
+		expect(levelForScale(index, 64)).toBe(1);
+	});
+});
+
+describe('visibleTiles', () => {
+	it('lists the non-empty tiles of every level up to the given one', () => {
+		expect(visibleTiles(index, { minX: 0, minY: 0, maxX: 400, maxY: 400 }, 1)).toEqual(['0-0-0', '1-0-0']);
+		expect(visibleTiles(index, { minX: 0, minY: 0, maxX: 1024, maxY: 1024 }, 0)).toEqual(['0-0-0']);
+		expect(visibleTiles(index, { minX: 2000, minY: 2000, maxX: 3000, maxY: 3000 }, 1)).toEqual([]);
+	});
+});
+
+describe('mergeTiles', () => {
+	it('deduplicates links stored in the tiles of both ends', () => {
+		const merged = mergeTiles([tiles['1-0-0'], tiles['1-1-1']]);
+		expect(merged.nodes.map((n) => n.id)).toEqual(['Crypto', 'Books']);
+		expect(merged.links).toHaveLength(2);
+		expect(merged.anchors.get('Books')).toEqual([900, 900, 5]);
+	});
+});
+
+describe('createTopicTileLoader', () => {
+	it('fetches only the tiles of the view, each once', async () => {
+		const fetchFn = mockFetch();
+		const loader = createTopicTileLoader(fetchFn as unknown as typeof fetch, 'co-occurrence', '/tiles');
+
+		const view = await loader.loadView({ minX: 0, minY: 0, maxX: 400, maxY: 400 }, 1);
+		expect(view.level).toBe(1);
+		expect(view.nodes.map((n) => n.id)).toEqual(['Finance', 'Crypto']);
+		expect(view.links.map((l) => l.weight)).toEqual([12, 10]);
+
+		await loader.loadView({ minX: 0, minY: 0, maxX: 400, maxY: 400 }, 1);
+		expect(fetchFn.mock.calls.map(([url]) => url)).toEqual([
+			'/tiles/co-occurrence/index.json',
+			'/tiles/co-occurrence/0-0-0.json',
+			'/tiles/co-occurrence/1-0-0.json'
+		]);
+		expect(loader.cachedTiles()).toBe(2);
+	});
+});
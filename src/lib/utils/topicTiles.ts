@@ -0,0 +1,154 @@
+// Loader for the topic map tiles written by preprocess_topic_tiles.py: a quadtree
+// pyramid over an offline 2D layout of the knowledge graph. Tiles are
+// incremental, so the view at zoom z is the union of the tiles of levels 0..z
+// that intersect it; only those are fetched, and a bounded number are kept.
+// The publication map (map2d.svelte) streams by viewport too, but from the
+// per-cluster level-of-detail shards loaded through graphLod.ts.
+
+export const TOPIC_TILES_BASE_URL = '/jsons/topics/tiles';
+
+export type TopicGraph = 'co-occurrence' | 'by-publication';
+
+export interface TileIndex {
+	version: number;
+	graph: TopicGraph;
+	/** Square world: top-left corner and side length, in layout units */
+	bounds: { x: number; y: number; size: number };
+	maxZoom: number;
+	/** On-screen size (device pixels) a tile is meant to cover */
+	tileSize: number;
+	nodeBudget: number;
+	linkBudget: number;
+	nodeCount: number;
+	linkCount: number;
+	/** [min, max] of the positive values of each colour metric over the whole graph */
+	ranges: Record<string, [number, number]>;
+	/** Non-empty tiles: 'z-x-y' -> bytes */
+	tiles: Record<string, number>;
+	/** [id, x, y, zoom, subscriber_sum, pub_count], coarsest zoom first */
+	topics: Array<[string, number, number, number, number, number]>;
+}
+
+export interface TopicTile {
+	tile: [number, number, number];
+	nodes: Record<string, any>[];
+	/** [source, target, weight] */
+	links: Array<[string, string, number]>;
+	/** [x, y, val] of link ends outside the tile */
+	anchors: Record<string, [number, number, number]>;
+}
+
+export interface ViewBounds {
+	minX: number;
+	minY: number;
+	maxX: number;
+	maxY: number;
+}
+
+export interface TileView {
+	level: number;
+	/** Tiles the view is made of, coarsest first */
+	keys: string[];
+	nodes: Record<string, any>[];
+	links: { source: string; target: string; weight: number }[];
+	anchors: Map<string, [number, number, number]>;
+}
+
+// Tiles kept in memory (least recently used are dropped first)
+const MAX_CACHED_TILES = 96;
+
+/** Pyramid level for a scale of k screen pixels per layout unit */
+export function levelForScale(index: TileIndex, k: number): number {
+	const level = Math.ceil(Math.log2((index.bounds.size * k) / index.tileSize));
+	return Number.isFinite(level) ? Math.max(0, Math.min(index.maxZoom, level)) : 0;
+}
+
+/** Keys of the non-empty tiles of levels 0..level intersecting the view, coarsest first */
+export function visibleTiles(index: TileIndex, view: ViewBounds, level: number): string[] {
+	const { x, y, size } = index.bounds;
+	const keys: string[] = [];
+	if (view.maxX < x || view.maxY < y || view.minX > x + size || view.minY > y + size) return keys;
+	for (let z = 0; z <= level; z++) {
+		const n = 1 << z;
+		const cell = size / n;
+		const column = (v: number, origin: number) => Math.max(0, Math.min(n - 1, Math.floor((v - origin) / cell)));
+		for (let tx = column(view.minX, x); tx <= column(view.maxX, x); tx++) {
+			for (let ty = column(view.minY, y); ty <= column(view.maxY, y); ty++) {
+				const key = `${z}-${tx}-${ty}`;
+				if (key in index.tiles) keys.push(key);
+			}
+		}
+	}
+	return keys;
+}
+
+/** Union of tiles: nodes by id, links by endpoint pair (a link is stored in the tiles of both ends) */
+export function mergeTiles(tiles: TopicTile[]): Omit<TileView, 'level' | 'keys'> {
+	const nodes = new Map<string, Record<string, any>>();
+	const links = new Map<string, { source: string; target: string; weight: number }>();
+	const anchors = new Map<string, [number, number, number]>();
+	for (const tile of tiles) {
+		for (const node of tile.nodes) nodes.set(node.id, node);
+		for (const [source, target, weight] of tile.links) links.set(`${source}|${target}`, { source, target, weight });
+		for (const [id, anchor] of Object.entries(tile.anchors)) anchors.set(id, anchor);
+	}
+	return { nodes: [...nodes.values()], links: [...links.values()], anchors };
+}
+
+/**
+ * Create a loader for one graph's pyramid, bound to a fetch function. The
+ * index is fetched once; tiles are requested at most once while cached, and
+ * concurrent calls share the request.
+ */
+export function createTopicTileLoader(
+	fetchFn: typeof fetch,
+	graph: TopicGraph,
+	baseUrl: string = TOPIC_TILES_BASE_URL
+) {
+	let index: Promise<TileIndex> | null = null;
+	// Insertion order is recency order
+	const tiles = new Map<string, Promise<TopicTile>>();
+
+	async function fetchJson<T>(url: string): Promise<T> {
+		const response = await fetchFn(url);
+		if (!response.ok) throw new Error(`Failed to load ${url}: ${response.status}`);
+		return response.json();
+	}
+
+	function loadIndex(): Promise<TileIndex> {
+		if (!index) {
+			index = fetchJson<TileIndex>(`${baseUrl}/${graph}/index.json`);
+			index.catch(() => (index = null));
+		}
+		return index;
+	}
+
+	function loadTile(key: string): Promise<TopicTile> {
+		let tile = tiles.get(key);
+		if (tile) {
+			tiles.delete(key);
+		} else {
+			tile = fetchJson<TopicTile>(`${baseUrl}/${graph}/${key}.json`);
+			tile.catch(() => tiles.delete(key));
+		}
+		tiles.set(key, tile);
+		return tile;
+	}
+
+	/** Everything visible in a view at a scale of k screen pixels per layout unit */
+	async function loadView(view: ViewBounds, k: number): Promise<TileView> {
+		const idx = await loadIndex();
+		const level = levelForScale(idx, k);
+		const keys = visibleTiles(idx, view, level);
+		const loaded = await Promise.all(keys.map(loadTile));
+		// Drop the least recently used tiles, never the ones of this view
+		const keep = new Set(keys);
+		for (const key of tiles.keys()) {
+			if (tiles.size <= MAX_CACHED_TILES) break;
+			if (!keep.has(key)) tiles.delete(key);
+		}
+		return { level, keys, ...mergeTiles(loaded) };
+	}
+
+	return { loadIndex, loadTile, loadView, cachedTiles: () => tiles.size };
+}
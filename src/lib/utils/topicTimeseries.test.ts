@@ -0,0 +1,97 @@
+import { describe, it, expect, vi } from 'vitest';
+import { createTopicTimeseriesLoader, formatPeriod, mergeRanges, type TimeseriesIndex } from './topicTimeseries.js';
+
+// Two topics with one monthly point each and a 2-month sparkline of one metric
+function packed(): { index: TimeseriesIndex; file: ArrayBuffer } {
+	const buffer = new ArrayBuffer(8 + 2 * 12 + 2 * 8);
+	const block = (offset: number, period: number, count: number, value: number) => {
+		new Int32Array(buffer, offset, 1)[0] = period;
+		new Uint32Array(buffer, offset + 4, 1)[0] = count;
+		new Float32Array(buffer, offset + 8, 1)[0] = value;
+	};
+	block(8, 2025 * 12 + 8, 3, 1.5);
+	block(20, 2025 * 12 + 7, 5, 2.5);
+	new Float32Array(buffer, 32, 4).set([0, 1.5, 2.5, 0]);
+	const index: TimeseriesIndex = {
+		version: 1,
+		file: 'timeseries.bin',
+		bytes: buffer.byteLength,
+		pointBytes: 12,
+		metrics: ['avg_reactions_per_1k'],
+		sections: {
+			month: { offset: 8, points: 2 },
+			quarter: { offset: 32, points: 0 },
+			year: { offset: 32, points: 0 },
+			sparkline: { offset: 32, stride: 8, months: 2, end: '2025-09', metrics: ['avg_reactions_per_1k'] }
+		},
+		topics: [
+			['finance', 'Finance', 0, 1, 0, 0, 0, 0],
+			['artificial-intelligence', 'Artificial Intelligence', 1, 1, 0, 0, 0, 0]
+		]
+	};
+	return { index, file: buffer };
+}
+
+function rangeFetch(honourRange = true) {
+	const { index, file } = packed();
+	return vi.fn(async (url: string, init?: RequestInit) => {
+		if (url.endsWith('.json')) return { ok: true, status: 200, json: async () => index } as Response;
+		const range = (init?.headers as Record<string, string> | undefined)?.Range;
+		if (!honourRange || !range) return { ok: true, status: 200, arrayBuffer: async () => file } as Response;
+		const [start, end] = range.replace('bytes=', '').split('-').map(Number);
+		return { ok: true, status: 206, arrayBuffer: async () => file.slice(start, end + 1) } as Response;
+	});
+}
+
+describe('formatPeriod', () => {
+	it('labels month, quarter and year periods', () => {
+		expect(formatPeriod('month', 2024 * 12 + 2)).toBe('2024-03');
+		expect(formatPeriod('quarter', 2024 * 4 + 3)).toBe('2024-Q4');
+		expect(formatPeriod('year', 2024)).toBe('2024');
+	});
+});
+
+describe('mergeRanges', () => {
+	it('coalesces overlapping and nearby ranges', () => {
+		expect(mergeRanges([[100, 200], [0, 50], [60, 90], [10000, 10010]], 16)).toEqual([
+			[0, 50],
+			[60, 200],
+			[10000, 10010]
+		]);
+	});
+});
+
+describe('createTopicTimeseriesLoader', () => {
+	it('reads several topics with one range request', async () => {
+		const fetchFn = rangeFetch();
+		const loader = createTopicTimeseriesLoader(fetchFn as unknown as typeof fetch);
+
+		const series = await loader.loadSeries(['Finance', 'Artificial Intelligence', 'Unknown']);
+		expect(series.get('Finance')?.periods).toEqual(['2025-09']);
+		expect(Array.from(series.get('Artificial Intelligence')!.post_count)).toEqual([5]);
+		expect(series.has('Unknown')).toBe(false);
+		// index + one coalesced range
+		expect(fetchFn).toHaveBeenCalledTimes(2);
+	});
+
+	it('batches sparkline calls made in the same tick', async () => {
+		const fetchFn = rangeFetch();
+		const loader = createTopicTimeseriesLoader(fetchFn as unknown as typeof fetch);
+
+		const [finance, ai] = await Promise.all([loader.sparkline('Finance'), loader.sparkline('Artificial Intelligence')]);
+		expect(finance?.months).toEqual(['2025-08', '2025-09']);
+		expect(Array.from(finance!.values.avg_reactions_per_1k)).toEqual([0, 1.5]);
+		expect(Array.from(ai!.values.avg_reactions_per_1k)).toEqual([2.5, 0]);
+		expect(fetchFn).toHaveBeenCalledTimes(2);
+	});
+
+	it('keeps the whole file when the server ignores Range', async () => {
+		const fetchFn = rangeFetch(false);
+		const loader = createTopicTimeseriesLoader(fetchFn as unknown as typeof fetch);
+
+		await loader.loadSeries(['Finance']);
+		const sparklines = await loader.loadSparklines(['Artificial Intelligence']);
+		expect(Array.from(sparklines.get('Artificial Intelligence')!.values.avg_reactions_per_1k)).toEqual([2.5, 0]);
+		expect(fetchFn).toHaveBeenCalledTimes(2);
+	});
+});
@@ -0,0 +1,230 @@
+// Reader for the packed topic timeseries written by preprocess_topic_timeseries.py.
+// Topic blocks are read with HTTP range requests; topics requested together are
+// coalesced into as few ranges as possible, since neighbouring rows of the
+// explorer table are stored next to each other.
+
+export const TIMESERIES_BASE_URL = '/jsons/topic_explorer';
+
+export type Granularity = 'month' | 'quarter' | 'year';
+
+export interface TimeseriesIndex {
+	version: number;
+	file: string;
+	bytes: number;
+	pointBytes: number;
+	metrics: string[];
+	sections: Record<Granularity, { offset: number; points: number }> & {
+		sparkline: { offset: number; stride: number; months: number; end: string; metrics: string[] };
+	};
+	/** [slug, topic, monthStart, monthCount, quarterStart, quarterCount, yearStart, yearCount] */
+	topics: Array<[string, string, number, number, number, number, number, number]>;
+}
+
+export interface TopicSeries {
+	topic: string;
+	/** Period labels: '2024-03', '2024-Q1' or '2024' */
+	periods: string[];
+	post_count: Uint32Array;
+	metrics: Record<string, Float32Array>;
+}
+
+export interface TopicSparkline {
+	/** The last months of the data, oldest first */
+	months: string[];
+	values: Record<string, Float32Array>;
+}
+
+const GRANULARITY_COLUMN: Record<Granularity, number> = { month: 2, quarter: 4, year: 6 };
+// Ranges closer than this are fetched as one request
+const MAX_RANGE_GAP = 4096;
+
+/** Same slug the timeseries are keyed by */
+export function slugify(s: string): string {
+	return s
+		.toLowerCase()
+		.replace(/[^a-z0-9]+/g, '-')
+		.replace(/^-+|-+$/g, '');
+}
+
+export function formatPeriod(granularity: Granularity, period: number): string {
+	if (granularity === 'year') return String(period);
+	if (granularity === 'quarter') return `${Math.floor(period / 4)}-Q${(period % 4) + 1}`;
+	return `${Math.floor(period / 12)}-${String((period % 12) + 1).padStart(2, '0')}`;
+}
+
+export function sparklineMonths(index: TimeseriesIndex): string[] {
+	const { end, months } = index.sections.sparkline;
+	const [year, month] = end.split('-').map(Number);
+	const last = year * 12 + month - 1;
+	return Array.from({ length: months }, (_, i) => formatPeriod('month', last - months + 1 + i));
+}
+
+/** Sorted, coalesced [start, end) byte ranges */
+export function mergeRanges(ranges: Array<[number, number]>, maxGap: number = MAX_RANGE_GAP): Array<[number, number]> {
+	const sorted = ranges.filter(([start, end]) => end > start).sort((a, b) => a[0] - b[0]);
+	const merged: Array<[number, number]> = [];
+	for (const [start, end] of sorted) {
+		const last = merged[merged.length - 1];
+		if (last && start <= last[1] + maxGap) last[1] = Math.max(last[1], end);
+		else merged.push([start, end]);
+	}
+	return merged;
+}
+
+/** Decode one columnar topic block: periods, post counts, then one float32 column per metric */
+export function parseBlock(
+	buffer: ArrayBuffer,
+	byteOffset: number,
+	count: number,
+	metrics: string[],
+	granularity: Granularity,
+	topic: string
+): TopicSeries {
+	const periods = new Int32Array(buffer, byteOffset, count);
+	const columns: Record<string, Float32Array> = {};
+	metrics.forEach((metric, i) => {
+		columns[metric] = new Float32Array(buffer, byteOffset + 4 * count * (2 + i), count);
+	});
+	return {
+		topic,
+		periods: Array.from(periods, (period) => formatPeriod(granularity, period)),
+		post_count: new Uint32Array(buffer, byteOffset + 4 * count, count),
+		metrics: columns
+	};
+}
+
+/**
+ * Create a loader bound to a fetch function. The index is fetched once; each
+ * call reads only the byte ranges of the requested topics. If the server
+ * ignores Range headers the whole file is kept and later reads are served
+ * from it.
+ */
+export function createTopicTimeseriesLoader(fetchFn: typeof fetch, baseUrl: string = TIMESERIES_BASE_URL) {
+	let index: Promise<TimeseriesIndex> | null = null;
+	let slugs: Map<string, number> | null = null;
+	let wholeFile: ArrayBuffer | null = null;
+	let pending = new Map<string, Array<(value: TopicSparkline | null) => void>>();
+	let flushScheduled = false;
+
+	function loadIndex(): Promise<TimeseriesIndex> {
+		if (!index) {
+			index = fetchFn(`${baseUrl}/timeseries_index.json`).then((response) => {
+				if (!response.ok) throw new Error(`Failed to load timeseries index: ${response.status}`);
+				return response.json();
+			}).then((loaded: TimeseriesIndex) => {
+				slugs = new Map(loaded.topics.map((entry, i) => [entry[0], i]));
+				return loaded;
+			});
+			index.catch(() => (index = null));
+		}
+		return index;
+	}
+
+	async function topicPositions(topicIds: string[]): Promise<Array<[string, number]>> {
+		await loadIndex();
+		const found: Array<[string, number]> = [];
+		for (const id of topicIds) {
+			const position = slugs!.get(slugify(id));
+			if (position !== undefined) found.push([id, position]);
+		}
+		return found;
+	}
+
+	/** Read [start, end) ranges; returns a lookup from an absolute offset to (buffer, relative offset) */
+	async function readRanges(ranges: Array<[number, number]>) {
+		const { file } = await loadIndex();
+		const url = `${baseUrl}/${file}`;
+		const chunks: Array<{ start: number; end: number; buffer: ArrayBuffer }> = [];
+		for (const [start, end] of mergeRanges(ranges)) {
+			if (wholeFile) {
+				chunks.push({ start: 0, end: wholeFile.byteLength, buffer: wholeFile });
+				break;
+			}
+			const response = await fetchFn(url, { headers: { Range: `bytes=${start}-${end - 1}` } });
+			if (!response.ok) throw new Error(`Failed to load ${url}: ${response.status}`);
+			const buffer = await response.arrayBuffer();
+			if (response.status === 206) {
+				chunks.push({ start, end, buffer });
+			} else {
+				wholeFile = buffer;
+				chunks.push({ start: 0, end: buffer.byteLength, buffer });
+				break;
+			}
+		}
+		return (offset: number): [ArrayBuffer, number] => {
+			const chunk = chunks.find((c) => offset >= c.start && offset < c.end)!;
+			return [chunk.buffer, offset - chunk.start];
+		};
+	}
+
+	/** Series of several topics at one granularity; topics without data are left out */
+	async function loadSeries(topicIds: string[], granularity: Granularity = 'month'): Promise<Map<string, TopicSeries>> {
+		const idx = await loadIndex();
+		const column = GRANULARITY_COLUMN[granularity];
+		const base = idx.sections[granularity].offset;
+		const blocks = (await topicPositions(topicIds))
+			.map(([id, position]) => {
+				const entry = idx.topics[position];
+				const start = base + entry[column] * idx.pointBytes;
+				return { id, topic: entry[1], start, count: entry[column + 1] };
+			})
+			.filter((block) => block.count > 0);
+
+		const read = await readRanges(blocks.map((b) => [b.start, b.start + b.count * idx.pointBytes]));
+		const result = new Map<string, TopicSeries>();
+		for (const block of blocks) {
+			const [buffer, offset] = read(block.start);
+			result.set(block.id, parseBlock(buffer, offset, block.count, idx.metrics, granularity, block.topic));
+		}
+		return result;
+	}
+
+	/** Precomputed sparklines (last months of the data) of several topics */
+	async function loadSparklines(topicIds: string[]): Promise<Map<string, TopicSparkline>> {
+		const idx = await loadIndex();
+		const { offset: base, stride, months: length, metrics } = idx.sections.sparkline;
+		const months = sparklineMonths(idx);
+		const positions = await topicPositions(topicIds);
+		const read = await readRanges(positions.map(([, p]) => [base + p * stride, base + (p + 1) * stride]));
+		const result = new Map<string, TopicSparkline>();
+		for (const [id, position] of positions) {
+			const [buffer, offset] = read(base + position * stride);
+			const values: Record<string, Float32Array> = {};
+			metrics.forEach((metric, i) => {
+				values[metric] = new Float32Array(buffer, offset + 4 * length * i, length);
+			});
+			result.set(id, { months, values });
+		}
+		return result;
+	}
+
+	async function flush() {
+		flushScheduled = false;
+		const batch = pending;
+		pending = new Map();
+		try {
+			const sparklines = await loadSparklines([...batch.keys()]);
+			for (const [id, resolvers] of batch) resolvers.forEach((resolve) => resolve(sparklines.get(id) ?? null));
+		} catch {
+			for (const resolvers of batch.values()) resolvers.forEach((resolve) => resolve(null));
+		}
+	}
+
+	/**
+	 * Sparkline of one topic, or null if it has none. Calls made in the same
+	 * tick (e.g. every row of a table mounting) share one batched read.
+	 */
+	function sparkline(topicId: string): Promise<TopicSparkline | null> {
+		return new Promise((resolve) => {
+			const resolvers = pending.get(topicId) ?? [];
+			resolvers.push(resolve);
+			pending.set(topicId, resolvers);
+			if (!flushScheduled) {
+				flushScheduled = true;
+				setTimeout(flush, 0);
+			}
+		});
+	}
+
+	return { loadIndex, loadSeries, loadSparklines, sparkline };
+}
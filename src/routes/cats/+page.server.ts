@@ -1,5 +1,6 @@
 import { error } from '@sveltejs/kit';
 import type { PageServerLoad } from './$types';
+import { createAssetResolver } from '$lib/utils/assetManifest';
 
 export interface CategoryData {
 	category: string;
@@ -44,7 +45,7 @@ async function loadCategoryData(fetch: typeof globalThis.fetch): Promise<Categor
 
 export const load: PageServerLoad = async ({ fetch }) => {
 	try {
-		const categories = await loadCategoryData(fetch);
+		const categories = await loadCategoryData(createAssetResolver(fetch).fetch);
 		
 		// Calculate some basic statistics
 		const totalCategories = categories.length;
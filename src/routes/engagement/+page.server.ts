@@ -1,6 +1,9 @@
 import type { PageServerLoad } from './$types';
+import { createAssetResolver } from '$lib/utils/assetManifest';
 
-export const load: PageServerLoad = async ({ fetch }) => {
+export const load: PageServerLoad = async ({ fetch: baseFetch }) => {
+    // Data files are read from their content-hashed copies when published
+    const fetch = createAssetResolver(baseFetch).fetch;
     try {
         // First, load the index to get metadata about the files
         const indexResponse = await fetch('/jsons/topics_meta/index.json');
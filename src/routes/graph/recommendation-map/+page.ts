@@ -1,12 +1,36 @@
+import { error } from '@sveltejs/kit';
 import type { PageLoad } from './$types';
-import graphData from '$lib/files/graph_data_optimized.json';
+import { parseColumnarGraph, toGraphData } from '$lib/utils/columnarGraph';
+import { createGraphLodLoader } from '$lib/utils/graphLod';
+import { createEgoNetworkLoader } from '$lib/utils/egoNetwork';
+import { createAssetResolver } from '$lib/utils/assetManifest';
 
 // Disable SSR for this page - no CPU-heavy serialization!
 export const ssr = false;
 export const prerender = false;
 
-export const load: PageLoad = async () => {
+export const load: PageLoad = async ({ fetch }) => {
+    // Neighbourhood of a selected publication, one small shard per lookup
+    const ego = createEgoNetworkLoader(fetch);
+
+    // Level-of-detail graph built by preprocess_graph_data.py: a few KB cluster overview,
+    // each cluster's publications fetched once the map zooms into it
+    const lod = createGraphLodLoader(fetch);
+    const lodIndex = await lod.loadIndex().catch(() => null);
+    if (lodIndex) {
+        return { lod, lodIndex, ego, graphData: null };
+    }
+
+    // Without it, the whole graph from the columnar binary: typed arrays instead of a JSON bundle
+    const response = await createAssetResolver(fetch).fetchAsset('graph_data_optimized.bin');
+    if (!response.ok) {
+        error(response.status, 'Unable to load graph data (jsons/graph_data_optimized.bin)');
+    }
+
     return {
-        graphData
+        lod: null,
+        lodIndex: null,
+        ego,
+        graphData: toGraphData(parseColumnarGraph(await response.arrayBuffer()))
     };
-};
\ No newline at end of file
+};
@@ -1,4 +1,5 @@
 import type { PageServerLoad } from './$types';
+import { createAssetResolver } from '$lib/utils/assetManifest';
 
 async function tryFetchJson(fetch: any, paths: string[]): Promise<any | null> {
     for (const p of paths) {
@@ -13,8 +14,8 @@ async function tryFetchJson(fetch: any, paths: string[]): Promise<any | null> {
 }
 
 export const load: PageServerLoad = async ({ fetch }) => {
-    // Load the lightweight index built by scripts/build_topic_explorer_json.py
-    const index = await tryFetchJson(fetch, [
+    // Load the lightweight index built by preprocess_topic_analytics.py
+    const index = await tryFetchJson(createAssetResolver(fetch).fetch, [
         '/jsons/topic_explorer/index.json',
         '/jsons/topic_explorer/summary.json',
         '/topic_explorer_index.json'
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Synthetic input generator for the preprocessing scripts.
+Writes recommendations.json and subscriber_counts.json in the real schemas
+at any size: a share of publications are bestsellers that recommend others,
+out-degrees follow a power law and recommendation targets are drawn with a
+heavy-tailed popularity, so the graph has hubs like the crawled one.
+With --posts it also writes data/posts.json for the topic analytics.
+
+    python synthetic_data.py 100000 /tmp/bench      # -> /tmp/bench/static/jsons/*.json
+    python synthetic_data.py 5000 /tmp/bench --posts 200000
+"""
+
+import argparse
+import json
+import os
+import random
+from datetime import datetime, timezone
+from typing import Dict, Iterator
+
+CATEGORIES = [
+    'culture', 'technology', 'business', 'us-politics', 'finance', 'food', 'sports', 'faith',
+    'news', 'music', 'comics', 'crypto', 'international', 'health', 'philosophy', 'art',
+    'climate', 'science', 'literature', 'fiction', 'parenting', 'design', 'fashion', 'travel',
+    'education', 'history', 'humor', 'world-politics', 'podcast', 'finance-markets',
+]
+
+WORDS = [
+    'daily', 'notes', 'letter', 'weekly', 'signal', 'review', 'digest', 'field', 'garden', 'report',
+    'brief', 'journal', 'column', 'post', 'dispatch', 'memo', 'thread', 'index', 'margin', 'ledger',
+]
+
+TOPICS = [
+    'Artificial Intelligence', 'Politics', 'Finance', 'Health', 'Climate', 'Books', 'Startups', 'Music',
+    'Parenting', 'History', 'Science', 'Media', 'Crypto', 'Food', 'Travel', 'Education', 'Faith', 'Sports',
+    'Design', 'Philosophy', 'Economics', 'Technology', 'Culture', 'Writing',
+]
+
+
+def publication_host(index: int, rng: random.Random) -> Dict:
+    """Subdomain, slug and optional custom domain for publication `index`."""
+    slug = f"{rng.choice(WORDS)}{rng.choice(WORDS)}{index}"
+    custom_domain = f"{slug}.com" if rng.random() < 0.2 else None
+    return {'slug': slug, 'subdomain': slug, 'custom_domain': custom_domain}
+
+
+def generate(num_publications: int, seed: int = 42, bestseller_share: float = 0.12,
+             subscriber_share: float = 0.4, degree_exponent: float = 2.1,
+             min_out_degree: int = 3, max_out_degree: int = 50) -> Dict[str, Iterator]:
+    """
+    Generate the publication set and return lazy record streams for both inputs.
+    Bestsellers are a prefix of the subscriber list, as in the crawl.
+    """
+    rng = random.Random(seed)
+    hosts = [publication_host(i, rng) for i in range(num_publications)]
+    urls = [f"https://{h['custom_domain'] or h['subdomain'] + '.substack.com'}" for h in hosts]
+    num_bestsellers = max(1, int(num_publications * bestseller_share))
+    num_subscribed = max(num_bestsellers, int(num_publications * subscriber_share))
+
+    # Heavy-tailed popularity: the target rank is Pareto distributed, so low ranks are hubs
+    popularity = list(range(num_publications))
+    rng.shuffle(popularity)
+
+    def target(rng: random.Random) -> int:
+        rank = int(rng.paretovariate(1.2)) - 1
+        return popularity[rank % num_publications]
+
+    def iter_subscribers() -> Iterator[Dict]:
+        rng = random.Random(seed + 1)
+        for i in range(num_subscribed):
+            count = int(rng.lognormvariate(6, 2.2))
+            bestseller = i < num_bestsellers
+            yield {
+                **hosts[i],
+                'publication_id': i + 1,
+                'name': hosts[i]['slug'].title(),
+                'subscriber_count': count,
+                'subscriber_count_display': f"{count:,} subscribers",
+                'publication_url': urls[i],
+                'category': rng.choice(CATEGORIES),
+                'category_2': rng.choice(CATEGORIES) if rng.random() < 0.3 else None,
+                'is_bestseller': bestseller,
+            }
+
+    def iter_recommendations() -> Iterator:
+        rng = random.Random(seed + 2)
+        for i in range(num_bestsellers):
+            # Power-law out-degree, P(k) ~ k^-degree_exponent, capped like the crawl's lists
+            degree = min(max_out_degree, int(min_out_degree * rng.paretovariate(degree_exponent - 1)))
+            # Targets are bare hosts, as in the crawled recommendation lists
+            yield urls[i], [urls[target(rng)][len('https://'):] for _ in range(degree)]
+
+    return {'subscriber_counts': iter_subscribers(), 'recommendations': iter_recommendations()}
+
+
+def iter_posts(num_posts: int, num_publications: int, seed: int = 42) -> Iterator[Dict]:
+    """
+    Posts in the crawl's schema: publications post with heavy-tailed activity,
+    engagement is lognormal and each post carries one to three topics.
+    """
+    rng = random.Random(seed + 3)
+    start = datetime(2019, 1, 1, tzinfo=timezone.utc).timestamp()
+    span = datetime(2025, 10, 1, tzinfo=timezone.utc).timestamp() - start
+    for i in range(num_posts):
+        publication = int(rng.paretovariate(1.1)) % num_publications
+        words = [rng.choice(WORDS) for _ in range(rng.randint(3, 12))]
+        if rng.random() < 0.3:
+            words.insert(0, str(rng.randint(2, 20)))
+        title = ' '.join(words).capitalize() + rng.choice(['', '', '', '?', '!'])
+        paragraphs = min(int(rng.paretovariate(0.8) * 3), 300)
+        body = ''.join(f"<p>{' '.join(rng.choice(WORDS) for _ in range(30))}</p>" for _ in range(paragraphs))
+        if rng.random() < 0.5:
+            body += '<img src="x.png">'
+        if rng.random() < 0.25:
+            body += '<ul><li>item</li></ul>'
+        body += '<a href="#">link</a>' * rng.randint(0, 5)
+        reactions = int(rng.lognormvariate(2.5, 1.6))
+        yield {
+            'title': title,
+            'canonical_url': f"https://post{i}.substack.com/p/{words[0]}-{i}",
+            'post_date': datetime.fromtimestamp(start + rng.random() * span, timezone.utc).isoformat(),
+            'publication_id': publication + 1,
+            'reaction_count': reactions,
+            'comment_count': int(reactions * rng.random() * 0.3),
+            'restacks': int(reactions * rng.random() * 0.1),
+            'body_html': body,
+            'topics': rng.sample(TOPICS, rng.randint(1, 3)),
+        }
+
+
+def write_posts(directory: str, num_posts: int, num_publications: int, seed: int = 42) -> str:
+    """Write directory/data/posts.json as JSON lines and return its path."""
+    path = os.path.join(directory, 'data', 'posts.json')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        for post in iter_posts(num_posts, num_publications, seed):
+            f.write(json.dumps(post))
+            f.write('\n')
+    return path
+
+
+def write_inputs(directory: str, num_publications: int, seed: int = 42) -> Dict[str, str]:
+    """Write both input files under directory/static/jsons and return their paths."""
+    data_dir = os.path.join(directory, 'static', 'jsons')
+    os.makedirs(data_dir, exist_ok=True)
+    streams = generate(num_publications, seed)
+    paths = {name: os.path.join(data_dir, f"{name}.json") for name in streams}
+
+    with open(paths['subscriber_counts'], 'w') as f:
+        f.write('[')
+        for index, item in enumerate(streams['subscriber_counts']):
+            f.write(',\n' if index else '\n')
+            f.write(json.dumps(item))
+        f.write('\n]\n')
+
+    # recommendations.json is a one-element array holding the url -> list object
+    with open(paths['recommendations'], 'w') as f:
+        f.write('[{')
+        for index, (url, recommended) in enumerate(streams['recommendations']):
+            f.write(',\n' if index else '\n')
+            f.write(f"{json.dumps(url)}: {json.dumps(recommended)}")
+        f.write('\n}]\n')
+
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic preprocessing inputs.')
+    parser.add_argument('publications', type=int, help='number of publications')
+    parser.add_argument('directory', help='output root; files go to <directory>/static/jsons')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--posts', type=int, default=0, help='also write this many posts to data/posts.json')
+    args = parser.parse_args()
+
+    paths = write_inputs(args.directory, args.publications, args.seed)
+    if args.posts:
+        paths['posts'] = write_posts(args.directory, args.posts, args.publications, args.seed)
+    for path in paths.values():
+        print(f"Wrote {path} ({os.path.getsize(path) / 1024 / 1024:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+import pytest
+
+from graph_columnar import ALIGNMENT, MAGIC, ColumnarGraphWriter, read_columnar_graph
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'graph.bin')
+    writer = ColumnarGraphWriter(3)
+    writer.add_strings('id', ['https://a.com', 'https://b.com', 'https://c.com'])
+    # Shares the string table with the ids
+    writer.add_strings('name', ['A', 'https://b.com', 'Ç'])
+    writer.add_categorical('group', ['cluster-0', 'cluster-1', 'cluster-0'])
+    writer.add_column('subscriber_count', 'uint32', [5000, 0, 12])
+    writer.add_column('val', 'float32', [1.5, 2.0, 0.25])
+    writer.add_column('x', 'float64', [-1.0, 0.0, 1e300])
+    writer.set_edges([0, 0, 2], [1, 2, 1], [1.0, 0.5, 2.0])
+    size = writer.write(path, {'total_nodes': 3})
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    assert len(data) == size
+    assert data[:len(MAGIC)] == MAGIC
+
+    graph = read_columnar_graph(path)
+    assert graph['nodeCount'] == 3
+    assert graph['edgeCount'] == 3
+    assert graph['metadata'] == {'total_nodes': 3}
+    assert graph['columns'] == {
+        'id': ['https://a.com', 'https://b.com', 'https://c.com'],
+        'name': ['A', 'https://b.com', 'Ç'],
+        'group': ['cluster-0', 'cluster-1', 'cluster-0'],
+        'subscriber_count': [5000, 0, 12],
+        'val': [1.5, 2.0, 0.25],
+        'x': [-1.0, 0.0, 1e300],
+    }
+    assert graph['edges'] == {'source': [0, 0, 2], 'target': [1, 2, 1], 'weight': [1.0, 0.5, 2.0]}
+
+
+def test_buffers_are_aligned(tmp_path):
+    path = str(tmp_path / 'graph.bin')
+    writer = ColumnarGraphWriter(3)
+    writer.add_column('flag', 'uint8', [1, 0, 1])
+    writer.add_column('val', 'float64', [1.0, 2.0, 3.0])
+    writer.set_edges([0], [2])
+    writer.write(path)
+
+    assert all(descriptor['offset'] % ALIGNMENT == 0 for descriptor in writer.columns.values())
+    assert read_columnar_graph(path)['columns']['val'] == [1.0, 2.0, 3.0]
+
+
+def test_column_length_is_checked():
+    writer = ColumnarGraphWriter(2)
+    with pytest.raises(ValueError):
+        writer.add_column('val', 'float32', [1.0])
+
+
+def test_reader_rejects_other_files(tmp_path):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'SGSNAP01' + bytes(16))
+    with pytest.raises(ValueError):
+        read_columnar_graph(str(path))
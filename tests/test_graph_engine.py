@@ -0,0 +1,46 @@
+from array import array
+
+from graph_engine import ID_TYPECODE, CSRGraph, build_recommendation_graph
+
+
+def ids(values):
+    return array(ID_TYPECODE, values)
+
+
+def test_from_edges_keeps_insertion_order_per_source():
+    # Sources out of order, with duplicates and a node without out-edges
+    sources = ids([2, 0, 2, 0, 2, 3])
+    targets = ids([1, 3, 0, 1, 1, 0])
+    weights = array('q', [10, 20, 30, 40, 50, 60])
+    graph = CSRGraph.from_edges(4, sources, targets, weights)
+
+    assert list(graph.offsets) == [0, 2, 2, 5, 6]
+    assert list(graph.successors(0)) == [3, 1]
+    assert list(graph.successors(1)) == []
+    assert list(graph.successors(2)) == [1, 0, 1]
+    assert list(graph.successors(3)) == [0]
+    # Weights move with their edges
+    assert list(graph.weights) == [20, 40, 10, 30, 50, 60]
+
+
+def test_from_edges_grouped_sources_and_degrees():
+    graph = CSRGraph.from_edges(3, ids([0, 0, 1]), ids([1, 2, 2]))
+
+    assert list(graph.targets) == [1, 2, 2]
+    assert list(graph.edge_sources()) == [0, 0, 1]
+    assert list(graph.out_degrees()) == [2, 1, 0]
+    assert list(graph.in_degrees()) == [0, 1, 2]
+
+
+def test_build_recommendation_graph_canonicalizes_and_keeps_duplicates():
+    recommendations = [
+        ('https://a.substack.com', ['https://b.substack.com', 'https://www.b.substack.com']),
+        ('https://b.substack.com', ['https://a.substack.com']),
+    ]
+    interner, graph, recommenders = build_recommendation_graph(
+        recommendations, canonicalize=lambda url: url.replace('www.', ''))
+
+    assert interner.keys == ['https://a.substack.com', 'https://b.substack.com']
+    assert list(recommenders) == [0, 1]
+    assert list(graph.successors(0)) == [1, 1]
+    assert list(graph.in_degrees()) == [1, 2]
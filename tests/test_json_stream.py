@@ -0,0 +1,71 @@
+import io
+import json
+
+import pytest
+
+import json_stream
+from json_stream import iter_json_array, iter_json_object_items, write_json_array, write_json_object
+
+RECORDS = [
+    {'publication_url': r'https:\/\/café.substack.com', 'name': 'Café "Society"', 'subscriber_count': 12345678901},
+    {'name': 'escapes \\ \n \t ☃', 'score': -1.5e10, 'tags': [], 'nested': {'a': [1, 2, {'b': None}]}},
+    1234567,
+    'plain',
+    True,
+    False,
+    None,
+    0.25,
+]
+
+
+@pytest.fixture(params=[1, 2, 3, 5, 7, 64])
+def chunk_size(request, monkeypatch):
+    """Tiny chunks put every token boundary of the inputs at a chunk edge."""
+    monkeypatch.setattr(json_stream, 'CHUNK_SIZE', request.param)
+    return request.param
+
+
+def write(tmp_path, text):
+    path = tmp_path / 'data.json'
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+def test_array_across_chunk_boundaries(tmp_path, chunk_size):
+    text = json.dumps(RECORDS, indent=4, ensure_ascii=False)
+    assert list(iter_json_array(write(tmp_path, text))) == json.loads(text)
+
+
+def test_number_at_chunk_end_is_not_cut(tmp_path, chunk_size):
+    # Without the lookahead, '[1234]' read two characters at a time would yield 12
+    assert list(iter_json_array(write(tmp_path, '[1234, 5678]'))) == [1234, 5678]
+    assert list(iter_json_array(write(tmp_path, '[1234567]'))) == [1234567]
+
+
+def test_empty_containers(tmp_path, chunk_size):
+    assert list(iter_json_array(write(tmp_path, ' [ ] '))) == []
+    assert list(iter_json_object_items(write(tmp_path, '[{}]'))) == []
+
+
+def test_object_items_in_recommendations_layout(tmp_path, chunk_size):
+    recommendations = {'https://a.substack.com': ['https://b.substack.com'], 'https://b.substack.com': []}
+    # recommendations.json wraps the object in an array; a bare object works too
+    for text in (json.dumps([recommendations]), json.dumps(recommendations, indent=2)):
+        assert dict(iter_json_object_items(write(tmp_path, text))) == recommendations
+
+
+def test_truncated_input_raises(tmp_path, chunk_size):
+    with pytest.raises(ValueError):
+        list(iter_json_array(write(tmp_path, '[{"a": 1}, {"b": ')))
+
+
+def test_writers_round_trip(tmp_path):
+    buffer = io.StringIO()
+    assert write_json_array(buffer, iter(RECORDS)) == len(RECORDS)
+    assert json.loads(buffer.getvalue()) == json.loads(json.dumps(RECORDS))
+
+    path = str(tmp_path / 'graph.json')
+    counts = write_json_object(path, {'nodes': iter([{'id': 1}, {'id': 2}]), 'metadata': {'total_nodes': 2}})
+    assert counts['nodes'] == 2
+    with open(path) as f:
+        assert json.load(f) == {'nodes': [{'id': 1}, {'id': 2}], 'metadata': {'total_nodes': 2}}
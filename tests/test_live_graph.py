@@ -0,0 +1,76 @@
+import copy
+
+from category_aggregation import aggregate_categories
+from live_graph import CATEGORIES, COUNTS, SOURCES, LiveRecommendationGraph
+
+A = 'https://a.substack.com'
+B = 'https://b.substack.com'
+C = 'https://c.com'
+
+PUBLICATIONS = [
+    {'publication_url': A, 'subdomain': 'a', 'category': 'tech', 'subscriber_count': 1000},
+    {'publication_url': B, 'subdomain': 'b', 'category': 'tech', 'subscriber_count': 0},
+    {'publication_url': C, 'custom_domain': 'c.com', 'category': 'food', 'subscriber_count': 50},
+]
+RECOMMENDATIONS = {
+    A: ['https://b.substack.com/', 'https://www.c.com'],
+    'https://b.substack.com': [A, 'https://unknown.substack.com'],
+}
+
+
+def snapshot_counters(live):
+    graph, stats = live.category_graph()
+    return {
+        'incoming': live.incoming_counts(),
+        'outgoing': live.outgoing_counts(),
+        'category_edges': list(zip(graph.edge_sources(), graph.targets, graph.weights)),
+        'category_stats': stats,
+    }
+
+
+def test_initial_state_matches_the_batch_aggregation():
+    live = LiveRecommendationGraph(copy.deepcopy(PUBLICATIONS), RECOMMENDATIONS.items())
+    _, graph, stats = aggregate_categories(RECOMMENDATIONS.items(), copy.deepcopy(PUBLICATIONS))
+    live_graph, live_stats = live.category_graph()
+
+    assert live.incoming_counts() == {A: 1, B: 1, C: 1}
+    assert live.outgoing_counts() == {A: 2, B: 2}
+    assert list(live_graph.weights) == list(graph.weights)
+    assert live_stats == stats
+
+
+def test_delta_matches_a_rebuild_from_the_final_state():
+    live = LiveRecommendationGraph(copy.deepcopy(PUBLICATIONS), copy.deepcopy(RECOMMENDATIONS).items())
+    affected = live.apply({
+        'recommendations': {
+            'removed': {A: ['https://www.c.com']},
+            'added': {'https://c.com': [A, B]},
+            'replaced': {'https://b.substack.com': ['https://unknown.substack.com']},
+        },
+        'subscriber_counts': {'b.substack.com': 200, C: 0},
+    })
+    assert affected == {COUNTS, CATEGORIES, SOURCES}
+
+    final_publications = copy.deepcopy(PUBLICATIONS)
+    final_publications[1]['subscriber_count'] = 200
+    final_publications[2]['subscriber_count'] = 0
+    rebuilt = LiveRecommendationGraph(final_publications, copy.deepcopy(live.recommendations).items())
+
+    assert live.recommendations == {
+        A: ['https://b.substack.com/'],
+        'https://b.substack.com': ['https://unknown.substack.com'],
+        'https://c.com': [A, B],
+    }
+    assert snapshot_counters(live) == snapshot_counters(rebuilt)
+    assert [record['subscriber_count'] for record in live.records] == [1000, 200, 0]
+
+
+def test_unknown_targets_are_skipped():
+    live = LiveRecommendationGraph(copy.deepcopy(PUBLICATIONS), RECOMMENDATIONS.items())
+    affected = live.apply({
+        'recommendations': {'removed': {A: ['https://never-recommended.com']}},
+        'subscriber_counts': {'https://unknown.example': 5},
+    })
+
+    assert affected == set()
+    assert live.skipped == 2
@@ -0,0 +1,69 @@
+from publication_resolver import PublicationResolver, extract_publication_identifier, normalize_host
+
+LENNY = 'https://www.lennysnewsletter.com'
+ANNIE = 'https://annie.substack.com'
+FIXTHENEWS = 'https://fixthenews.com'
+
+
+def publications():
+    return [
+        # A contributor record: the author's handle as slug, the publication
+        # they write for as subdomain. Listed first, so it claims
+        # lenny.substack.com before Lenny's own record does.
+        {'publication_url': ANNIE, 'slug': 'annie', 'subdomain': 'lenny'},
+        # Hosted at its custom domain, with lenny.substack.com as its subdomain
+        {'publication_url': LENNY, 'custom_domain': 'lennysnewsletter.com', 'subdomain': 'lenny'},
+        # Claims another publication's canonical host as its custom domain
+        {'publication_url': FIXTHENEWS, 'custom_domain': 'annie.substack.com'},
+        # Repeated publication
+        {'publication_url': 'https://lennysnewsletter.com/', 'subdomain': 'other'},
+    ]
+
+
+def test_normalize_host_and_identifier():
+    assert normalize_host(' HTTPS://www.Example.com:443/p/post?x=1 ') == 'example.com'
+    assert extract_publication_identifier('https://lenny.substack.com') == 'lenny'
+    assert extract_publication_identifier('www.lennysnewsletter.com') == 'lennysnewsletter'
+
+
+def test_contested_alias_goes_to_the_self_hosted_publication():
+    resolver = PublicationResolver(publications())
+
+    assert resolver.resolve('https://lenny.substack.com/p/some-post') == LENNY
+    assert resolver.conflicts['lenny.substack.com'] == [LENNY, ANNIE]
+
+
+def test_canonical_host_is_never_taken_over_by_an_alias():
+    resolver = PublicationResolver(publications())
+
+    assert resolver.resolve('annie.substack.com') == ANNIE
+    assert resolver.conflicts['annie.substack.com'] == [ANNIE, FIXTHENEWS]
+
+
+def test_repeated_publications_are_registered_once():
+    resolver = PublicationResolver(publications())
+
+    assert resolver.urls == [ANNIE, LENNY, FIXTHENEWS]
+    assert resolver.resolve('https://www.lennysnewsletter.com/about') == LENNY
+
+
+def test_identifier_fallback_only_when_unambiguous():
+    resolver = PublicationResolver(publications() + [
+        {'publication_url': 'https://daily.substack.com'},
+        {'publication_url': 'https://daily.com'},
+    ])
+
+    # fixthenews is owned by one publication, daily by two
+    assert resolver.resolve('https://fixthenews.substack.com') == FIXTHENEWS
+    assert resolver.resolve('https://daily.net') is None
+    assert resolver.resolve_id('https://unknown.example') == -1
+    assert resolver.canonical_url('https://www.unknown.example/') == 'https://unknown.example'
+
+
+def test_from_index_resolves_like_the_original():
+    resolver = PublicationResolver(publications())
+    rebuilt = PublicationResolver.from_index(resolver.urls, resolver.index, resolver.identifier_index)
+
+    for url in ('lenny.substack.com', 'annie.substack.com', 'https://fixthenews.substack.com', 'nope.com'):
+        assert rebuilt.resolve(url) == resolver.resolve(url)
+    assert list(rebuilt.resolve_ids(['lennysnewsletter.com', 'nope.com'])) == [1, -1]
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Watch mode for the publication data.
+Parses subscriber_counts.json and recommendations.json once, keeps the graph
+and its counters in memory (live_graph.py) and applies crawler delta files as
+they appear in the delta directory. Each batch rewrites only the outputs it
+affects:
+
+- recommendation_counts.json and publications_merged.json when recommendation
+  or subscriber counts of known publications change
+- categories.json and category_graph_data_optimized.json when category
+  weights or subscriber statistics change
+
+Applied deltas are moved to <deltas>/applied/ and folded into the source files
+at the next checkpoint, after which they are deleted; on startup any applied
+deltas not yet checkpointed are replayed first. Outputs that depend on the
+whole graph (layout, PageRank, communities, the search index) are left to
+build_data.py.
+
+Run from the repository root:
+    python watch_data.py                 # watch .build-cache/deltas
+    python watch_data.py --once          # apply pending deltas, checkpoint and exit
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+from typing import List, Set
+
+from instrumentation import RunReport
+from json_stream import iter_json_array, iter_json_object_items, write_json_array, write_json_object
+from live_graph import CATEGORIES, COUNTS, SOURCES, LiveRecommendationGraph
+from preprocess_category_graph_data import (GRAPH_OUTPUTS, STATS_OUTPUTS, add_node_groups, build_category_nodes,
+                                            copy_outputs, iter_category_links)
+from preprocess_recommendation_counts import iter_recommendation_counts, rank_publications
+from publications_merge import write_merged_publications
+
+SUBSCRIBER_COUNTS_FILE = 'static/jsons/subscriber_counts.json'
+RECOMMENDATIONS_FILE = 'static/jsons/recommendations.json'
+RECOMMENDATION_COUNTS_FILE = 'static/jsons/recommendation_counts.json'
+
+DELTA_DIRECTORY = '.build-cache/deltas'
+POLL_INTERVAL = 2.0
+CHECKPOINT_INTERVAL = 300.0
+
+
+def pending_deltas(directory: str) -> List[str]:
+    """Delta files waiting in directory, oldest name first."""
+    return sorted(glob.glob(os.path.join(directory, '*.json')))
+
+
+def write_counts(live: LiveRecommendationGraph) -> None:
+    incoming = live.incoming_counts()
+    outgoing = live.outgoing_counts()
+    ranked = rank_publications(live.resolver.urls, incoming, outgoing)
+    with open(RECOMMENDATION_COUNTS_FILE, 'w') as f:
+        write_json_array(f, iter_recommendation_counts(ranked, incoming, outgoing))
+    write_merged_publications(live.table, incoming, outgoing)
+
+
+def write_categories(live: LiveRecommendationGraph) -> None:
+    graph, categories_data = live.category_graph()
+    with open(STATS_OUTPUTS[0], 'w') as f:
+        json.dump(categories_data, f, separators=(',', ':'))
+    copy_outputs(STATS_OUTPUTS)
+
+    # Same node construction and ordering as preprocess_category_graph_data.py
+    nodes = build_category_nodes(categories_data)
+    add_node_groups(nodes, graph)
+    nodes.sort(key=lambda x: (-x.get('subscriber_count', 0), x['name']))
+    node_ids = [f"category_{category_name}" for category_name in live.categories.keys]
+    metadata = {
+        'total_nodes': len(nodes),
+        'total_links': graph.num_edges,
+        'categories_count': len(live.categories),
+        'total_recommendations': sum(graph.weights)
+    }
+    write_json_object(GRAPH_OUTPUTS[0], {
+        'nodes': nodes,
+        'links': iter_category_links(graph, node_ids),
+        'metadata': metadata
+    })
+    copy_outputs(GRAPH_OUTPUTS)
+
+
+def write_sources(live: LiveRecommendationGraph) -> None:
+    """
+    Fold the applied deltas into the source files, in their original layout:
+    subscriber_counts.json is indented and escapes slashes (https:\\/\\/), so
+    an unchanged file is rewritten byte for byte.
+
+    Both files are written in full to temporary files before either replaces
+    its source, so an interrupted checkpoint never leaves a truncated input.
+    """
+    temporaries = {path: f"{path}.tmp" for path in (RECOMMENDATIONS_FILE, SUBSCRIBER_COUNTS_FILE)}
+    with open(temporaries[RECOMMENDATIONS_FILE], 'w') as f:
+        json.dump([live.recommendations], f)
+        f.flush()
+        os.fsync(f.fileno())
+    with open(temporaries[SUBSCRIBER_COUNTS_FILE], 'w') as f:
+        # '/' only occurs inside JSON strings
+        f.write(json.dumps(live.records, indent=4).replace('/', '\\/'))
+        f.flush()
+        os.fsync(f.fileno())
+    for path, temporary in temporaries.items():
+        os.replace(temporary, path)
+
+
+def checkpoint(live: LiveRecommendationGraph, applied_directory: str) -> None:
+    """Write the sources and, once both are in place, drop the applied deltas they now contain."""
+    write_sources(live)
+    for path in pending_deltas(applied_directory):
+        os.remove(path)
+    print("[checkpoint] source files updated")
+
+
+def apply_batch(live: LiveRecommendationGraph, paths: List[str], applied_directory: str) -> Set[str]:
+    """Apply delta files in order, moving each to applied_directory; returns the affected outputs."""
+    affected: Set[str] = set()
+    for path in paths:
+        try:
+            with open(path, 'r') as f:
+                delta = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            # Possibly still being written; retried on the next poll
+            print(f"[skip] {path}: {e}")
+            continue
+        affected |= live.apply(delta)
+        if os.path.dirname(path) != applied_directory:
+            os.replace(path, os.path.join(applied_directory, os.path.basename(path)))
+    return affected
+
+
+def write_outputs(live: LiveRecommendationGraph, affected: Set[str]) -> List[str]:
+    written = []
+    if COUNTS in affected:
+        write_counts(live)
+        written.append('counts')
+    if CATEGORIES in affected:
+        write_categories(live)
+        written.append('categories')
+    return written
+
+
+def main():
+    """Main processing function."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--deltas', default=DELTA_DIRECTORY, help=f"delta directory (default: {DELTA_DIRECTORY})")
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL, help='seconds between polls')
+    parser.add_argument('--checkpoint-interval', type=float, default=CHECKPOINT_INTERVAL,
+                        help='seconds between folding applied deltas into the source files')
+    parser.add_argument('--once', action='store_true', help='apply pending deltas, checkpoint and exit')
+    args = parser.parse_args()
+
+    applied_directory = os.path.join(args.deltas, 'applied')
+    os.makedirs(applied_directory, exist_ok=True)
+
+    report = RunReport('watch_data')
+    print("Loading data files...")
+    with report.stage('load') as stage:
+        live = LiveRecommendationGraph(iter_json_array(SUBSCRIBER_COUNTS_FILE),
+                                       iter_json_object_items(RECOMMENDATIONS_FILE))
+        stage.items = sum(live.out_degrees.values())
+    print(f"Loaded {len(live.resolver)} publications and {stage.items} recommendations "
+          f"in {stage.seconds:.2f}s ({stage.process_peak_rss_mb:.0f} MB process peak)")
+
+    # Deltas applied after the last checkpoint are not in the sources yet
+    replay = pending_deltas(applied_directory)
+    uncheckpointed = bool(replay)
+    if replay:
+        with report.stage('replay') as stage:
+            write_outputs(live, apply_batch(live, replay, applied_directory))
+            stage.items = len(replay)
+        print(f"Replayed {len(replay)} applied delta(s) in {stage.seconds:.2f}s")
+
+    print(f"Watching {args.deltas}/ (Ctrl+C to stop)")
+    last_checkpoint = time.monotonic()
+    try:
+        while True:
+            batch = pending_deltas(args.deltas)
+            if batch:
+                started = time.perf_counter()
+                affected = apply_batch(live, batch, applied_directory)
+                applied = time.perf_counter()
+                written = write_outputs(live, affected)
+                uncheckpointed |= SOURCES in affected
+                print(f"[delta] {len(batch)} file(s): applied in {(applied - started) * 1000:.1f} ms, "
+                      f"wrote {', '.join(written) or 'nothing'} in {(time.perf_counter() - applied) * 1000:.1f} ms"
+                      + (f" ({live.skipped} unknown entries skipped so far)" if live.skipped else ''))
+
+            if uncheckpointed and (args.once or time.monotonic() - last_checkpoint >= args.checkpoint_interval):
+                checkpoint(live, applied_directory)
+                uncheckpointed = False
+                last_checkpoint = time.monotonic()
+
+            if args.once:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("\nStopping watch mode")
+        if uncheckpointed:
+            checkpoint(live, applied_directory)
+
+if __name__ == '__main__':
+    main()